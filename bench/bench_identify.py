@@ -0,0 +1,78 @@
+# bench/bench_identify.py
+# Розпізнавання за фото: скільки байтів іде в Plant.id і скільки триває
+# identify від кінця до кінця — старий шлях (photo[-1] + base64 усього тіла)
+# проти нового (pick_photo_size + потокове тіло) і повторного фото (кеш).
+# Фейковий Plant.id (bench/fake_plantid.py) імітує пропускну здатність каналу.
+# Запуск: python bench/bench_identify.py [--photos 30] [--mbps 20] [--latency 0.3]
+import argparse
+import asyncio
+import base64
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+# розміри, які Telegram зазвичай зберігає для фото з камери (приблизна вага JPEG)
+Size = namedtuple("Size", "width height file_size")
+TG_SIZES = [Size(90, 68, 1_500), Size(320, 240, 18_000), Size(800, 600, 80_000), Size(1280, 960, 190_000)]
+
+def _p(samples, q):
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(len(s) * q / 100))]
+
+async def _old_identify(img: bytes):
+    """Як було: найбільше фото, base64 і JSON усього тіла в пам'яті."""
+    from plantbot import net
+    from plantbot.resolvers import PLANT_ID_IDENTIFY_URL, IDENTIFY_DETAILS, parse_identify_response
+    payload = {"images": [base64.b64encode(img).decode("ascii")], "plant_details": list(IDENTIFY_DETAILS)}
+    r = await net.request("POST", PLANT_ID_IDENTIFY_URL, json=payload, deadline=60)
+    return parse_identify_response(r.json())
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--photos", type=int, default=30)
+    ap.add_argument("--mbps", type=float, default=20.0, help="пропускна здатність до Plant.id")
+    ap.add_argument("--latency", type=float, default=0.3, help="час обробки на боці Plant.id, сек")
+    args = ap.parse_args()
+
+    from fake_plantid import FakePlantId
+    fake = FakePlantId(args.mbps, args.latency)
+    # сервер стартує до імпорту plantbot.resolvers, який читає PLANT_ID_BASE_URL
+    tmp = tempfile.mkdtemp(prefix="plantbot-bench-")
+    os.environ.update(DB_PATH=os.path.join(tmp, "bench.db"), TELEGRAM_TOKEN="123:bench")
+    os.environ["PLANT_ID_BASE_URL"] = await fake.start()
+    from plantbot import net
+    from plantbot.imageprep import pick_photo_size
+    from plantbot.resolvers import identify_image
+
+    photos = [{s: os.urandom(s.file_size) for s in TG_SIZES} for _ in range(args.photos)]
+
+    async def old(p):
+        return await _old_identify(p[TG_SIZES[-1]])
+
+    async def new(p):
+        return await identify_image(p[pick_photo_size(TG_SIZES)])
+
+    print(f"{'mode':>8} {'calls':>6} {'KB sent':>9} {'p50 ms':>8} {'p99 ms':>8} {'peak KB':>8}")
+    for mode, fn in (("old", old), ("new", new), ("repeat", new)):
+        fake.received, fake.calls, samples, peak = 0, 0, [], 0
+        for p in photos:
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            await fn(p)
+            samples.append((time.perf_counter() - t0) * 1000)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        print(f"{mode:>8} {fake.calls:>6} {fake.received / 1024:>9.0f} {_p(samples, 50):>8.1f} "
+              f"{_p(samples, 99):>8.1f} {peak / 1024:>8.0f}")
+    await net.aclose()
+    await fake.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
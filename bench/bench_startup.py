@@ -0,0 +1,102 @@
+# bench/bench_startup.py
+# Холодний старт: кожен прогін — новий процес інтерпретатора на тій самій БД.
+# Міряємо імпорт конфігу і bootstrap, bootstrap (схема, перенесення даних),
+# імпорт plantbot.handlers (telegram.ext, httpx), build_app() і загальний час
+# до готового застосунку. Медіана з --runs прогонів порівнюється з базовою
+# лінією; --check завершується з кодом 1, якщо total гірший за --tolerance.
+# Запуск: python bench/bench_startup.py [--plants 100000] [--runs 7] [--check] [--save-baseline]
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+BASELINE = os.path.join(ROOT, "bench", "baseline_startup.json")
+STAGES = ("import_config", "bootstrap", "import_handlers", "build_app", "total")
+
+def seed(n_plants: int, n_photos: int):
+    from plantbot.bootstrap import bootstrap
+    from plantbot.db import tx
+    bootstrap()
+    t = date.today().isoformat()
+    rnd = random.Random(3)
+    with tx() as c:
+        c.executemany("INSERT INTO photos(hash, data, size, created_at) VALUES(?,?,?,?)",
+                      [(f"h{i}", os.urandom(2048), 2048, t) for i in range(n_photos)])
+        c.executemany("""INSERT INTO plants(user_id,name,care,photo_hash,water_int,feed_int,mist_int,
+                                            last_watered,last_fed,last_misted) VALUES(?,?,?,?,?,?,?,?,?,?)""",
+                      [(i % 2000 + 1, f"plant {i}", "-", f"h{i}" if i < n_photos else None,
+                        7, 30, None, t, t, t) for i in range(n_plants)])
+        c.executemany("INSERT INTO tasks(user_id,plant_id,kind,due_date,status,created_at) VALUES(?,?,?,?,?,?)",
+                      [(i % 2000 + 1, i + 1, "water", (date.today() - timedelta(days=rnd.randint(1, 60))).isoformat(),
+                        "done", t) for i in range(n_plants)])
+
+def child():
+    """Один холодний старт; друкує JSON з часом етапів (сек)."""
+    t0 = time.perf_counter()
+    from plantbot.bootstrap import bootstrap
+    t1 = time.perf_counter()
+    bootstrap()
+    t2 = time.perf_counter()
+    from plantbot.handlers import build_app
+    t3 = time.perf_counter()
+    build_app()
+    t4 = time.perf_counter()
+    print(json.dumps({"import_config": t1 - t0, "bootstrap": t2 - t1, "import_handlers": t3 - t2,
+                      "build_app": t4 - t3, "total": t4 - t0}))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--plants", type=int, default=100000)
+    ap.add_argument("--photos", type=int, default=2000)
+    ap.add_argument("--runs", type=int, default=7)
+    ap.add_argument("--tolerance", type=float, default=0.25, help="допустиме погіршення total (частка)")
+    ap.add_argument("--check", action="store_true", help="код 1 при регресії відносно базової лінії")
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        child()
+        return
+
+    tmp = tempfile.mkdtemp(prefix="plantbot-startup-")
+    env = dict(os.environ, DB_PATH=os.path.join(tmp, "startup.db"), TELEGRAM_TOKEN="123:startup", SERVICE_PORT="0")
+    os.environ.update(env)
+    seed(args.plants, args.photos)
+
+    runs = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, __file__, "--child"], env=env, check=True,
+                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    result = {k: round(statistics.median(r[k] for r in runs) * 1000, 1) for k in STAGES}
+    result["plants"] = args.plants
+
+    baseline = {}
+    if os.path.exists(BASELINE) and not args.save_baseline:
+        with open(BASELINE) as f:
+            baseline = json.load(f)["result"]
+    print(f"{'stage':<16} {'ms':>8} {'baseline':>9}")
+    for k in STAGES:
+        print(f"{k:<16} {result[k]:>8} {baseline.get(k, ''):>9}")
+
+    if args.save_baseline:
+        with open(BASELINE, "w") as f:
+            json.dump({"created": date.today().isoformat(), "argv": sys.argv[1:], "result": result}, f, indent=1)
+        print(f"baseline → {BASELINE}")
+    elif args.check and baseline:
+        limit = baseline["total"] * (1 + args.tolerance)
+        if result["total"] > limit:
+            print(f"REGRESSION: total {result['total']} ms > {limit:.1f} ms")
+            sys.exit(1)
+        print("ok")
+
+if __name__ == "__main__":
+    main()
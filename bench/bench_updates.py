@@ -0,0 +1,77 @@
+# bench/bench_updates.py
+# Пропускна здатність (апдейтів/с) у режимах long polling і webhook
+# проти локального фейкового Bot API (bench/fake_telegram.py).
+# Запуск: python bench/bench_updates.py [--updates 2000] [--users 200] [--latency 0.005] [--concurrency 16]
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+SECRET = "bench-secret"
+ACTIONS = ("week_plan", "today_plan", "my_plants")
+
+async def _drive(mode: str, fake, base: str, updates: list, web_port: int) -> float:
+    from plantbot.handlers import build_app
+    app = build_app()
+    for job in app.job_queue.jobs():  # нагадування у бенчмарку не потрібні
+        job.schedule_removal()
+    await app.initialize()
+    await app.start()
+    expected = fake.replies + len(updates)
+    t0 = time.perf_counter()
+    if mode == "polling":
+        fake.enqueue(updates)
+        await app.updater.start_polling(poll_interval=0.0, timeout=5)
+        await fake.wait_replies(expected)
+    else:
+        import httpx
+        await app.updater.start_webhook(listen="127.0.0.1", port=web_port, url_path="tg",
+                                        webhook_url=f"http://127.0.0.1:{web_port}/tg", secret_token=SECRET)
+        t0 = time.perf_counter()
+        sem = asyncio.Semaphore(64)  # Telegram тримає до max_connections з'єднань
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{web_port}") as client:
+            async def post(u):
+                async with sem:
+                    r = await client.post("/tg", json=u, headers={"X-Telegram-Bot-Api-Secret-Token": SECRET})
+                    r.raise_for_status()
+            await asyncio.gather(*(post(u) for u in updates))
+        await fake.wait_replies(expected)
+    dt = time.perf_counter() - t0
+    await app.updater.stop()
+    await app.stop()
+    await app.shutdown()
+    return dt
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--updates", type=int, default=2000)
+    ap.add_argument("--users", type=int, default=200)
+    ap.add_argument("--latency", type=float, default=0.005, help="затримка фейкового Bot API, сек")
+    ap.add_argument("--concurrency", type=int, default=16, help="CONCURRENT_UPDATES")
+    ap.add_argument("--modes", default="polling,webhook")
+    args = ap.parse_args()
+
+    from fake_telegram import FakeTelegram
+    fake = FakeTelegram(latency=args.latency)
+    base = await fake.start()
+    tmp = tempfile.mkdtemp(prefix="plantbot-bench-")
+    os.environ.update(DB_PATH=os.path.join(tmp, "bench.db"), TELEGRAM_TOKEN="123:bench",
+                      TELEGRAM_API_URL=base, CONCURRENT_UPDATES=str(args.concurrency), SERVICE_PORT="0")
+
+    print(f"{'mode':>8} {'updates':>8} {'seconds':>8} {'upd/s':>8}")
+    for mode in args.modes.split(","):
+        updates = [fake.callback_update(random.randint(1, args.users), random.choice(ACTIONS))
+                   for _ in range(args.updates)]
+        dt = await _drive(mode, fake, base, updates, web_port=18443)
+        print(f"{mode:>8} {args.updates:>8} {dt:>8.2f} {args.updates / dt:>8.0f}")
+    await fake.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+# bench/bench_week_tasks.py
+# Латентність ensure_week_tasks_for_user залежно від розміру таблиці tasks.
+# Запуск: python bench/bench_week_tasks.py [--sizes 10000,100000,1000000] [--plants 40]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+def _p(samples, q):
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(len(s) * q / 100))]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10000,100000,1000000", help="к-сть історичних рядків tasks")
+    ap.add_argument("--plants", type=int, default=40, help="рослин у користувача, що вимірюється")
+    ap.add_argument("--repeat", type=int, default=50)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="plantbot-bench-")
+    os.environ["DB_PATH"] = os.path.join(tmp, "bench.db")
+    os.environ.setdefault("TELEGRAM_TOKEN", "bench")
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from plantbot.db import tx
+    from plantbot.schedule import ensure_week_tasks_for_user, touch_schedule
+
+    uid = 1
+    today = date.today()
+    with tx() as c:
+        for i in range(args.plants):
+            c.execute("""INSERT INTO plants(user_id,name,care,water_int,feed_int,mist_int,last_watered,last_fed,last_misted)
+                         VALUES(?,?,?,?,?,?,?,?,?)""",
+                      (uid, f"plant {i}", "-", random.randint(2, 10), random.choice([14, 28, None]),
+                       random.choice([3, None]), today.isoformat(), today.isoformat(), today.isoformat()))
+
+    have = 0
+    print(f"{'tasks rows':>12} {'cold p50':>9} {'cold p99':>9} {'warm p50':>9} {'warm p99':>9}  (ms)")
+    for size in (int(s) for s in args.sizes.split(",")):
+        # історія інших користувачів + власна виконана історія
+        rows = ((random.randint(2, 50_000), random.randint(1, 10**6), random.choice(("water", "feed", "mist")),
+                 (today - timedelta(days=random.randint(1, 900))).isoformat(), "done", today.isoformat())
+                for _ in range(size - have))
+        with tx() as c:
+            c.executemany("INSERT INTO tasks(user_id,plant_id,kind,due_date,status,created_at) VALUES(?,?,?,?,?,?)", rows)
+        have = size
+        cold, warm = [], []
+        for _ in range(args.repeat):
+            with tx() as c:
+                touch_schedule(c, uid)  # скидаємо водяний знак — повна генерація
+            t0 = time.perf_counter()
+            ensure_week_tasks_for_user(uid)
+            t1 = time.perf_counter()
+            ensure_week_tasks_for_user(uid)  # повторне натискання меню
+            t2 = time.perf_counter()
+            cold.append((t1 - t0) * 1000)
+            warm.append((t2 - t1) * 1000)
+        print(f"{size:>12} {_p(cold, 50):>9.2f} {_p(cold, 99):>9.2f} {_p(warm, 50):>9.2f} {_p(warm, 99):>9.2f}")
+
+if __name__ == "__main__":
+    main()
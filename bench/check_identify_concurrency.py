@@ -0,0 +1,98 @@
+# bench/check_identify_concurrency.py
+# Перевірка: поки розпізнавання фото одного користувача чекає на Plant.id,
+# апдейти інших користувачів обслуговуються. build_app() з фейковими Bot API
+# і Plant.id; фейк утримує відповідь identify (hold), а тим часом інші
+# користувачі відкривають план на сьогодні — кожен апдейт має завершитися
+# за --limit сек. Після release() розпізнавання теж має завершитися.
+# Код виходу 1, якщо щось не виконалось.
+# Запуск: python bench/check_identify_concurrency.py [--users 20] [--limit 2.0]
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+async def run(args) -> int:
+    from fake_telegram import FakeTelegram
+    from fake_plantid import FakePlantId
+    tg, plantid = FakeTelegram(), FakePlantId()
+    tg_url, plantid_url = await tg.start(), await plantid.start()
+    tmp = tempfile.mkdtemp(prefix="plantbot-check-")
+    os.environ.update(DB_PATH=os.path.join(tmp, "check.db"), TELEGRAM_TOKEN="123:check",
+                      TELEGRAM_API_URL=tg_url, PLANT_ID_BASE_URL=plantid_url,
+                      SERVICE_PORT="0", TODAY_RENDER_DEBOUNCE="0")
+
+    from telegram import Update
+    from plantbot.handlers import build_app
+
+    app = build_app()
+    for job in app.job_queue.jobs():
+        job.schedule_removal()
+    await app.initialize()
+    await app.start()
+
+    async def send(u: dict):
+        await app.process_update(Update.de_json(u, app.bot))
+
+    failures = []
+    photo_uid = 1
+    try:
+        for step in ("add_plant", "add_by_photo"):
+            await send(tg.callback_update(photo_uid, step))
+        plantid.hold()
+        identify = asyncio.create_task(send(tg.photo_update(photo_uid)))
+        t0 = time.monotonic()
+        while not plantid.pending:
+            if identify.done() or time.monotonic() - t0 > args.limit:
+                failures.append(f"identify не дійшов до Plant.id за {args.limit} с (заблоковано цикл подій?)")
+                break
+            await asyncio.sleep(0.01)
+
+        if plantid.pending:
+            times = []
+
+            async def other(uid: int):
+                t = time.monotonic()
+                await asyncio.wait_for(send(tg.callback_update(uid, "today_plan")), args.limit)
+                times.append(time.monotonic() - t)
+
+            try:
+                await asyncio.gather(*(other(uid) for uid in range(2, args.users + 2)))
+            except asyncio.TimeoutError:
+                failures.append(f"today_plan не завершився за {args.limit} с, поки identify чекав")
+            if identify.done():
+                failures.append("identify завершився до release() — фейк не утримав відповідь")
+            if times:
+                print(f"today_plan під час identify: {len(times)} апдейтів, max {max(times) * 1000:.0f} ms")
+
+        plantid.release()
+        try:
+            await asyncio.wait_for(identify, args.limit)
+        except asyncio.TimeoutError:
+            failures.append(f"identify не завершився за {args.limit} с після release()")
+    finally:
+        plantid.release()
+        await app.stop()
+        await app.shutdown()
+        await tg.stop()
+        await plantid.stop()
+
+    for f in failures:
+        print("FAIL:", f)
+    print("ok" if not failures else f"FAIL: {len(failures)}")
+    return 1 if failures else 0
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=20, help="інших користувачів під час розпізнавання")
+    ap.add_argument("--limit", type=float, default=2.0, help="сек на апдейт")
+    args = ap.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+if __name__ == "__main__":
+    main()
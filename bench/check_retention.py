@@ -0,0 +1,65 @@
+# bench/check_retention.py
+# Перевірка архівації при зафіксованому годиннику (clock.today_in): межа
+# cutoff_iso рахується від "сьогодні" у config.TZ, а не від дати хоста;
+# завершені задачі старші за межу переносяться в care_events, новіші й
+# відкриті лишаються в tasks, reminder_log до межі очищується.
+# Код виходу 1 при розбіжності.
+# Запуск: python bench/check_retention.py
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def main():
+    tmp = tempfile.mkdtemp(prefix="plantbot-check-")
+    os.environ.update(DB_PATH=os.path.join(tmp, "check.db"), TELEGRAM_TOKEN="123:check", RETENTION_DAYS="90")
+    from plantbot import clock
+    from plantbot.bootstrap import bootstrap
+    from plantbot.db import conn, tx
+    from plantbot.retention import archive_batch, cutoff_iso
+    bootstrap()
+
+    pinned = date(2031, 1, 15)  # далеко від дати хоста — date.today() тут не збіглася б
+    clock.today_in = lambda tz: pinned
+    cutoff = pinned - timedelta(days=90)
+
+    rows = [  # (due_date, status, має лишитися в tasks)
+        (cutoff - timedelta(days=1), "done", False),
+        (cutoff - timedelta(days=30), "skipped", False),
+        (cutoff - timedelta(days=1), "deferred", False),
+        (cutoff, "done", True),
+        (cutoff + timedelta(days=10), "skipped", True),
+        (cutoff - timedelta(days=5), "due", True),
+    ]
+    with tx() as c:
+        c.executemany("""INSERT INTO tasks(user_id,plant_id,kind,due_date,status,created_at)
+                         VALUES(1,1,'water',?,?,'check')""", [(d.isoformat(), st) for d, st, _ in rows])
+        c.executemany("INSERT INTO reminder_log(run_date, user_id) VALUES(?,1)",
+                      [((cutoff - timedelta(days=1)).isoformat(),), (cutoff.isoformat(),)])
+
+    failures = []
+    if cutoff_iso() != cutoff.isoformat():
+        failures.append(f"cutoff_iso() = {cutoff_iso()}, очікувалось {cutoff.isoformat()}")
+    archive_batch(cutoff_iso())
+    kept = {(d, st) for d, st in conn().execute("SELECT due_date, status FROM tasks")}
+    archived = {(d, st) for d, st in conn().execute("SELECT due_date, status FROM care_events")}
+    for d, st, stays in rows:
+        key = (d.isoformat(), st)
+        if stays and key not in kept:
+            failures.append(f"{key} мав лишитися в tasks")
+        if not stays and key not in archived:
+            failures.append(f"{key} мав перейти в care_events")
+    logs = [r for (r,) in conn().execute("SELECT run_date FROM reminder_log")]
+    if logs != [cutoff.isoformat()]:
+        failures.append(f"reminder_log після архівації: {logs}")
+
+    for f in failures:
+        print("FAIL:", f)
+    print("ok" if not failures else f"FAIL: {len(failures)}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# bench/check_schedule.py
+# Перевірка узгодженості розкладу: те, що показує проекція (тиждень/місяць/
+# сезон, .ics) на день 0, має збігатися з задачами, які матеріалізує
+# ensure_week_tasks_for_user (план на сьогодні, нагадування). Проганяє
+# --days днів поспіль на випадкових рослинах (частина прострочена), частину
+# задач відмічає виконаними. Окремо — закриті задачі (пропуск, перенесення,
+# виконання) не відкриваються ні повною перегенерацією, ні перегенерацією
+# змінених рослин і не потрапляють у розсилку; нагадування для зони, що
+# відстає від TZ.
+# Код виходу 1 при розбіжності.
+# Запуск: python bench/check_schedule.py [--plants 60] [--days 60] [--seed 1]
+import argparse
+import os
+import random
+import sys
+import tempfile
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--plants", type=int, default=60)
+    ap.add_argument("--days", type=int, default=60)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="plantbot-check-")
+    os.environ.update(DB_PATH=os.path.join(tmp, "check.db"), TELEGRAM_TOKEN="123:check")
+    from plantbot import clock
+    from plantbot.bootstrap import bootstrap
+    from plantbot.db import conn, tx
+    from plantbot.projection import user_events
+    from plantbot.reminders import due_users_page
+    from plantbot.schedule import (ensure_week_tasks_for_all, ensure_week_tasks_for_user, record_care_event,
+                                   mark_task_skipped, move_task_to_next_care_day, touch_schedule)
+    bootstrap()
+
+    sim = {"day": date(2026, 10, 1)}
+    lagging = set()  # зони, де ще вчора
+    clock.today_in = lambda tz: sim["day"] - timedelta(days=1 if tz in lagging else 0)
+
+    rnd = random.Random(args.seed)
+    uid = 1
+    with tx() as c:
+        for i in range(args.plants):
+            last = lambda: (sim["day"] - timedelta(days=rnd.randint(0, 60))).isoformat()
+            c.execute("""INSERT INTO plants(user_id,name,care,water_int,feed_int,mist_int,last_watered,last_fed,last_misted)
+                         VALUES(?,?,?,?,?,?,?,?,?)""",
+                      (uid, f"plant {i}", "-", rnd.randint(2, 10), rnd.choice([14, 28, None]),
+                       rnd.choice([3, None]), last(), last(), rnd.choice([last(), None])))
+
+    bad = 0
+    for _ in range(args.days):
+        t = sim["day"]
+        ensure_week_tasks_for_user(uid)
+        projected = {(e.plant_id, e.kind) for e in user_events(uid, 0, t)}
+        rows = {(pid, kind) for pid, kind in conn().execute(
+            "SELECT plant_id, kind FROM tasks WHERE user_id=? AND status='due' AND due_date=?", (uid, t.isoformat()))}
+        if projected != rows:
+            bad += 1
+            print(f"{t}: проекція {len(projected)}, задачі {len(rows)}; "
+                  f"лише в проекції {sorted(projected - rows)[:5]}, лише в задачах {sorted(rows - projected)[:5]}")
+        for pid, kind in rows:
+            if rnd.random() < 0.6:
+                record_care_event(uid, pid, kind)
+        sim["day"] = t + timedelta(days=1)
+
+    def care_day():
+        while sim["day"].weekday() != 1:  # вівторок — день догляду за замовчуванням
+            sim["day"] += timedelta(days=1)
+        return sim["day"]
+
+    def reopened(user_id: int, day: date):
+        """Ключі, для яких на day є і закритий рядок, і знову відкритий 'due'."""
+        return conn().execute("""SELECT plant_id, kind FROM tasks WHERE user_id=? AND due_date=?
+                                 GROUP BY plant_id, kind
+                                 HAVING SUM(status='due') > 0 AND SUM(status<>'due') > 0""",
+                              (user_id, day.isoformat())).fetchall()
+
+    def seed_due_today(user_id: int, n: int):
+        """n рослин, у яких полив і підживлення припадають на сьогодні."""
+        t = sim["day"]
+        with tx() as c:
+            for i in range(n):
+                c.execute("""INSERT INTO plants(user_id,name,care,water_int,feed_int,last_watered,last_fed)
+                             VALUES(?,?,'-',7,14,?,?)""",
+                          (user_id, f"u{user_id} {i}", (t - timedelta(days=7)).isoformat(),
+                           (t - timedelta(days=14)).isoformat()))
+        ensure_week_tasks_for_user(user_id)
+        return conn().execute("""SELECT id FROM tasks WHERE user_id=? AND status='due' AND due_date=?
+                                 ORDER BY id""", (user_id, t.isoformat())).fetchall()
+
+    # пропуск, перенесення, виконання → повна перегенерація того ж дня і прохід розсилки
+    t = care_day()
+    tids = [tid for (tid,) in seed_due_today(3, 3)]
+    mark_task_skipped(3, tids[0])
+    move_task_to_next_care_day(3, tids[1])
+    record_care_event(3, task_id=tids[2])
+    with tx() as c:
+        touch_schedule(c, 3)
+    ensure_week_tasks_for_user(3)
+    ensure_week_tasks_for_all(until=t)
+    if reopened(3, t):
+        bad += 1
+        print(f"{t}: повна перегенерація відкрила закриті задачі {reopened(3, t)}")
+
+    # та сама рослина змінюється того ж дня (відмітка іншого виду, перейменування) —
+    # перегенерація лише "брудних" рослин не чіпає закриті сьогоднішні задачі
+    tids = [tid for (tid,) in seed_due_today(5, 2)]
+    pid_a, pid_b = (pid for (pid,) in conn().execute("SELECT id FROM plants WHERE user_id=5 ORDER BY id"))
+    mark_task_skipped(5, tids[0])             # полив рослини A
+    move_task_to_next_care_day(5, tids[2])    # полив рослини B
+    record_care_event(5, pid_a, "feed")       # A стає "брудною"
+    with tx() as c:
+        touch_schedule(c, 5, pid_b)           # як після перейменування B
+    ensure_week_tasks_for_user(5)
+    if reopened(5, t):
+        bad += 1
+        print(f"{t}: перегенерація змінених рослин відкрила закриті задачі {reopened(5, t)}")
+
+    # розсилка: закриті задачі не нагадуються — і ті, що відкрила стара генерація
+    # (до прибирання міграцією), теж
+    tids = [tid for (tid,) in seed_due_today(4, 1)]
+    mark_task_skipped(4, tids[0])
+    move_task_to_next_care_day(4, tids[1])
+    ensure_week_tasks_for_all(until=t)
+    with tx() as c:
+        c.execute("""INSERT INTO tasks(user_id,plant_id,kind,due_date,status,created_at)
+                     SELECT user_id, plant_id, kind, due_date, 'due', 'legacy' FROM tasks WHERE id=?""", (tids[0],))
+    if 4 in {u for u, _ in due_users_page(t.isoformat(), 0)}:
+        bad += 1
+        print(f"{t}: нагадування рахує пропущені/перенесені задачі")
+
+    # нагадування: користувач у зоні, що відстає від TZ, має отримати задачі на дату розсилки
+    la = clock.set_user_tz(2, "America/Los_Angeles")
+    lagging.add(la)
+    care_day()
+    with tx() as c:
+        c.execute("""INSERT INTO plants(user_id,name,care,water_int,last_watered) VALUES(2,'la','-',7,?)""",
+                  ((sim["day"] - timedelta(days=7)).isoformat(),))
+    ensure_week_tasks_for_all(until=sim["day"])
+    users = {u for u, _ in due_users_page(sim["day"].isoformat(), 0)}
+    if 2 not in users:
+        bad += 1
+        print(f"{sim['day']}: нагадування не бачить користувача з America/Los_Angeles")
+
+    print("ok" if not bad else f"FAIL: {bad} розбіжностей")
+    sys.exit(1 if bad else 0)
+
+if __name__ == "__main__":
+    main()
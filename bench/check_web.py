@@ -0,0 +1,113 @@
+# bench/check_web.py
+# Перевірка службового HTTP-сервера (plantbot/web.py) на некоректних і
+# ворожих запитах: сміття в рядку запиту, завеликі рядок/заголовки/тіло,
+# кривий Content-Length, Transfer-Encoding, повільний клієнт (таймаут
+# читання) і простій keep-alive. Звичайний запит і keep-alive мають
+# працювати далі. Сервер піднімається на випадковому порту, клієнт — сирі
+# сокети asyncio. Код виходу 1 при розбіжності.
+# Запуск: python bench/check_web.py
+import asyncio
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from plantbot import web
+
+async def _echo(req):
+    return web.json_response({"path": req.path, "body": len(req.body)})
+
+async def exchange(port: int, raw: bytes, eof: bool = False, timeout: float = 5.0) -> bytes:
+    """Надіслати raw (eof — і закрити запис) та прочитати все до закриття з'єднання.
+    Якщо сервер за timeout не відповів і не закрив — b"" (це теж розбіжність)."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(raw)
+        if eof:
+            writer.write_eof()
+        await writer.drain()
+        return await asyncio.wait_for(reader.read(), timeout)
+    except (asyncio.TimeoutError, ConnectionError):
+        return b""
+    finally:
+        writer.close()
+
+def status_of(resp: bytes) -> int:
+    parts = resp.split(b" ", 2)
+    return int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
+
+async def run() -> list:
+    web.READ_TIMEOUT, web.IDLE_TIMEOUT = 0.5, 0.5
+    srv = web.WebServer()
+    srv.route("GET", "/", _echo)
+    srv.route("POST", "/", _echo)
+    await srv.start("127.0.0.1", 0)
+    port = srv._server.sockets[0].getsockname()[1]
+    failures = []
+
+    def expect(name, resp, status):
+        if status_of(resp) != status:
+            failures.append(f"{name}: очікувався {status}, отримано {resp[:60]!r}")
+
+    big = b"x" * (web.MAX_HEAD + 10)
+    cases = [
+        ("нормальний запит", b"GET /ok HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n", 200),
+        ("HTTP/1.0 без keep-alive закривається", b"GET /ok HTTP/1.0\r\n\r\n", 200),
+        ("тіло з Content-Length", b"POST /p HTTP/1.1\r\nContent-Length: 3\r\nConnection: close\r\n\r\nabc", 200),
+        ("сміття замість рядка запиту", b"\x16\x03\x01garbage\r\n\r\n", 400),
+        ("рядок запиту без версії", b"GET /\r\n\r\n", 400),
+        ("не HTTP/1.x", b"GET / HTTP/2.0\r\n\r\n", 400),
+        ("рядок запиту понад ліміт", b"GET /" + big + b" HTTP/1.1\r\n\r\n", 414),
+        ("рядок заголовка понад ліміт", b"GET / HTTP/1.1\r\nX: " + big + b"\r\n\r\n", 431),
+        ("заголовки разом понад ліміт",
+         b"GET / HTTP/1.1\r\n" + b"".join(b"X-%d: %s\r\n" % (i, b"y" * 1000) for i in range(20)) + b"\r\n", 431),
+        ("забагато заголовків",
+         b"GET / HTTP/1.1\r\n" + b"".join(b"X-%d: 1\r\n" % i for i in range(web.MAX_HEADERS + 1)) + b"\r\n", 431),
+        ("заголовок без двокрапки", b"GET / HTTP/1.1\r\nbroken\r\n\r\n", 400),
+        ("пробіл перед двокрапкою", b"GET / HTTP/1.1\r\nContent-Length : 0\r\n\r\n", 400),
+        ("нечисловий Content-Length", b"POST / HTTP/1.1\r\nContent-Length: abc\r\n\r\n", 400),
+        ("від'ємний Content-Length", b"POST / HTTP/1.1\r\nContent-Length: -1\r\n\r\n", 400),
+        ("два різні Content-Length",
+         b"POST / HTTP/1.1\r\nContent-Length: 1\r\nContent-Length: 2\r\n\r\nab", 400),
+        ("тіло понад MAX_BODY", b"POST / HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % (web.MAX_BODY + 1), 413),
+        ("Transfer-Encoding", b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n0\r\n\r\n", 501),
+        ("обірване тіло", b"POST / HTTP/1.1\r\nContent-Length: 10\r\n\r\nabc", 400),
+    ]
+    for name, raw, status in cases:
+        # для "обірваного тіла" закриваємо запис, щоб сервер побачив EOF
+        expect(name, await exchange(port, raw, eof=name == "обірване тіло"), status)
+
+    # повільний клієнт: початок запиту є, решта не приходить — 408 за READ_TIMEOUT
+    resp = await exchange(port, b"GET / HTTP/1.1\r\nHost: x\r\n", timeout=3)
+    expect("повільні заголовки", resp, 408)
+    resp = await exchange(port, b"POST / HTTP/1.1\r\nContent-Length: 100\r\n\r\nabc", timeout=3)
+    expect("повільне тіло", resp, 408)
+
+    # keep-alive: два запити одним з'єднанням, потім простій — сервер закриває сам
+    resp = await exchange(port, b"GET /a HTTP/1.1\r\n\r\nGET /b HTTP/1.1\r\n\r\n", timeout=3)
+    if resp.count(b"HTTP/1.1 200") != 2:
+        failures.append(f"keep-alive: очікувались дві відповіді 200, отримано {resp[:120]!r}")
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        if await asyncio.wait_for(reader.read(), 3) != b"":
+            failures.append("простій: сервер щось відповів на порожнє з'єднання")
+    except asyncio.TimeoutError:
+        failures.append("простій: з'єднання без запитів не закрито за IDLE_TIMEOUT")
+    finally:
+        writer.close()
+
+    # після всього цього сервер живий
+    expect("після некоректних запитів", await exchange(port, b"GET / HTTP/1.1\r\nConnection: close\r\n\r\n"), 200)
+    await srv.stop()
+    return failures
+
+def main():
+    failures = asyncio.run(run())
+    for f in failures:
+        print("FAIL:", f)
+    print("ok" if not failures else f"FAIL: {len(failures)}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# bench/fake_plantid.py
+# Локальний фейковий Plant.id (v2/identify, v3/plant/name_search) для
+# бенчмарків: фіксована затримка обробки + імітація пропускної здатності
+# каналу для тіла запиту; hold()/release() — утримати відповідь identify.
+# Побудований на plantbot.web.
+import asyncio
+
+from plantbot.web import WebServer, json_response
+
+IDENTIFY_RESULT = {"is_plant_probability": 0.97, "suggestions": [
+    {"plant_name": "Monstera deliciosa", "probability": 0.93,
+     "plant_details": {"common_names": ["Swiss cheese plant"], "url": "https://en.wikipedia.org/wiki/Monstera_deliciosa"}}]}
+
+class FakePlantId:
+    def __init__(self, mbps: float = 100.0, latency: float = 0.0):
+        self.bytes_per_sec = mbps * 1e6 / 8
+        self.latency = latency
+        self.received = 0
+        self.calls = 0
+        self.gate: asyncio.Event = None  # hold(): identify чекає на release()
+        self.pending = 0
+        self.web = WebServer()
+        self.web.route("POST", "/v2/identify", self._identify)
+        self.web.route("GET", "/v3/plant/name_search", self._name_search)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        await self.web.start(host, port)
+        return f"http://{host}:{self.web._server.sockets[0].getsockname()[1]}"
+
+    async def stop(self):
+        await self.web.stop()
+
+    def hold(self):
+        """Наступні identify не відповідають, доки не буде release()."""
+        self.gate = asyncio.Event()
+
+    def release(self):
+        if self.gate is not None:
+            self.gate.set()
+
+    async def _identify(self, req):
+        self.calls += 1
+        self.received += len(req.body)
+        if self.gate is not None:
+            self.pending += 1
+            try:
+                await self.gate.wait()
+            finally:
+                self.pending -= 1
+        await asyncio.sleep(self.latency + len(req.body) / self.bytes_per_sec)
+        return json_response(IDENTIFY_RESULT)
+
+    async def _name_search(self, req):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        q = req.query.get("q") or ""
+        return json_response({"entities": [{"scientific_name": q.title(), "common_names": [q]}]})
@@ -0,0 +1,136 @@
+# bench/fake_telegram.py
+# Локальний фейковий Bot API для бенчмарків: віддає getUpdates з черги,
+# приймає sendMessage/editMessageText/... і рахує відповіді бота;
+# getFile і завантаження файлу віддають фіксовані байти PHOTO_BYTES.
+# Побудований на plantbot.web, тож не потребує мережі й залежностей.
+import asyncio
+import json
+import time
+from itertools import count
+from urllib.parse import parse_qsl
+
+from plantbot.web import WebServer, json_response
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_plant_bot",
+            "can_join_groups": False, "can_read_all_group_messages": False, "supports_inline_queries": False}
+
+PHOTO_BYTES = b"\xff\xd8\xff\xe0" + bytes(range(256)) * 64  # не справжній JPEG — imageprep віддасть як є
+
+REPLY_METHODS = {"sendMessage", "editMessageText", "sendPhoto", "sendDocument", "editMessageReplyMarkup"}
+
+def _parse(req):
+    ctype = req.headers.get("content-type", "")
+    if "json" in ctype:
+        return json.loads(req.body or b"{}")
+    if "multipart" in ctype:
+        return {}  # файли нам не цікаві
+    out = {}
+    for k, v in parse_qsl(req.body.decode()):
+        try:
+            out[k] = json.loads(v)
+        except ValueError:
+            out[k] = v
+    return out
+
+class FakeTelegram:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.web = WebServer()
+        self.web.route("POST", "/bot", self._handle)
+        self.web.route("GET", "/bot", self._handle)
+        self.web.route("GET", "/file/bot", self._file)
+        self._updates: asyncio.Queue = None
+        self._ids = count(1)
+        self._msg_ids = count(1000)
+        self.calls = {}
+        self.replies = 0
+        self._reply_event = asyncio.Event()
+        self.port = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        self._updates = asyncio.Queue()
+        await self.web.start(host, port)
+        self.port = self.web._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{self.port}"
+
+    async def stop(self):
+        await self.web.stop()
+
+    # --- синтетичні апдейти ---
+    def callback_update(self, uid: int, data: str) -> dict:
+        uid_ = next(self._ids)
+        user = {"id": uid, "is_bot": False, "first_name": f"user{uid}"}
+        return {"update_id": uid_, "callback_query": {
+            "id": str(uid_), "from": user, "chat_instance": str(uid), "data": data,
+            "message": {"message_id": uid_, "date": int(time.time()), "from": BOT_USER,
+                        "chat": {"id": uid, "type": "private"}, "text": "menu"}}}
+
+    def text_update(self, uid: int, text: str) -> dict:
+        uid_ = next(self._ids)
+        user = {"id": uid, "is_bot": False, "first_name": f"user{uid}"}
+        msg = {"message_id": uid_, "date": int(time.time()), "from": user,
+               "chat": {"id": uid, "type": "private"}, "text": text}
+        if text.startswith("/"):
+            msg["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return {"update_id": uid_, "message": msg}
+
+    def photo_update(self, uid: int, file_id: str = "photo") -> dict:
+        """Фото одного розміру; getFile і завантаження файлу віддає цей самий фейк."""
+        uid_ = next(self._ids)
+        user = {"id": uid, "is_bot": False, "first_name": f"user{uid}"}
+        size = {"file_id": f"{file_id}-{uid_}", "file_unique_id": f"{file_id}-{uid_}",
+                "width": 640, "height": 480, "file_size": len(PHOTO_BYTES)}
+        return {"update_id": uid_, "message": {"message_id": uid_, "date": int(time.time()), "from": user,
+                                                "chat": {"id": uid, "type": "private"}, "photo": [size]}}
+
+    def enqueue(self, updates):
+        for u in updates:
+            self._updates.put_nowait(u)
+
+    async def wait_replies(self, n: int, timeout: float = 120.0):
+        async def _wait():
+            while self.replies < n:
+                self._reply_event.clear()
+                await self._reply_event.wait()
+        await asyncio.wait_for(_wait(), timeout)
+
+    # --- Bot API ---
+    async def _handle(self, req):
+        method = req.path.rsplit("/", 1)[-1]
+        params = _parse(req)
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if method == "getMe":
+            return json_response({"ok": True, "result": BOT_USER})
+        if method == "getUpdates":
+            return json_response({"ok": True, "result": await self._get_updates(params)})
+        if method == "getFile":
+            fid = params.get("file_id") or "file"
+            return json_response({"ok": True, "result": {"file_id": fid, "file_unique_id": fid,
+                                                         "file_size": len(PHOTO_BYTES), "file_path": f"photos/{fid}.jpg"}})
+        if method in REPLY_METHODS:
+            self.replies += 1
+            self._reply_event.set()
+            chat_id = params.get("chat_id") or 0
+            return json_response({"ok": True, "result": {
+                "message_id": next(self._msg_ids), "date": int(time.time()), "from": BOT_USER,
+                "chat": {"id": chat_id, "type": "private"}, "text": params.get("text") or ""}})
+        return json_response({"ok": True, "result": True})
+
+    async def _file(self, req):
+        self.calls["file"] = self.calls.get("file", 0) + 1
+        return 200, {"Content-Type": "image/jpeg"}, PHOTO_BYTES
+
+    async def _get_updates(self, params):
+        limit = int(params.get("limit") or 100)
+        timeout = float(params.get("timeout") or 0)
+        out = []
+        try:
+            if self._updates.empty() and timeout:
+                out.append(await asyncio.wait_for(self._updates.get(), timeout))
+        except asyncio.TimeoutError:
+            return []
+        while len(out) < limit and not self._updates.empty():
+            out.append(self._updates.get_nowait())
+        return out
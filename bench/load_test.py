@@ -0,0 +1,209 @@
+# bench/load_test.py
+# Навантажувальний тест: build_app() з фейковими Bot API і Plant.id,
+# тисячі синтетичних користувачів одночасно відкривають план на сьогодні
+# і на тиждень, додають рослини за назвою і відмічають задачі.
+# Для кожного розміру набору (к-сть рослин) — окремий процес і окрема БД.
+# Звіт: p50/p99 за діями, апдейтів/с, розмір БД; порівняння з базовою лінією.
+# Запуск: python bench/load_test.py [--sizes 10,1000,10000,100000] [--sessions 2000]
+#         [--save-baseline]  — записати результат як bench/baseline_load.json
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+BASELINE = os.path.join(ROOT, "bench", "baseline_load.json")
+
+# сценарій → вага
+SCENARIOS = (("today_plan", 40), ("week_plan", 30), ("task_done", 20), ("add_plant", 10))
+NAMES = ("monstera", "ficus", "sansevieria", "spathiphyllum", "zamioculcas", "calathea", "pothos", "aloe")
+
+def _p(samples, q):
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(len(s) * q / 100))] if s else 0.0
+
+def seed(n_plants: int, n_users: int, history: int):
+    """n_plants рослин по n_users користувачах + history завершених задач на рослину."""
+    from plantbot.db import tx
+    t = date.today()
+    rnd = random.Random(42)
+    chunk = 5000
+    for start in range(0, n_plants, chunk):
+        with tx() as c:
+            rows = []
+            for i in range(start, min(n_plants, start + chunk)):
+                last = (t - timedelta(days=rnd.randint(0, 10))).isoformat()
+                rows.append((i % n_users + 1, f"{rnd.choice(NAMES)} {i}", "-", rnd.choice([3, 5, 7, 10]),
+                             rnd.choice([14, 28, None]), rnd.choice([2, 3, None]), last, last, last))
+            c.executemany("""INSERT INTO plants(user_id,name,care,water_int,feed_int,mist_int,
+                                                last_watered,last_fed,last_misted) VALUES(?,?,?,?,?,?,?,?,?)""", rows)
+            first = c.execute("SELECT MAX(id) FROM plants").fetchone()[0] - len(rows) + 1
+            c.executemany("""INSERT INTO tasks(user_id,plant_id,kind,due_date,status,created_at)
+                             VALUES(?,?,?,?,?,?)""",
+                          ((r[0], first + k, "water", (t - timedelta(days=3 * h + 1)).isoformat(),
+                            rnd.choice(("done", "done", "done", "skipped", "deferred")), "seed")
+                           for k, r in enumerate(rows) for h in range(history)))
+
+def _serve_fakes(tg_latency: float, plantid_latency: float, pipe):
+    """Фейкові API в окремому процесі, щоб не ділити CPU з ботом, що вимірюється."""
+    from fake_telegram import FakeTelegram
+    from fake_plantid import FakePlantId
+
+    async def serve():
+        tg = FakeTelegram(latency=tg_latency)
+        pid = FakePlantId(latency=plantid_latency)
+        pipe.send((await tg.start(), await pid.start()))
+        await asyncio.get_running_loop().run_in_executor(None, pipe.recv)  # чекаємо "stop"
+        await tg.stop()
+        await pid.stop()
+    asyncio.run(serve())
+
+async def run_one(args) -> dict:
+    import multiprocessing
+    from fake_telegram import FakeTelegram
+    parent, child = multiprocessing.Pipe()
+    fakes = multiprocessing.Process(target=_serve_fakes, args=(args.tg_latency, args.plantid_latency, child),
+                                    daemon=True)
+    fakes.start()
+    tg_url, plantid_url = parent.recv()
+    tg = FakeTelegram()  # лише як фабрика апдейтів
+    tmp = tempfile.mkdtemp(prefix="plantbot-load-")
+    os.environ.update(DB_PATH=os.path.join(tmp, "load.db"), TELEGRAM_TOKEN="123:load",
+                      TELEGRAM_API_URL=tg_url, PLANT_ID_BASE_URL=plantid_url,
+                      SERVICE_PORT="0", TODAY_RENDER_DEBOUNCE="0")
+
+    from telegram import Update
+    from plantbot.db import conn, close_conn
+    from plantbot.config import DB_PATH
+    from plantbot.handlers import build_app
+
+    n_users = max(1, min(args.users, args.size))
+    t0 = time.perf_counter()
+    seed(args.size, n_users, args.history)
+    seed_s = time.perf_counter() - t0
+
+    app = build_app()
+    for job in app.job_queue.jobs():
+        job.schedule_removal()
+    await app.initialize()
+    await app.start()
+
+    lat = {name: [] for name, _ in SCENARIOS}
+    updates = 0
+    rnd = random.Random(7)
+
+    async def send(kind: str, u: dict):
+        nonlocal updates
+        t = time.perf_counter()
+        await app.process_update(Update.de_json(u, app.bot))
+        lat[kind].append((time.perf_counter() - t) * 1000)
+        updates += 1
+
+    async def session(uid: int, scenario: str):
+        if scenario == "task_done":
+            row = conn().execute("SELECT id FROM tasks WHERE user_id=? AND status='due' LIMIT 1", (uid,)).fetchone()
+            if row is None:
+                scenario = "today_plan"
+            else:
+                await send(scenario, tg.callback_update(uid, f"task:{row[0]}:done"))
+                return
+        if scenario == "add_plant":
+            for step in ("add_plant", "add_by_name", None, "confirm_add"):
+                u = (tg.callback_update(uid, step) if step else
+                     tg.text_update(uid, f"{rnd.choice(NAMES)} {rnd.randint(1, 50)}"))
+                await send(scenario, u)
+            return
+        await send(scenario, tg.callback_update(uid, scenario))
+
+    names = [n for n, _ in SCENARIOS]
+    weights = [w for _, w in SCENARIOS]
+    plan = [(rnd.randint(1, n_users), rnd.choices(names, weights)[0]) for _ in range(args.sessions)]
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def limited(uid, scenario):
+        async with sem:
+            await session(uid, scenario)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(limited(u, s) for u, s in plan))
+    wall = time.perf_counter() - t0
+
+    await app.stop()
+    await app.shutdown()
+    parent.send("stop")
+    fakes.join(5)
+    conn().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    close_conn()
+    all_lat = [x for v in lat.values() for x in v]
+    return {
+        "size": args.size, "users": n_users, "updates": updates, "seconds": round(wall, 3),
+        "upd_per_s": round(updates / wall, 1), "seed_s": round(seed_s, 1),
+        "p50_ms": round(_p(all_lat, 50), 2), "p99_ms": round(_p(all_lat, 99), 2),
+        "db_mb": round(os.path.getsize(DB_PATH) / 2**20, 2),
+        "actions": {k: {"n": len(v), "p50_ms": round(_p(v, 50), 2), "p99_ms": round(_p(v, 99), 2)}
+                    for k, v in lat.items()},
+    }
+
+def _delta(new: float, old: float, higher_is_better: bool = False) -> str:
+    if not old:
+        return ""
+    d = (new - old) / old * 100
+    better = d > 0 if higher_is_better else d < 0
+    return f" ({d:+.0f}%{' ✓' if better and abs(d) >= 5 else ''})"
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10,1000,10000,100000", help="к-сть рослин у наборах")
+    ap.add_argument("--users", type=int, default=2000, help="максимум користувачів")
+    ap.add_argument("--sessions", type=int, default=2000, help="сесій (дій користувачів) на набір")
+    ap.add_argument("--concurrency", type=int, default=64, help="одночасних сесій")
+    ap.add_argument("--history", type=int, default=10, help="завершених задач на рослину")
+    ap.add_argument("--tg-latency", type=float, default=0.005)
+    ap.add_argument("--plantid-latency", type=float, default=0.05)
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--size", type=int, help=argparse.SUPPRESS)  # дочірній процес
+    args = ap.parse_args()
+
+    if args.size is not None:
+        print(json.dumps(asyncio.run(run_one(args))))
+        return
+
+    child_args = [f"--users={args.users}", f"--sessions={args.sessions}", f"--concurrency={args.concurrency}",
+                  f"--history={args.history}", f"--tg-latency={args.tg_latency}",
+                  f"--plantid-latency={args.plantid_latency}"]
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        out = subprocess.run([sys.executable, __file__, *child_args, "--size", str(size)],
+                             check=True, stdout=subprocess.PIPE, text=True).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+
+    baseline = {}
+    if os.path.exists(BASELINE) and not args.save_baseline:
+        with open(BASELINE) as f:
+            baseline = {r["size"]: r for r in json.load(f)["results"]}
+
+    print(f"{'plants':>8} {'users':>6} {'upd/s':>14} {'p50 ms':>14} {'p99 ms':>14} {'db MB':>8}")
+    for r in results:
+        b = baseline.get(r["size"], {})
+        print(f"{r['size']:>8} {r['users']:>6} "
+              f"{str(r['upd_per_s']) + _delta(r['upd_per_s'], b.get('upd_per_s'), True):>14} "
+              f"{str(r['p50_ms']) + _delta(r['p50_ms'], b.get('p50_ms')):>14} "
+              f"{str(r['p99_ms']) + _delta(r['p99_ms'], b.get('p99_ms')):>14} {r['db_mb']:>8}")
+        for k, a in r["actions"].items():
+            print(f"{'':>16} {k:<12} n={a['n']:<6} p50={a['p50_ms']:<8} p99={a['p99_ms']}")
+
+    if args.save_baseline:
+        with open(BASELINE, "w") as f:
+            json.dump({"created": date.today().isoformat(), "argv": sys.argv[1:], "results": results}, f, indent=1)
+        print(f"baseline → {BASELINE}")
+
+if __name__ == "__main__":
+    main()
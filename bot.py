@@ -1,6 +1,29 @@
 # bot.py
-from plantbot.handlers import build_app
+import logging
+import sys
+
+from plantbot.config import (
+    ALLOWED_UPDATES, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_LISTEN, WEBHOOK_SECRET, PORT, ConfigError,
+)
+from plantbot.bootstrap import bootstrap
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        bootstrap()  # перевірка конфігу і міграції — до важких імпортів telegram.ext
+    except ConfigError as e:
+        sys.exit(str(e))
+    from plantbot.handlers import build_app
+
     app = build_app()
-    app.run_polling(allowed_updates=["message","edited_message","callback_query"])
+    if WEBHOOK_URL:
+        app.run_webhook(
+            listen=WEBHOOK_LISTEN,
+            port=PORT,
+            url_path=WEBHOOK_PATH,
+            webhook_url=f"{WEBHOOK_URL}/{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=ALLOWED_UPDATES,
+        )
+    else:
+        app.run_polling(allowed_updates=ALLOWED_UPDATES)
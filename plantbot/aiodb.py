@@ -0,0 +1,164 @@
+# plantbot/aiodb.py
+# Робота з SQLite поза циклом подій. Читання йдуть у невеликий пул потоків
+# (кожен зі своїм з'єднанням у режимі query_only), записи — в один потік-
+# записувач: він забирає з черги все, що накопичилось (до DB_WRITE_BATCH),
+# виконує кожне завдання у власному SAVEPOINT і робить один commit на пакет.
+# Результат завдання повертається лише після commit-у, тож наступне читання
+# вже бачить запис. Функції, які сюди передаються, — звичайні синхронні
+# функції з conn()/tx(); вкладений tx() у записувачі стає SAVEPOINT-ом.
+#   text = await aiodb.read(stats_text, uid)
+#   ok = await aiodb.write(record_care_event, uid, task_id=tid)
+# Важкі фонові проходи (ensure_week_tasks_for_all, retention) лишаються
+# в asyncio.to_thread зі своїми порційними транзакціями: вони не повинні
+# тримати пакет записувача, а WAL + busy_timeout впорядковують їх з ним.
+from __future__ import annotations
+import asyncio
+import functools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+from .config import DB_READERS, DB_WRITE_BATCH, METRICS_ENABLED
+from .db import conn, tx, close_conn
+from . import metrics
+
+log = logging.getLogger(__name__)
+
+_STOP = object()
+
+class _Job:
+    __slots__ = ("fn", "loop", "fut", "queued")
+
+    def __init__(self, fn: Callable[[], Any], loop: asyncio.AbstractEventLoop, fut: asyncio.Future):
+        self.fn = fn
+        self.loop = loop
+        self.fut = fut
+        self.queued = time.perf_counter()
+
+def _resolve(fut: asyncio.Future, result, exc: Optional[BaseException]):
+    if fut.cancelled():
+        return
+    if exc is not None:
+        fut.set_exception(exc)
+    else:
+        fut.set_result(result)
+
+def _reader_init():
+    # випадковий запис у пулі читання — помилка, а не гонка з записувачем
+    conn().execute("PRAGMA query_only=ON")
+
+class Executor:
+    def __init__(self, readers: int = DB_READERS, batch: int = DB_WRITE_BATCH):
+        self.batch = max(1, batch)
+        self._readers = ThreadPoolExecutor(max_workers=max(1, readers), thread_name_prefix="db-read",
+                                           initializer=_reader_init)
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_loop, name="db-write", daemon=True)
+        self._writer.start()
+        self.counters = {"reads": 0, "writes": 0, "batches": 0, "failed_batches": 0}
+
+    # --- API ---
+    async def read(self, fn: Callable, *args, **kw):
+        self.counters["reads"] += 1
+        return await asyncio.get_running_loop().run_in_executor(
+            self._readers, functools.partial(fn, *args, **kw))
+
+    async def write(self, fn: Callable, *args, **kw):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self.counters["writes"] += 1
+        self._queue.put(_Job(functools.partial(fn, *args, **kw), loop, fut))
+        return await fut
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._readers.shutdown(wait=True)
+
+    # --- потік записувача ---
+    def _write_loop(self):
+        try:
+            while True:
+                job = self._queue.get()
+                if job is _STOP:
+                    return
+                jobs, stop = [job], False
+                while len(jobs) < self.batch:
+                    try:
+                        nxt = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if nxt is _STOP:
+                        stop = True
+                        break
+                    jobs.append(nxt)
+                self._run_batch(jobs)
+                if stop:
+                    return
+        finally:
+            close_conn()
+
+    def _run_batch(self, jobs: List[_Job]):
+        t0 = time.perf_counter()
+        done = []
+        try:
+            with tx(immediate=True):
+                for job in jobs:
+                    try:
+                        with tx():  # SAVEPOINT: помилка одного завдання не зачіпає інших
+                            done.append((job, job.fn(), None))
+                    except Exception as e:
+                        done.append((job, None, e))
+        except BaseException as e:
+            # commit не вдався — жодне завдання пакета не записане
+            self.counters["failed_batches"] += 1
+            log.exception("db write batch of %d failed", len(jobs))
+            done = [(job, None, e) for job in jobs]
+        self.counters["batches"] += 1
+        if METRICS_ENABLED:
+            metrics.observe("db_write_batch_seconds", time.perf_counter() - t0)
+            metrics.inc("db_write_jobs_total", len(jobs))
+            for job in jobs:
+                metrics.observe("db_write_wait_seconds", t0 - job.queued)
+        for job, result, exc in done:
+            job.loop.call_soon_threadsafe(_resolve, job.fut, result, exc)
+
+    def stats(self) -> dict:
+        c = dict(self.counters)
+        c["jobs_per_batch"] = round(c["writes"] / c["batches"], 2) if c["batches"] else 0.0
+        c["queued"] = self._queue.qsize()
+        return c
+
+_executor: Optional[Executor] = None
+_lock = threading.Lock()
+
+def executor() -> Executor:
+    """Спільний виконавець; потоки стартують при першому зверненні, а не при імпорті."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = Executor()
+    return _executor
+
+async def read(fn: Callable, *args, **kw):
+    """fn(*args, **kw) у потоці читання (лише SELECT)."""
+    return await executor().read(fn, *args, **kw)
+
+async def write(fn: Callable, *args, **kw):
+    """fn(*args, **kw) у потоці запису; повертає результат після commit-у пакета."""
+    return await executor().write(fn, *args, **kw)
+
+def stats() -> dict:
+    return _executor.stats() if _executor is not None else {}
+
+def shutdown():
+    """Дописати чергу і зупинити потоки (на завершенні застосунку)."""
+    global _executor
+    with _lock:
+        ex, _executor = _executor, None
+    if ex is not None:
+        ex.close()
@@ -0,0 +1,50 @@
+# plantbot/bootstrap.py
+# Явна послідовність старту замість побічних ефектів імпорту:
+# перевірка конфігурації → стара БД у volume → міграції схеми → прибирання фото.
+# Кожен крок логуються з часом; повторний виклик у процесі нічого не робить.
+# Модуль не тягне telegram — помилку конфігурації видно ще до важких імпортів.
+from __future__ import annotations
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+from . import config
+
+log = logging.getLogger(__name__)
+
+def _ensure_db_on_volume():
+    from .db import ensure_db_on_volume
+    ensure_db_on_volume()
+
+def _init_db():
+    from .db import init_db
+    init_db()
+
+def _gc_photos():
+    from .photostore import gc_photos
+    gc_photos()
+
+STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("config", config.validate),
+    ("db_on_volume", _ensure_db_on_volume),
+    ("migrations", _init_db),  # ddl; перенесення даних — фоном (migrations.schedule_backfills)
+    ("photo_gc", _gc_photos),
+]
+
+_lock = threading.Lock()
+_timings: Dict[str, float] = {}
+
+def bootstrap() -> Dict[str, float]:
+    """Виконує кроки старту один раз; повертає час кожного (сек)."""
+    with _lock:
+        if _timings:
+            return dict(_timings)
+        t_all = time.perf_counter()
+        for name, step in STEPS:
+            t0 = time.perf_counter()
+            step()
+            _timings[name] = time.perf_counter() - t0
+        _timings["total"] = time.perf_counter() - t_all
+        log.info("bootstrap: %s", ", ".join(f"{k}={v * 1000:.0f}ms" for k, v in _timings.items()))
+        return dict(_timings)
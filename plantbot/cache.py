@@ -0,0 +1,181 @@
+# plantbot/cache.py
+# Двоярусний кеш: LRU у процесі + таблиця kv_cache у SQLite з TTL.
+from __future__ import annotations
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .db import conn, tx
+from . import aiodb
+
+class LRU:
+    """Простий LRU на OrderedDict."""
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._d: "OrderedDict[str, Any]" = OrderedDict()
+
+    def get(self, key: str, default=None):
+        try:
+            self._d.move_to_end(key)
+            return self._d[key]
+        except KeyError:
+            return default
+
+    def put(self, key: str, value: Any):
+        self._d[key] = value
+        self._d.move_to_end(key)
+        while len(self._d) > self.maxsize:
+            self._d.popitem(last=False)
+
+    def pop(self, key: str):
+        self._d.pop(key, None)
+
+    def clear(self):
+        self._d.clear()
+
+    def __len__(self):
+        return len(self._d)
+
+class PersistentCache:
+    """
+    Кеш значень (JSON) за ключем у просторі імен ns.
+    Позитивні результати живуть ttl сек, негативні — negative_ttl.
+    max_rows (якщо задано) обмежує кількість рядків ns у БД: при чистці
+    видаляються ті, що спливають найраніше.
+    Одночасні однакові промахи зливаються в один виклик loader-а.
+    """
+    PURGE_EVERY = 256  # раз на стільки записів чистимо прострочене в БД
+
+    def __init__(self, ns: str, ttl: int, negative_ttl: int, mem_size: int = 1024,
+                 max_rows: Optional[int] = None):
+        self.ns = ns
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_rows = max_rows
+        self.mem = LRU(mem_size)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._puts = 0
+        self.counters = {"mem_hits": 0, "db_hits": 0, "misses": 0, "coalesced": 0,
+                         "negative_hits": 0, "loads": 0, "load_errors": 0, "evicted": 0}
+
+    # --- синхронний рівень ---
+    def _mem_get(self, key: str, now: float) -> Tuple[bool, Any]:
+        hit = self.mem.get(key)
+        if hit is not None:
+            value, expires_at = hit
+            if expires_at > now:
+                self.counters["mem_hits"] += 1
+                return True, value
+            self.mem.pop(key)
+        return False, None
+
+    def _db_get(self, key: str, now: float) -> Optional[Tuple[Any, float]]:
+        row = conn().execute("SELECT value, expires_at FROM kv_cache WHERE ns=? AND key=?",
+                             (self.ns, key)).fetchone()
+        if row and row[1] > now:
+            return json.loads(row[0]), row[1]
+        return None
+
+    def _db_hit(self, key: str, hit) -> Tuple[bool, Any]:
+        if hit is None:
+            return False, None
+        self.mem.put(key, hit)
+        self.counters["db_hits"] += 1
+        return True, hit[0]
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """(found, value) з урахуванням TTL; спершу пам'ять, потім БД."""
+        now = time.time()
+        found, value = self._mem_get(key, now)
+        if found:
+            return found, value
+        return self._db_hit(key, self._db_get(key, now))
+
+    def _remember(self, key: str, value: Any, negative: bool) -> float:
+        expires_at = time.time() + (self.negative_ttl if negative else self.ttl)
+        self.mem.put(key, (value, expires_at))
+        return expires_at
+
+    def _store(self, key: str, value: Any, expires_at: float):
+        with tx() as c:
+            c.execute("""INSERT INTO kv_cache(ns, key, value, expires_at) VALUES(?,?,?,?)
+                         ON CONFLICT(ns, key) DO UPDATE SET value=excluded.value, expires_at=excluded.expires_at""",
+                      (self.ns, key, json.dumps(value, ensure_ascii=False), expires_at))
+            self._puts += 1
+            if self._puts % self.PURGE_EVERY == 0:
+                self._purge(c)
+
+    def put(self, key: str, value: Any, negative: bool = False):
+        self._store(key, value, self._remember(key, value, negative))
+
+    def _purge(self, c):
+        c.execute("DELETE FROM kv_cache WHERE ns=? AND expires_at<=?", (self.ns, time.time()))
+        if self.max_rows is None:
+            return
+        (n,) = c.execute("SELECT COUNT(*) FROM kv_cache WHERE ns=?", (self.ns,)).fetchone()
+        if n > self.max_rows:
+            cur = c.execute("""DELETE FROM kv_cache WHERE ns=? AND key IN (
+                                 SELECT key FROM kv_cache WHERE ns=? ORDER BY expires_at LIMIT ?)""",
+                            (self.ns, self.ns, n - self.max_rows))
+            self.counters["evicted"] += cur.rowcount
+
+    def invalidate(self, key: str):
+        self.mem.pop(key)
+        with tx() as c:
+            c.execute("DELETE FROM kv_cache WHERE ns=? AND key=?", (self.ns, key))
+
+    # --- асинхронний рівень ---
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]],
+                          is_negative: Callable[[Any], bool] = lambda v: not v) -> Any:
+        """
+        Повертає значення з кешу або викликає loader() (один раз на ключ,
+        навіть якщо запитів кілька одночасно). Винятки loader-а не кешуються.
+        Пам'ять перевіряється в циклі подій, БД — через aiodb.
+        """
+        now = time.time()
+        found, value = self._mem_get(key, now)
+        if not found:
+            found, value = self._db_hit(key, await aiodb.read(self._db_get, key, now))
+        if found:
+            if is_negative(value):
+                self.counters["negative_hits"] += 1
+            return value
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.counters["coalesced"] += 1
+            return await asyncio.shield(fut)
+        self.counters["misses"] += 1
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            self.counters["loads"] += 1
+            value = await loader()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            self.counters["load_errors"] += 1
+            fut.set_exception(e)
+            fut.exception()  # щоб не було "exception was never retrieved"
+            raise
+        else:
+            expires_at = self._remember(key, value, is_negative(value))
+            fut.set_result(value)
+            await aiodb.write(self._store, key, value, expires_at)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        c = dict(self.counters)
+        hits = c["mem_hits"] + c["db_hits"]
+        total = hits + c["misses"] + c["coalesced"]
+        c["saved_calls"] = hits + c["coalesced"]
+        c["hit_rate"] = round((c["saved_calls"]) / total, 3) if total else 0.0
+        c["mem_size"] = len(self.mem)
+        return c
+
+def normalize_key(s: Optional[str]) -> str:
+    return " ".join((s or "").casefold().split())
@@ -1,58 +1,107 @@
 # plantbot/care.py
+# Каталог догляду (care_catalog.json) компілюється в індекс фраз:
+# назва → токени → пошук усіх n-грам запиту у dict. Вартість пошуку
+# залежить від довжини назви, а не від кількості видів у каталозі.
+# Файл перечитується "на гарячу", коли змінюється його mtime.
+from __future__ import annotations
+import json
+import logging
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from .config import CARE_CATALOG_PATH
+
+log = logging.getLogger(__name__)
+
+RELOAD_CHECK = 5.0  # сек між перевірками mtime
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+def tokens(name: str) -> Tuple[str, ...]:
+    return tuple(_TOKEN_RE.findall((name or "").casefold()))
+
+class CareCatalog:
+    def __init__(self, data: dict):
+        d = data["default"]
+        self.default = (d["care"], d.get("water"), d.get("feed"), d.get("mist"))
+        self.species = []
+        self.index: Dict[Tuple[str, ...], int] = {}
+        self.max_len = 1
+        for i, sp in enumerate(data.get("species") or []):
+            self.species.append((sp["care"], sp.get("water"), sp.get("feed"), sp.get("mist")))
+            for nm in sp.get("names") or []:
+                key = tokens(nm)
+                if key:
+                    # при колізії перемагає вид, що стоїть у файлі раніше
+                    self.index.setdefault(key, i)
+                    self.max_len = max(self.max_len, len(key))
+        self.lookup = lru_cache(maxsize=4096)(self._lookup)
+
+    @classmethod
+    def load(cls, path: str) -> "CareCatalog":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def match(self, name: str) -> Optional[int]:
+        """Індекс виду: найдовша збіжна фраза; при рівній довжині — раніший у файлі."""
+        toks = tokens(name)
+        best = None  # (довжина, -індекс)
+        for n in range(min(self.max_len, len(toks)), 0, -1):
+            for s in range(len(toks) - n + 1):
+                i = self.index.get(toks[s:s + n])
+                if i is not None and (best is None or (n, -i) > best):
+                    best = (n, -i)
+            if best is not None:
+                break
+        return -best[1] if best else None
+
+    def _lookup(self, name: str):
+        i = self.match(name)
+        return self.species[i] if i is not None else self.default
+
+class _Holder:
+    """Поточний каталог + перевірка mtime не частіше RELOAD_CHECK."""
+    def __init__(self, path: str):
+        self.path = path
+        self.catalog: Optional[CareCatalog] = None
+        self.mtime = None
+        self.checked = 0.0
+        self.lock = threading.Lock()
+
+    def get(self) -> CareCatalog:
+        now = time.monotonic()
+        if self.catalog is not None and now - self.checked < RELOAD_CHECK:
+            return self.catalog
+        with self.lock:
+            self.checked = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError as e:
+                if self.catalog is None:
+                    raise
+                log.warning("care catalog unavailable, keeping the loaded one: %r", e)
+                return self.catalog
+            if mtime != self.mtime:
+                try:
+                    self.catalog = CareCatalog.load(self.path)
+                    log.info("care catalog loaded: %d species", len(self.catalog.species))
+                except Exception as e:  # синтаксис JSON або структура (напр. "names": 5 → TypeError)
+                    if self.catalog is None:
+                        raise
+                    log.warning("care catalog reload failed, keeping the old one: %r", e)
+                # зламаний файл не перечитуємо кожні RELOAD_CHECK — лише після наступної зміни
+                self.mtime = mtime
+            return self.catalog
+
+_holder = _Holder(CARE_CATALOG_PATH)
+
+def catalog() -> CareCatalog:
+    return _holder.get()
+
 def care_and_intervals_for(name: str):
-    n = (name or "").lower()
-
-    if "zamioculcas" in n or "заміокулькас" in n or "zz" in n:
-        return (
-            "Світло: яскраве розсіяне/півтінь; вечірнє сонце допустиме.\n"
-            "Полив: лише після повного просихання (~10–14 днів влітку).\n"
-            "Підживлення: слабким добривом раз на 4–6 тижнів.\n"
-            "Примітка: не переставляти під час росту нового пагона.",
-            14, 42, None
-        )
-    if "dracaena" in n or "драцена" in n:
-        return (
-            "Світло: яскраве розсіяне або півтінь; легке вечірнє сонце ок.\n"
-            "Полив: після підсихання 2–3 см зверху.\n"
-            "Після пересадки: 2–3 тижні без добрив; стежити за дренажем.\n"
-            "Догляд: обприскування/протирання листя.",
-            14, None, 7
-        )
-    if "chamaedorea" in n or "parlor palm" in n or "хамаедорея" in n:
-        return (
-            "Світло: розсіяне, без прямого сонця.\n"
-            "Полив: рівномірно вологий ґрунт (без застою).\n"
-            "Догляд: регулярне обприскування.",
-            5, 30, 3
-        )
-    if "spathiphyllum" in n or "peace lily" in n or "спатіфілум" in n:
-        return (
-            "Світло: півтінь/розсіяне; пряме сонце уникати.\n"
-            "Полив: ґрунт злегка вологий (влітку перевіряй кожні 3–4 дні).\n"
-            "Підживлення: раз на 2 тижні.\n"
-            "Догляд: обприскування та очищення листя.",
-            4, 14, 3
-        )
-    if "calamondin" in n or "citrus × microcarpa" in n or "citrofortunella" in n or "каламондин" in n or "citrus" in n:
-        return (
-            "Світло: дуже яскраве, 4–6 год вечірнього.\n"
-            "Полив: злегка вологий ґрунт, без застою; влітку перевіряй частіше.\n"
-            "Підживлення: цитрус-раз на 14 днів.\n"
-            "Догляд: провітрювання; обприскування листя в спеку.",
-            3, 14, 7
-        )
-    if "persea americana" in n or "avocado" in n or "авокадо" in n:
-        return (
-            "Світло: яскраве, без жорсткого полуденного.\n"
-            "Полив: після просихання 2–3 см зверху.\n"
-            "Підживлення: раз на 3–4 тижні у період росту.",
-            6, 28, None
-        )
-
-    # обережний дефолт
-    return (
-        "Світло: яскраве розсіяне.\n"
-        "Полив: після просихання верхнього шару ґрунту.\n"
-        "Підживлення: за сезоном (кожні 3–4 тижні у період росту).",
-        7, 28, None
-    )
+    """(care_text, water_int, feed_int, mist_int) за назвою рослини."""
+    return catalog().lookup(" ".join(tokens(name)))
@@ -0,0 +1,54 @@
+# plantbot/clock.py
+# Єдине джерело "сьогодні": дата рахується у часовій зоні користувача
+# (users.tz), а якщо її не задано — у config.TZ. Ніяких date.today() чи
+# SQLite date('now') (UTC) у запитах розкладу.
+from __future__ import annotations
+from datetime import date, datetime
+from typing import Dict, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from .config import TZ
+from .db import conn, tx
+
+_tz_cache: Dict[int, ZoneInfo] = {}
+
+def parse_tz(name: str) -> Optional[ZoneInfo]:
+    try:
+        return ZoneInfo((name or "").strip())
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+def user_tz(user_id: int) -> ZoneInfo:
+    tz = _tz_cache.get(user_id)
+    if tz is None:
+        row = conn().execute("SELECT tz FROM users WHERE user_id=?", (user_id,)).fetchone()
+        tz = (parse_tz(row[0]) if row and row[0] else None) or TZ
+        _tz_cache[user_id] = tz
+    return tz
+
+def set_user_tz(user_id: int, name: str) -> Optional[ZoneInfo]:
+    """Зберігає часову зону користувача; None, якщо назва невідома."""
+    tz = parse_tz(name)
+    if tz is None:
+        return None
+    with tx() as c:
+        c.execute("""INSERT INTO users(user_id, tz) VALUES(?,?)
+                     ON CONFLICT(user_id) DO UPDATE SET tz=excluded.tz""", (user_id, tz.key))
+    _tz_cache[user_id] = tz
+    return tz
+
+def all_user_tz() -> Dict[int, ZoneInfo]:
+    """Усі задані зони одним запитом (для масових проходів по користувачах)."""
+    out = {}
+    for uid, name in conn().execute("SELECT user_id, tz FROM users WHERE tz IS NOT NULL"):
+        out[uid] = parse_tz(name) or TZ
+    return out
+
+def today_in(tz: ZoneInfo) -> date:
+    return datetime.now(tz).date()
+
+def today_for(user_id: int) -> date:
+    return today_in(user_tz(user_id))
+
+def today_default() -> date:
+    return today_in(TZ)
@@ -1,9 +1,32 @@
 # plantbot/config.py
+import hashlib
 import os
+import re
+from typing import List
 from zoneinfo import ZoneInfo
 
+# Помилки розбору змінних оточення збираються і повідомляються разом у validate(),
+# а не падінням на першій же при імпорті
+_ERRORS: List[str] = []
+
+def _int(name: str, default: str) -> int:
+    raw = os.environ.get(name, default)
+    try:
+        return int(raw)
+    except ValueError:
+        _ERRORS.append(f"{name}={raw!r}: очікується ціле число")
+        return int(default)
+
+def _float(name: str, default: str) -> float:
+    raw = os.environ.get(name, default)
+    try:
+        return float(raw)
+    except ValueError:
+        _ERRORS.append(f"{name}={raw!r}: очікується число")
+        return float(default)
+
 # Токени/ключі з Variables на Railway
-TOKEN = os.environ["TELEGRAM_TOKEN"]
+TOKEN = os.environ.get("TELEGRAM_TOKEN", "")
 PLANT_ID_API_KEY = os.environ.get("PLANT_ID_API_KEY", "")
 
 # Шлях до SQLite
@@ -14,3 +37,112 @@ TZ = ZoneInfo("Europe/Kyiv")
 
 # Дні догляду: максимум два дні на тиждень (0=Пн ... 6=Нд)
 CARE_DAYS = [1, 4]  # Вівторок і П’ятниця
+
+# Plant.id: базова адреса (можна підмінити локальним стабом) і ліміт одночасних HTTP-запитів
+PLANT_ID_BASE_URL = os.environ.get("PLANT_ID_BASE_URL", "https://api.plant.id").rstrip("/")
+HTTP_CONCURRENCY = _int("HTTP_CONCURRENCY", "8")
+
+# Кеш name_search (сек): знайдені назви живуть довго, "не знайдено" — коротше
+NAME_CACHE_TTL = _int("NAME_CACHE_TTL", str(30 * 24 * 3600))
+NAME_CACHE_NEGATIVE_TTL = _int("NAME_CACHE_NEGATIVE_TTL", str(6 * 3600))
+
+# Нагадування у дні догляду: час (за TZ) і ліміт повідомлень на секунду (Telegram ~30/с)
+REMINDER_TIME = os.environ.get("REMINDER_TIME", "09:00")
+REMINDER_RATE = _int("REMINDER_RATE", "25")
+
+# Режим роботи: якщо задано WEBHOOK_URL (публічна https-адреса) — webhook, інакше long polling
+WEBHOOK_URL = os.environ.get("WEBHOOK_URL", "").rstrip("/")
+WEBHOOK_PATH = os.environ.get("WEBHOOK_PATH", "telegram")
+WEBHOOK_LISTEN = os.environ.get("WEBHOOK_LISTEN", "0.0.0.0")
+PORT = _int("PORT", "8080")
+# Секрет для заголовка X-Telegram-Bot-Api-Secret-Token; за замовчуванням — похідний від токена
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET") or hashlib.sha256(f"webhook:{TOKEN}".encode()).hexdigest()[:48]
+# Скільки апдейтів обробляти паралельно (1 = послідовно); робота з БД іде через aiodb,
+# тож паралельні обробники не блокують цикл подій і не змагаються за запис
+CONCURRENT_UPDATES = _int("CONCURRENT_UPDATES", "16" if WEBHOOK_URL else "8")
+# Службовий HTTP (/healthz); 0 = вимкнено
+SERVICE_PORT = _int("SERVICE_PORT", "8081" if WEBHOOK_URL else "0")
+# Альтернативний Bot API сервер (локальний Bot API або фейк для бенчмарків)
+TELEGRAM_API_URL = os.environ.get("TELEGRAM_API_URL", "").rstrip("/")
+ALLOWED_UPDATES = ["message", "edited_message", "callback_query"]
+
+# Каталог догляду за видами (JSON); перечитується без рестарту, якщо файл змінився
+CARE_CATALOG_PATH = os.environ.get("CARE_CATALOG_PATH",
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)), "care_catalog.json"))
+
+# Як часто (сек) скидати user_data і стани діалогів у БД
+PERSISTENCE_FLUSH_INTERVAL = _float("PERSISTENCE_FLUSH_INTERVAL", "10")
+
+# Фото для Plant.id: найменший розмір Telegram з довшою стороною ≥ IDENTIFY_MIN_SIDE
+# (Telegram зберігає 90/320/800/1280 px по довшій стороні);
+# з Pillow — ще й зменшення до IDENTIFY_MAX_SIDE і перекодування в JPEG
+IDENTIFY_MIN_SIDE = _int("IDENTIFY_MIN_SIDE", "800")
+IDENTIFY_MAX_SIDE = _int("IDENTIFY_MAX_SIDE", "1024")
+IDENTIFY_JPEG_QUALITY = _int("IDENTIFY_JPEG_QUALITY", "85")
+# Кеш розпізнавання за хешем зображення (сек)
+IDENTIFY_CACHE_TTL = _int("IDENTIFY_CACHE_TTL", str(30 * 24 * 3600))
+IDENTIFY_CACHE_NEGATIVE_TTL = _int("IDENTIFY_CACHE_NEGATIVE_TTL", str(24 * 3600))
+# Скільки записів кешу розпізнавання тримати в БД (найстаріші витісняються)
+IDENTIFY_CACHE_MAX = _int("IDENTIFY_CACHE_MAX", "20000")
+
+# Перемальовування "Плану на сьогодні" після натискань: не частіше ніж раз на стільки сек
+TODAY_RENDER_DEBOUNCE = _float("TODAY_RENDER_DEBOUNCE", "1.0")
+
+# Архівація історії: завершені задачі старші за RETENTION_DAYS переносяться в care_events
+RETENTION_DAYS = _int("RETENTION_DAYS", "90")
+RETENTION_BATCH = _int("RETENTION_BATCH", "2000")        # рядків за транзакцію
+RETENTION_INTERVAL = _int("RETENTION_INTERVAL", "3600")  # сек між проходами
+RETENTION_BUDGET = _float("RETENTION_BUDGET", "2.0")     # сек роботи за прохід
+
+# Міграції схеми (migrations.py): перенесення даних порціями у фоні
+MIGRATION_BATCH = _int("MIGRATION_BATCH", "2000")        # рядків (вікно id) за транзакцію
+MIGRATION_INTERVAL = _int("MIGRATION_INTERVAL", "30")    # сек між проходами
+MIGRATION_BUDGET = _float("MIGRATION_BUDGET", "1.0")     # сек роботи за прохід
+# власник рослин без user_id зі старих однокористувацьких БД; 0 — перший /start
+LEGACY_OWNER_ID = _int("LEGACY_OWNER_ID", "0")
+
+# Календар (ICS): скільки днів уперед/назад і публічна адреса службового HTTP
+# для посилання-підписки (напр. https://bot.example.com; порожньо — лише файл у /calendar)
+ICS_DAYS = _int("ICS_DAYS", "365")
+ICS_HISTORY_DAYS = _int("ICS_HISTORY_DAYS", "30")
+CALENDAR_PUBLIC_URL = os.environ.get("CALENDAR_PUBLIC_URL", "").rstrip("/")
+
+# Виконавець БД (aiodb): потоки читання і розмір пакета записів на один commit
+DB_READERS = _int("DB_READERS", "4")
+DB_WRITE_BATCH = _int("DB_WRITE_BATCH", "64")
+
+# Метрики (гістограми латентності, лічильники) — /metrics на SERVICE_PORT і/або дамп у лог
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1" if SERVICE_PORT else "0") == "1"
+METRICS_LOG_INTERVAL = _int("METRICS_LOG_INTERVAL", "0")  # сек; 0 = не писати в лог
+# Службові ендпоінти (/dbstats, /profiler на SERVICE_PORT): лише якщо задано
+# токен, запити — із заголовком X-Admin-Token
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+class ConfigError(ValueError):
+    pass
+
+def validate():
+    """Перевірка конфігурації один раз на старті (bootstrap); ConfigError зі списком усіх проблем."""
+    errors = list(_ERRORS)
+    if not re.fullmatch(r"\d+:[\w-]+", TOKEN):
+        errors.append("TELEGRAM_TOKEN не задано або він не схожий на токен бота (<id>:<секрет>)")
+    if not re.fullmatch(r"([01]?\d|2[0-3]):[0-5]\d", REMINDER_TIME):
+        errors.append(f"REMINDER_TIME={REMINDER_TIME!r}: очікується HH:MM")
+    if not CARE_DAYS or any(not 0 <= d <= 6 for d in CARE_DAYS):
+        errors.append(f"CARE_DAYS={CARE_DAYS!r}: дні тижня 0..6")
+    for name, url in (("WEBHOOK_URL", WEBHOOK_URL), ("CALENDAR_PUBLIC_URL", CALENDAR_PUBLIC_URL)):
+        if url and not url.startswith("https://"):
+            errors.append(f"{name}={url!r}: потрібна https-адреса")
+    for name, value in (("HTTP_CONCURRENCY", HTTP_CONCURRENCY), ("REMINDER_RATE", REMINDER_RATE),
+                        ("CONCURRENT_UPDATES", CONCURRENT_UPDATES), ("DB_READERS", DB_READERS),
+                        ("DB_WRITE_BATCH", DB_WRITE_BATCH), ("RETENTION_BATCH", RETENTION_BATCH),
+                        ("MIGRATION_BATCH", MIGRATION_BATCH), ("MIGRATION_INTERVAL", MIGRATION_INTERVAL),
+                        ("IDENTIFY_MIN_SIDE", IDENTIFY_MIN_SIDE), ("ICS_DAYS", ICS_DAYS)):
+        if value < 1:
+            errors.append(f"{name}={value}: має бути ≥ 1")
+    if ADMIN_TOKEN and len(ADMIN_TOKEN) < 16:
+        errors.append("ADMIN_TOKEN: щонайменше 16 символів")
+    if not 1 <= IDENTIFY_JPEG_QUALITY <= 95:
+        errors.append(f"IDENTIFY_JPEG_QUALITY={IDENTIFY_JPEG_QUALITY}: 1..95")
+    if errors:
+        raise ConfigError("некоректна конфігурація:\n  " + "\n  ".join(errors))
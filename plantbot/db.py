@@ -1,60 +1,118 @@
 # plantbot/db.py
+import os
+import shutil
 import sqlite3
+import threading
+from contextlib import contextmanager
 from .config import DB_PATH
-
-# --- авто-міграція БД у volume ---
-import os, shutil
-from .config import DB_PATH
+from .metrics import connection_factory
 
 LEGACY_PATHS = ["plants.db", "/app/plants.db"]  # де могла лежати стара БД
 
 def ensure_db_on_volume():
+    """Перенесення старої БД у volume; викликається з bootstrap, а не при імпорті."""
     target = DB_PATH
-    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
     if os.path.exists(target):
         return  # у volume вже є файл
     for p in LEGACY_PATHS:
-        if os.path.exists(p):
+        if os.path.exists(p) and os.path.abspath(p) != os.path.abspath(target):
             shutil.copy2(p, target)  # переносимо старий файл
             break
 
-ensure_db_on_volume()
-# --- кінець блоку авто-міграції ---
-
-def conn():
-    c = sqlite3.connect(DB_PATH)
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS plants(
-      id INTEGER PRIMARY KEY AUTOINCREMENT,
-      user_id INTEGER,                 -- multi-user (NULL legacy допустимо)
-      name TEXT NOT NULL,
-      care TEXT NOT NULL,
-      photo BLOB,
-      water_int INTEGER,
-      feed_int INTEGER,
-      mist_int INTEGER,
-      last_watered TEXT,
-      last_fed TEXT,
-      last_misted TEXT
-    );""")
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS tasks(
-      id INTEGER PRIMARY KEY AUTOINCREMENT,
-      user_id INTEGER NOT NULL,
-      plant_id INTEGER NOT NULL,
-      kind TEXT NOT NULL,         -- 'water'|'feed'|'mist'
-      due_date TEXT NOT NULL,     -- 'YYYY-MM-DD'
-      status TEXT NOT NULL,       -- 'due'|'done'|'deferred'|'skipped'
-      created_at TEXT NOT NULL
-    );""")
+# Прагми для кожного з'єднання: WAL дозволяє читати паралельно із записом,
+# synchronous=NORMAL у WAL безпечний і значно швидший за FULL.
+PRAGMAS = (
+    # діє лише на новій, порожній БД (тому до WAL); стару переводить тільки повний VACUUM
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",      # ~16 МБ сторінкового кешу
+    "PRAGMA mmap_size=134217728",    # 128 МБ
+)
+BUSY_TIMEOUT = 30  # сек; замість миттєвого "database is locked"
+
+# Схема БД — у migrations.py (версійовані кроки; init_db застосовує нові).
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+def _connect() -> sqlite3.Connection:
+    factory = connection_factory()  # з метриками — TimedConnection
+    c = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT, check_same_thread=False,
+                        **({"factory": factory} if factory else {}))
+    for p in PRAGMAS:
+        c.execute(p)
     return c
 
-def migrate_legacy_rows_to_user(user_id: int):
+def init_db():
+    """Застосовує нові міграції схеми один раз на процес (викликається на старті)."""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        from .migrations import apply_pending  # migrations сам імпортує db
+        c = _connect()
+        try:
+            apply_pending(c)
+        finally:
+            c.close()
+        _schema_ready = True
+
+def conn() -> sqlite3.Connection:
+    """
+    Повертає з'єднання цього потоку (одне на потік, перевикористовується).
+    Не закривайте його — для запису використовуйте tx().
+    """
+    c = getattr(_local, "conn", None)
+    if c is None:
+        init_db()
+        c = _local.conn = _connect()
+    return c
+
+@contextmanager
+def tx(immediate: bool = False):
+    """
+    Транзакція: commit при успіху, rollback при винятку.
+    Вкладений tx() (у тому числі кожне завдання в пакеті запису aiodb) —
+    SAVEPOINT: відкочується лише він, commit робить зовнішній.
+    immediate=True — одразу взяти блокування запису (BEGIN IMMEDIATE).
+    """
     c = conn()
-    have_user = c.execute("SELECT 1 FROM plants WHERE user_id=?", (user_id,)).fetchone()
-    legacy    = c.execute("SELECT 1 FROM plants WHERE user_id IS NULL").fetchone()
-    if (not have_user) and legacy:
-        c.execute("UPDATE plants SET user_id=? WHERE user_id IS NULL", (user_id,))
-        c.execute("UPDATE tasks  SET user_id=? WHERE user_id IS NULL", (user_id,))
-        c.commit()
-    c.close()
+    depth = getattr(_local, "tx_depth", 0)
+    _local.tx_depth = depth + 1
+    try:
+        if depth:
+            sp = f"sp{depth}"
+            c.execute(f"SAVEPOINT {sp}")
+            try:
+                yield c
+            except BaseException:
+                c.execute(f"ROLLBACK TO {sp}")
+                c.execute(f"RELEASE {sp}")
+                raise
+            c.execute(f"RELEASE {sp}")
+            return
+        if immediate and not c.in_transaction:
+            c.execute("BEGIN IMMEDIATE")
+        try:
+            yield c
+        except BaseException:
+            c.rollback()
+            raise
+        else:
+            c.commit()
+    finally:
+        _local.tx_depth = depth
+
+def close_conn():
+    """Закриває з'єднання поточного потоку (на завершенні воркера)."""
+    c = getattr(_local, "conn", None)
+    if c is not None:
+        _local.conn = None
+        c.close()
@@ -1,8 +1,12 @@
 # plantbot/handlers.py
 from __future__ import annotations
 
-from datetime import date
-from typing import Tuple, Optional
+import asyncio
+import hmac
+import logging
+import math
+import tempfile
+from typing import Dict, Tuple, Optional
 
 from telegram import (
     Update,
@@ -19,27 +23,53 @@ from telegram.ext import (
     ConversationHandler,
     filters,
 )
+from telegram.error import BadRequest
 
-from .config import TOKEN, ADMIN_ID, DB_PATH  # ADMIN_ID/DB_PATH можуть не знадобитись прямо тут
-from .db import conn, migrate_legacy_rows_to_user
-from .keyboards import main_kb, plants_list_kb, plant_card_kb, per_task_buttons
+from .config import (
+    TOKEN, TELEGRAM_API_URL, CONCURRENT_UPDATES, SERVICE_PORT, WEBHOOK_URL, PERSISTENCE_FLUSH_INTERVAL,
+    TODAY_RENDER_DEBOUNCE, METRICS_ENABLED, METRICS_LOG_INTERVAL, CALENDAR_PUBLIC_URL, ICS_DAYS,
+    ADMIN_TOKEN,
+)
+from . import net
+from .db import conn, tx
+from .bootstrap import bootstrap
+from .photostore import put_photo, set_plant_photo, reply_plant_photo
+from .clock import today_for, user_tz, set_user_tz
+from .reminders import schedule_reminders
+from .retention import schedule_retention, db_stats, last_run
+from .stats import stats_text, forget_plant
+from .web import WebServer, json_response, text_response
+from . import metrics
+from . import aiodb
+from . import ics
+from . import migrations
+from .persistence import SQLitePersistence
+from .plants import plants_page, first_letters, invalidate_plant_pages
+from .projection import overview_text, WEEK, MONTH, SEASON
+from .keyboards import main_kb, horizon_kb, plants_list_kb, letters_kb, plant_card_kb, per_task_buttons, today_bulk_buttons
 from .schedule import (
     ensure_week_tasks_for_user,
-    week_overview_text,
     today_tasks_markup_and_text,
-    mark_task_done,
+    record_care_event,
     move_task_to_next_care_day,
     mark_task_skipped,
+    mark_today_done,
+    defer_today,
+    touch_schedule,
 )
 from .resolvers import (
-    identify_from_image_bytes,
-    parse_identify_response,
+    identify_photo,
     search_name,
     resolve_plant_name,
     wikidata_image_by_qid,
+    name_cache,
+    identify_cache,
 )
+from .imageprep import pick_photo_size
 from .care import care_and_intervals_for  # очікується у твоєму care.py
 
+log = logging.getLogger(__name__)
+
 # -------------------------
 #  STATE CONSTANTS (PTB v20)
 # -------------------------
@@ -48,8 +78,8 @@ ADD_CHOOSE, ADD_WAIT_PHOTO, ADD_WAIT_NAME, ADD_CONFIRM, ADD_PHOTO_EXIST, RENAME_
 # -------------------------
 #  UTILS
 # -------------------------
-def iso_today() -> str:
-    return date.today().isoformat()
+def iso_today(uid: int) -> str:
+    return today_for(uid).isoformat()
 
 def _base_care_text(name: str) -> str:
     return (
@@ -79,30 +109,96 @@ def _insert_plant_full(uid: int, name: str, care_text: str,
                        photo: Optional[bytes] = None) -> int:
     """
     Вставляє рослину у таблицю plants. Схема очікується така ж, як ми раніше використовували:
-    (id, user_id, name, care, photo, water_int, feed_int, mist_int, last_watered, last_fed, last_misted, ...)
-    Photo може бути None.
+    (id, user_id, name, care, photo_hash, water_int, feed_int, mist_int, last_watered, last_fed, last_misted, ...)
+    Photo може бути None; байти фото йдуть у сховище photos.
     """
-    c = conn()
-    cur = c.cursor()
-    cur.execute(
-        """INSERT INTO plants(user_id, name, care, photo, water_int, feed_int, mist_int, last_watered, last_fed, last_misted)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (uid, name, care_text, photo, wi, fi, mi, iso_today(), iso_today(), iso_today())
-    )
-    plant_id = cur.lastrowid
-    c.commit()
-    c.close()
-    return plant_id
+    with tx() as c:
+        h = put_photo(c, photo) if photo else None
+        cur = c.execute(
+            """INSERT INTO plants(user_id, name, care, photo_hash, water_int, feed_int, mist_int, last_watered, last_fed, last_misted)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (uid, name, care_text, h, wi, fi, mi, iso_today(uid), iso_today(uid), iso_today(uid))
+        )
+        touch_schedule(c, uid, cur.lastrowid)
+    return cur.lastrowid
+
+def _plant_row(uid: int, pid: int, cols: str = "name"):
+    return conn().execute(f"SELECT {cols} FROM plants WHERE id=? AND user_id=?", (pid, uid)).fetchone()
+
+def _delete_plant(uid: int, pid: int):
+    with tx() as c:
+        c.execute("DELETE FROM plants WHERE id=? AND user_id=?", (pid, uid))
+        c.execute("DELETE FROM tasks WHERE plant_id=? AND user_id=?", (pid, uid))
+        forget_plant(c, uid, pid)
+        touch_schedule(c, uid, pid)
+
+def _rename_plant(uid: int, pid: int, name: str, care_text: str, wi: int, fi: int, mi: int):
+    with tx() as c:
+        c.execute(
+            """UPDATE plants SET name=?, care=?, water_int=?, feed_int=?, mist_int=?
+               WHERE id=? AND user_id=?""",
+            (name, care_text, wi, fi, mi, pid, uid)
+        )
+        touch_schedule(c, uid, pid)
+
+def _set_tz(uid: int, name: str):
+    with tx() as c:
+        tz = set_user_tz(uid, name)
+        if tz is not None:
+            touch_schedule(c, uid)  # "сьогодні" могло зсунутись — перегенеровуємо
+    return tz
 
 # -------------------------
 #  /start
 # -------------------------
 async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     uid = update.effective_user.id
-    migrate_legacy_rows_to_user(uid)
-    ensure_week_tasks_for_user(uid)
+    if migrations.legacy_waiting() and await aiodb.write(migrations.claim_legacy_rows, uid):
+        invalidate_plant_pages(uid)
+    await aiodb.write(ensure_week_tasks_for_user, uid)
     await update.message.reply_text("Привіт! Я бот догляду за рослинами 🌱", reply_markup=main_kb())
 
+# -------------------------
+#  /stats — регулярність догляду
+# -------------------------
+async def cmd_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    text = await aiodb.read(stats_text, update.effective_user.id)
+    await update.message.reply_text(text, reply_markup=main_kb())
+
+# -------------------------
+#  /calendar — розклад у форматі .ics
+# -------------------------
+async def cmd_calendar(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    uid = update.effective_user.id
+    # потік шматків → тимчасовий файл (великий календар іде на диск, а не в пам'ять)
+    buf = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+    async for chunk in ics.stream(uid):
+        buf.write(chunk)
+    buf.seek(0)
+    caption = f"Розклад догляду на {ICS_DAYS} днів — відкрий файл, щоб додати в календар 📆"
+    if CALENDAR_PUBLIC_URL:
+        caption += f"\nАбо підпишись (оновлюється сам): {CALENDAR_PUBLIC_URL}{ics.feed_path(uid)}"
+    try:
+        await update.message.reply_document(document=buf, filename="plants.ics", caption=caption,
+                                            reply_markup=main_kb())
+    finally:
+        buf.close()
+
+# -------------------------
+#  /tz — часова зона користувача
+# -------------------------
+async def cmd_tz(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    uid = update.effective_user.id
+    if not context.args:
+        await update.message.reply_text(
+            f"Твоя часова зона: {(await aiodb.read(user_tz, uid)).key}.\nЩоб змінити: /tz Europe/Warsaw")
+        return
+    tz = await aiodb.write(_set_tz, uid, context.args[0])
+    if tz is None:
+        await update.message.reply_text("Не знаю такої часової зони 🤔 Приклад: /tz Europe/Kyiv")
+        return
+    await update.message.reply_text(f"Часову зону оновлено: {tz.key} ✅", reply_markup=main_kb())
+
 # -------------------------
 #  ROUTER FOR INLINE BTNS
 # -------------------------
@@ -114,42 +210,62 @@ async def router(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # План на сьогодні
     if data == "today_plan":
-        ensure_week_tasks_for_user(uid)
-        text, kb_rows = today_tasks_markup_and_text(uid, per_task_buttons)
-        kb = InlineKeyboardMarkup(kb_rows) if kb_rows else None
+        await aiodb.write(ensure_week_tasks_for_user, uid)
+        text, kb = await _today_view(uid)
         await q.message.reply_text(text, reply_markup=kb or main_kb())
         return
 
-    # План на тиждень
+    # Розклад на тиждень (проекція — без матеріалізації задач)
     if data == "week_plan":
-        ensure_week_tasks_for_user(uid)
-        await q.message.reply_text(week_overview_text(uid), reply_markup=main_kb())
+        await q.message.reply_text(await aiodb.read(overview_text, uid, WEEK), reply_markup=horizon_kb(WEEK))
+        return
+
+    # Перемикач горизонту: plan:<днів>
+    if data.startswith("plan:"):
+        days = int(data.split(":")[1])
+        if days not in (WEEK, MONTH, SEASON):
+            return
+        text = await aiodb.read(overview_text, uid, days)
+        try:
+            await q.edit_message_text(text, reply_markup=horizon_kb(days))
+        except BadRequest as e:
+            if "not modified" not in str(e).lower():
+                raise
         return
 
-    # Список рослин
+    # Список рослин (посторінково)
     if data == "my_plants":
-        c = conn()
-        rows = c.execute("SELECT id, name FROM plants WHERE user_id=? ORDER BY name", (uid,)).fetchall()
-        c.close()
-        if not rows:
+        page = await plants_page(uid)
+        if not page.rows:
             await q.message.reply_text("У тебе поки немає рослин. Додай першу 🌱", reply_markup=main_kb())
             return
-        await q.message.reply_text("Твої рослини:", reply_markup=plants_list_kb(rows))
+        await q.message.reply_text("Твої рослини:", reply_markup=plants_list_kb(page, "v"))
+        return
+
+    # Гортання списку: pl:<v|d>:<f|n|p|j|a>:<id або літера>
+    if data.startswith("pl:"):
+        _, mode, op, arg = data.split(":", 3)
+        if op == "a":
+            await q.edit_message_reply_markup(reply_markup=letters_kb(await first_letters(uid), mode))
+            return
+        page = await plants_page(uid, op, arg)
+        if not page.rows:
+            await q.message.reply_text("Список порожній.", reply_markup=main_kb())
+            return
+        await q.edit_message_reply_markup(reply_markup=plants_list_kb(page, mode))
         return
 
     # Картка рослини
     if data.startswith("plant_"):
         pid = int(data.split("_")[1])
-        c = conn()
-        row = c.execute("SELECT name, care, photo FROM plants WHERE id=? AND user_id=?", (pid, uid)).fetchone()
-        c.close()
+        row = await aiodb.read(_plant_row, uid, pid, "name, care, photo_hash")
         if not row:
             await q.message.reply_text("Не знайшов цю рослину 🤔", reply_markup=main_kb())
             return
-        name, care, photo = row
+        name, care, photo_h = row
         caption = f"*{name}*\n{care}"
-        if photo:
-            await q.message.reply_photo(photo=photo, caption=caption, parse_mode="Markdown", reply_markup=plant_card_kb(pid))
+        if photo_h:
+            await reply_plant_photo(q.message, photo_h, caption=caption, parse_mode="Markdown", reply_markup=plant_card_kb(pid))
         else:
             await q.message.reply_text(caption, parse_mode="Markdown", reply_markup=plant_card_kb(pid))
         return
@@ -157,9 +273,7 @@ async def router(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Показати догляд (перерахунок)
     if data.startswith("care_"):
         pid = int(data.split("_")[1])
-        c = conn()
-        row = c.execute("SELECT name FROM plants WHERE id=? AND user_id=?", (pid, uid)).fetchone()
-        c.close()
+        row = await aiodb.read(_plant_row, uid, pid)
         if not row:
             await q.message.reply_text("Не знайшов.", reply_markup=main_kb())
             return
@@ -174,48 +288,36 @@ async def router(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await q.message.reply_text("Введи нову назву для цієї рослини одним повідомленням:")
         return RENAME_WAIT
 
-    # Видалення (меню)
+    # Видалення (меню, посторінково)
     if data == "delete_plant":
-        c = conn()
-        rows = c.execute("SELECT id, name FROM plants WHERE user_id=? ORDER BY name", (uid,)).fetchall()
-        c.close()
-        if not rows:
+        page = await plants_page(uid)
+        if not page.rows:
             await q.message.reply_text("Список порожній.", reply_markup=main_kb())
             return
-        buttons = [[InlineKeyboardButton(f"🗑 {nm}", callback_data=f"del_{pid}")] for pid, nm in rows]
-        buttons.append([InlineKeyboardButton("⬅️ Назад", callback_data="back_home")])
-        await q.message.reply_text("Оберіть рослину для видалення:", reply_markup=InlineKeyboardMarkup(buttons))
+        await q.message.reply_text("Оберіть рослину для видалення:", reply_markup=plants_list_kb(page, "d"))
         return
 
     # Видалити конкретну
     if data.startswith("del_"):
         pid = int(data.split("_")[1])
-        c = conn()
-        c.execute("DELETE FROM plants WHERE id=? AND user_id=?", (pid, uid))
-        c.execute("DELETE FROM tasks WHERE plant_id=? AND user_id=?", (pid, uid))
-        c.commit()
-        c.close()
+        await aiodb.write(_delete_plant, uid, pid)
+        invalidate_plant_pages(uid)
         await q.message.reply_text("Видалив ✅", reply_markup=main_kb())
         return
 
     # Оновити фото за назвою (Wikidata P18)
     if data.startswith("plantidphoto_"):
         pid = int(data.split("_")[1])
-        c = conn()
-        row = c.execute("SELECT name FROM plants WHERE id=? AND user_id=?", (pid, uid)).fetchone()
-        c.close()
+        row = await aiodb.read(_plant_row, uid, pid)
         if not row:
             await q.message.reply_text("Не знайшов.", reply_markup=main_kb())
             return
-        r = resolve_plant_name(row[0])
-        img = wikidata_image_by_qid(r["qid"]) if r.get("qid") else None
+        r = await resolve_plant_name(row[0])
+        img = await wikidata_image_by_qid(r["qid"]) if r.get("qid") else None
         if not img:
             await q.message.reply_text("Не вийшло знайти фото за цією назвою. Спробуй уточнити назву або додай фото вручну.")
             return
-        c = conn()
-        c.execute("UPDATE plants SET photo=? WHERE id=? AND user_id=?", (img, pid, uid))
-        c.commit()
-        c.close()
+        await aiodb.write(set_plant_photo, uid, pid, img)
         await q.message.reply_text("Фото оновив за назвою ✅", reply_markup=plant_card_kb(pid))
         return
 
@@ -223,16 +325,9 @@ async def router(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if any(data.startswith(p) for p in ["done_water_", "done_feed_", "done_mist_"]):
         pid = int(data.split("_")[2])
         kind = 'water' if "water" in data else ('feed' if "feed" in data else 'mist')
-        c = conn()
-        c.execute(
-            """INSERT INTO tasks(user_id, plant_id, kind, due_date, status, created_at)
-               VALUES(?,?,?,?,?,?)""",
-            (uid, pid, kind, iso_today(), 'due', iso_today())
-        )
-        tid = c.execute("SELECT last_insert_rowid()").fetchone()[0]
-        c.commit()
-        c.close()
-        mark_task_done(tid)
+        if not await aiodb.write(record_care_event, uid, pid, kind):
+            await q.message.reply_text("Рослину не знайдено.", reply_markup=main_kb())
+            return
         await q.message.reply_text("Записав ✅", reply_markup=plant_card_kb(pid))
         return
 
@@ -260,26 +355,17 @@ async def on_rename_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return RENAME_WAIT
 
     # Вирішуємо канонічну назву і оновлюємо догляд/інтервали
-    r = resolve_plant_name(new_raw)
+    r = await resolve_plant_name(new_raw)
     canonical = r.get("canonical") or new_raw
     care_text, wi, fi, mi = _care_for_with_intervals(canonical)
 
-    c = conn()
-    c.execute(
-        """UPDATE plants SET name=?, care=?, water_int=?, feed_int=?, mist_int=?
-           WHERE id=? AND user_id=?""",
-        (new_raw, care_text, wi, fi, mi, pid, uid)
-    )
-    c.commit()
-    c.close()
+    await aiodb.write(_rename_plant, uid, pid, new_raw, care_text, wi, fi, mi)
+    invalidate_plant_pages(uid)
 
     # Спроба підтягти фото (якщо є QID)
-    img = wikidata_image_by_qid(r.get("qid")) if r.get("qid") else None
+    img = await wikidata_image_by_qid(r.get("qid")) if r.get("qid") else None
     if img:
-        c = conn()
-        c.execute("UPDATE plants SET photo=? WHERE id=? AND user_id=?", (img, pid, uid))
-        c.commit()
-        c.close()
+        await aiodb.write(set_plant_photo, uid, pid, img)
 
     await update.message.reply_text(
         f"Оновив назву на «{new_raw}». Розпізнав як: {canonical} ({r.get('source','')}). Догляд оновлено.",
@@ -325,17 +411,14 @@ async def add_receive_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Треба саме фото 🌿")
         return ADD_WAIT_PHOTO
 
-    tg_file = await update.message.photo[-1].get_file()
-    img_bytes = await tg_file.download_as_bytearray()
-    img_bytes = bytes(img_bytes)
-
+    # найменший розмір, якого достатньо для розпізнавання, а не photo[-1];
+    # повторне фото береться з кешу без завантаження
     try:
-        resp = identify_from_image_bytes(img_bytes)
+        is_plant, conf, name, extra = await identify_photo(pick_photo_size(update.message.photo))
     except Exception as e:
         await update.message.reply_text(f"Помилка розпізнавання: {e}")
         return ADD_WAIT_PHOTO
 
-    is_plant, conf, name, extra = parse_identify_response(resp)
     if not is_plant or not name:
         await update.message.reply_text("Схоже, на фото не рослина або не вдалося впізнати. Спробуй інше фото.")
         return ADD_WAIT_PHOTO
@@ -358,7 +441,7 @@ async def add_receive_name(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Введи щось схоже на назву рослини 🙂")
         return ADD_WAIT_NAME
 
-    ok, conf, name, extra = search_name(query)
+    ok, conf, name, extra = await search_name(query)
     if not ok or not name:
         await update.message.reply_text("Не знайшов такої рослини. Спробуй іншу назву або додай за фото.")
         return ADD_WAIT_NAME
@@ -385,9 +468,10 @@ async def add_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     uid = q.from_user.id
     care_text, wi, fi, mi = _care_for_with_intervals(name)
-    plant_id = _insert_plant_full(uid, name, care_text, wi, fi, mi, photo=None)
+    plant_id = await aiodb.write(_insert_plant_full, uid, name, care_text, wi, fi, mi, photo=None)
+    invalidate_plant_pages(uid)
 
-    ensure_week_tasks_for_user(uid)
+    await aiodb.write(ensure_week_tasks_for_user, uid)
     await q.edit_message_text(f"Додав **{name}** ✅ (id: {plant_id}). Розклад оновлено.")
     context.user_data.pop("pending_plant", None)
     return ConversationHandler.END
@@ -412,13 +496,12 @@ async def on_add_photo_exist(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await update.message.reply_text("Не вибрано рослину для оновлення фото.")
         return ConversationHandler.END
 
-    tgfile = await update.message.photo[-1].get_file()
+    size = update.message.photo[-1]
+    tgfile = await size.get_file()
     img_bytes = await tgfile.download_as_bytearray()
 
-    c = conn()
-    c.execute("UPDATE plants SET photo=? WHERE id=? AND user_id=?", (bytes(img_bytes), pid, uid))
-    c.commit()
-    c.close()
+    # file_id щойно отриманого фото одразу придатний для повторної відправки
+    await aiodb.write(set_plant_photo, uid, pid, bytes(img_bytes), file_id=size.file_id)
     await update.message.reply_text("Фото оновив ✅", reply_markup=main_kb())
     return ConversationHandler.END
 
@@ -434,33 +517,178 @@ async def on_task_action(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await q.answer("Помилка callback")
         return
 
+    uid = update.effective_user.id
+    missing = "Задачу вже закрито або не знайдено"
     if action == "done":
-        mark_task_done(tid)
-        await q.answer("Готово ✅")
+        ok = await aiodb.write(record_care_event, uid, task_id=tid)
+        await q.answer("Готово ✅" if ok else missing)
     elif action == "defer":
-        move_task_to_next_care_day(tid)
-        await q.answer("Перенесено ⏩")
+        ok = await aiodb.write(move_task_to_next_care_day, uid, tid)
+        await q.answer("Перенесено ⏩" if ok else missing)
     elif action == "skip":
-        mark_task_skipped(tid)
-        await q.answer("Пропущено 🚫")
+        ok = await aiodb.write(mark_task_skipped, uid, tid)
+        await q.answer("Пропущено 🚫" if ok else missing)
+
+    _schedule_today_render(context, q.message, uid)
 
+async def on_bulk_action(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """bulk:<done|defer>:<water|feed|mist|all> — одна транзакція на всі задачі дня."""
+    q = update.callback_query
+    _, action, kind = q.data.split(":")
     uid = update.effective_user.id
-    text, kb_rows = today_tasks_markup_and_text(uid, per_task_buttons)
-    kb = InlineKeyboardMarkup(kb_rows) if kb_rows else None
-    # edit_text може впасти, якщо стара розмітка не співпала — тоді просто надішлемо нове
+    kind = None if kind == "all" else kind
+    if action == "done":
+        n = await aiodb.write(mark_today_done, uid, kind)
+        await q.answer(f"Готово ✅ ({n})" if n else "Нічого не змінилось")
+    else:
+        n = await aiodb.write(defer_today, uid, kind)
+        await q.answer(f"Перенесено ⏩ ({n})" if n else "Нічого не змінилось")
+    if n:
+        _schedule_today_render(context, q.message, uid)
+
+async def _today_view(uid: int):
+    text, kb_rows = await aiodb.read(today_tasks_markup_and_text, uid, per_task_buttons)
+    if not kb_rows:
+        return text, None
+    if len(kb_rows) > 1:
+        kb_rows += today_bulk_buttons()
+    return text, InlineKeyboardMarkup(kb_rows)
+
+# Перемальовування плану зливається: серія натискань за TODAY_RENDER_DEBOUNCE
+# дає одне редагування повідомлення (ліміти Telegram на edit).
+_pending_renders: Dict[Tuple[int, int], asyncio.Task] = {}
+
+def _schedule_today_render(context: ContextTypes.DEFAULT_TYPE, message, uid: int):
+    key = (message.chat_id, message.message_id)
+    if key in _pending_renders:
+        return
+    _pending_renders[key] = context.application.create_task(_render_today_later(key, message, uid))
+
+async def _render_today_later(key, message, uid: int):
+    try:
+        await asyncio.sleep(TODAY_RENDER_DEBOUNCE)
+    finally:
+        # натискання під час самого редагування заплановують ще одне
+        _pending_renders.pop(key, None)
+    text, kb = await _today_view(uid)
+    try:
+        await message.edit_text(text, reply_markup=kb)
+    except BadRequest as e:
+        if "not modified" in str(e).lower():
+            return
+        # стара розмітка не співпала / повідомлення зникло — надішлемо нове
+        await message.reply_text(text, reply_markup=kb)
+
+# -------------------------
+#  SERVICE HTTP (/healthz)
+# -------------------------
+async def _healthz(req):
     try:
-        await q.message.edit_text(text, reply_markup=kb or None)
+        await aiodb.read(lambda: conn().execute("SELECT 1").fetchone())
+        db_ok = True
     except Exception:
-        await q.message.reply_text(text, reply_markup=kb or None)
+        db_ok = False
+    body = {"status": "ok" if db_ok else "degraded", "db": db_ok,
+            "mode": "webhook" if WEBHOOK_URL else "polling"}
+    return json_response(body, status=200 if db_ok else 503)
+
+async def _calendar(req):
+    """GET /calendar/<uid>/<token>.ics — підписка на календар; If-None-Match → 304."""
+    uid = ics.parse_feed_path(req.path)
+    if uid is None:
+        return 404, {}, b"not found"
+    tag = await aiodb.read(ics.etag, uid)
+    headers = {"ETag": tag, "Cache-Control": "private, max-age=3600"}
+    if ics.etag_matches(req.headers.get("if-none-match"), tag):
+        return 304, headers, b""
+    headers["Content-Type"] = "text/calendar; charset=utf-8"
+    return 200, headers, ics.stream(uid)
+
+def _admin(handler):
+    """Службовий ендпоінт: лише із заголовком X-Admin-Token = ADMIN_TOKEN, інакше 403."""
+    async def wrapped(req):
+        if not hmac.compare_digest(req.headers.get("x-admin-token", "").encode(), ADMIN_TOKEN.encode()):
+            return 403, {}, b"forbidden"
+        return await handler(req)
+    return wrapped
+
+async def _dbstats(req):
+    stats = await asyncio.to_thread(db_stats)
+    return json_response({"db": stats, "retention": last_run(),
+                          "migrations": await aiodb.read(migrations.status)})
+
+async def _metrics(req):
+    return text_response(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+async def _profiler(req):
+    """
+    GET — зібрані стеки (collapsed, для flamegraph);
+    POST ?action=start&hz=100&seconds=30 | ?action=stop — керування вибірковим профайлером.
+    hz і seconds обмежені (metrics.MAX_*); доступ — див. _admin.
+    """
+    s = metrics.sampler
+    if req.method == "POST":
+        if req.query.get("action") == "stop":
+            await asyncio.to_thread(s.stop)
+        else:
+            try:
+                hz, seconds = float(req.query.get("hz", 100)), float(req.query.get("seconds", 30))
+            except ValueError:
+                return 400, {}, b"bad hz/seconds"
+            if not (math.isfinite(hz) and math.isfinite(seconds)):
+                return 400, {}, b"bad hz/seconds"
+            s.start(hz=hz, seconds=seconds)
+        return json_response({"running": s.running, "samples": s.samples})
+    return text_response(s.collapsed())
+
+async def _metrics_log_job(context):
+    log.info("metrics: %s", metrics.summary())
+
+async def _on_startup(app: Application):
+    if SERVICE_PORT:
+        web = app.bot_data["service_http"] = WebServer()
+        web.route("GET", "/healthz", _healthz)
+        web.route("GET", "/calendar/", _calendar)
+        if METRICS_ENABLED:
+            web.route("GET", "/metrics", _metrics)
+        if ADMIN_TOKEN:
+            web.route("GET", "/dbstats", _admin(_dbstats))
+            web.route("GET", "/profiler", _admin(_profiler))
+            web.route("POST", "/profiler", _admin(_profiler))
+        await web.start("0.0.0.0", SERVICE_PORT)
+
+async def _on_shutdown(app: Application):
+    log.info("name_search cache: %s", name_cache.stats())
+    log.info("identify cache: %s", identify_cache.stats())
+    log.info("db executor: %s", aiodb.stats())
+    web = app.bot_data.pop("service_http", None)
+    if web:
+        await web.stop()
+    await net.aclose()
+    await asyncio.to_thread(aiodb.shutdown)  # після flush персистентності — дописати чергу запису
 
 # -------------------------
 #  BUILD APP
 # -------------------------
 def build_app() -> Application:
-    app = ApplicationBuilder().token(TOKEN).build()
+    bootstrap()  # конфіг, схема, перенесення даних — один раз на процес
+    builder = (ApplicationBuilder().token(TOKEN)
+               .persistence(SQLitePersistence(update_interval=PERSISTENCE_FLUSH_INTERVAL))
+               .post_init(_on_startup).post_shutdown(_on_shutdown))
+    if TELEGRAM_API_URL:
+        builder = builder.base_url(f"{TELEGRAM_API_URL}/bot").base_file_url(f"{TELEGRAM_API_URL}/file/bot")
+    if CONCURRENT_UPDATES > 1:
+        builder = builder.concurrent_updates(CONCURRENT_UPDATES)
+    timed_request = metrics.telegram_request(connection_pool_size=256)
+    if timed_request is not None:
+        builder = builder.request(timed_request)
+    app = builder.build()
 
     # Команди
     app.add_handler(CommandHandler("start", cmd_start))
+    app.add_handler(CommandHandler("tz", cmd_tz))
+    app.add_handler(CommandHandler("stats", cmd_stats))
+    app.add_handler(CommandHandler("calendar", cmd_calendar))
 
     # Додавання рослин (конверсейшн із перевіркою)
     add_flow = ConversationHandler(
@@ -491,13 +719,25 @@ def build_app() -> Application:
         },
         fallbacks=[CallbackQueryHandler(add_cancel, pattern=r"^cancel_add$")],
         allow_reentry=True,
+        name="add_flow",
+        persistent=True,  # стани переживають рестарт (SQLitePersistence)
     )
     app.add_handler(add_flow)
 
     # Окремі callback-и
     app.add_handler(CallbackQueryHandler(on_task_action, pattern=r"^task:\d+:(done|defer|skip)$"))
+    app.add_handler(CallbackQueryHandler(on_bulk_action, pattern=r"^bulk:(done|defer):(water|feed|mist|all)$"))
 
     # Catch-all роутер (повинен бути останнім)
     app.add_handler(CallbackQueryHandler(router))
 
+    # Нагадування у дні догляду
+    schedule_reminders(app.job_queue)
+    schedule_retention(app.job_queue)
+    migrations.schedule_backfills(app.job_queue)
+    if METRICS_LOG_INTERVAL and app.job_queue is not None:
+        app.job_queue.run_repeating(_metrics_log_job, interval=METRICS_LOG_INTERVAL, name="metrics-log")
+
+    # таймінг усіх обробників (no-op, якщо метрики вимкнені)
+    metrics.instrument_handlers(app)
     return app
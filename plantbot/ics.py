@@ -0,0 +1,136 @@
+# plantbot/ics.py
+# Експорт розкладу догляду в iCalendar (RFC 5545): виконане за останні
+# ICS_HISTORY_DAYS — з таблиці tasks, майбутнє на ICS_DAYS — з проекції
+# (projection.py, інтервали й last_* у plants). Одна подія на день і вид
+# догляду, назви рослин — в описі.
+# Файл не збирається в пам'яті: рядки генеруються ліниво, складаються у
+# шматки по CHUNK байт і віддаються потоком (chunked у web.py); пам'ять
+# залежить від кількості рослин, а не від горизонту.
+# ETag — від версії розкладу (schedule_state), "сьогодні" і відкритих задач,
+# тож незмінений календар на повторне опитування віддає 304 без генерації.
+from __future__ import annotations
+import asyncio
+import hashlib
+import hmac
+import re
+from datetime import date, datetime, timedelta, timezone
+from itertools import groupby
+from typing import AsyncIterator, Iterator, List, Optional
+
+from .config import ICS_DAYS, ICS_HISTORY_DAYS, WEBHOOK_SECRET
+from .db import conn
+from .projection import KIND_NAMES, KIND_ICONS, user_events
+from .schedule import KINDS, today
+from . import aiodb
+
+CHUNK = 64 * 1024
+_FEED = re.compile(r"^/calendar/(\d+)/([0-9a-f]+)\.ics$")
+
+# ---------- посилання-підписка ----------
+def feed_token(user_id: int) -> str:
+    return hmac.new(WEBHOOK_SECRET.encode(), f"ics:{user_id}".encode(), hashlib.sha256).hexdigest()[:24]
+
+def feed_path(user_id: int) -> str:
+    return f"/calendar/{user_id}/{feed_token(user_id)}.ics"
+
+def parse_feed_path(path: str) -> Optional[int]:
+    """user_id з /calendar/<uid>/<token>.ics або None, якщо токен не збігся."""
+    m = _FEED.match(path)
+    if not m or not hmac.compare_digest(m.group(2), feed_token(int(m.group(1)))):
+        return None
+    return int(m.group(1))
+
+# ---------- ETag ----------
+def etag(user_id: int, days: int = ICS_DAYS) -> str:
+    """Змінюється разом із розкладом: версія (рослини/відмітки), день і відкриті задачі (перенесення, пропуски)."""
+    t_iso = today(user_id).isoformat()
+    row = conn().execute("SELECT version FROM schedule_state WHERE user_id=?", (user_id,)).fetchone()
+    n, max_id = conn().execute("""SELECT COUNT(*), MAX(id) FROM tasks
+                                  WHERE user_id=? AND status='due' AND due_date>=?""", (user_id, t_iso)).fetchone()
+    raw = f"{user_id}:{row[0] if row else 0}:{t_iso}:{n}:{max_id}:{days}:{ICS_HISTORY_DAYS}"
+    return '"' + hashlib.sha1(raw.encode()).hexdigest()[:20] + '"'
+
+def etag_matches(header: Optional[str], tag: str) -> bool:
+    if not header:
+        return False
+    return any(v.strip().removeprefix("W/") in (tag, "*") for v in header.split(","))
+
+# ---------- генерація ----------
+def _esc(s: str) -> str:
+    return s.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+def _fold(line: str) -> bytes:
+    """Рядки ≤ 75 октетів, продовження з пробілу; UTF-8 символ не розрізаємо."""
+    b = line.encode()
+    if len(b) <= 75:
+        return b + b"\r\n"
+    parts, start, limit = [], 0, 75
+    while start < len(b):
+        end = min(start + limit, len(b))
+        while end < len(b) and (b[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(b[start:end])
+        start, limit = end, 74
+    return b"\r\n ".join(parts) + b"\r\n"
+
+def _vevent(user_id: int, day, kind: str, names: List[str], stamp: str, done: bool = False) -> Iterator[str]:
+    names = sorted(names)
+    mark = "✅ " if done else KIND_ICONS[kind] + " "
+    d = day.strftime("%Y%m%d")
+    yield "BEGIN:VEVENT"
+    yield f"UID:{user_id}-{d}-{kind}@plantbot"
+    yield f"DTSTAMP:{stamp}"
+    yield f"DTSTART;VALUE=DATE:{d}"
+    yield f"DTEND;VALUE=DATE:{(day + timedelta(days=1)).strftime('%Y%m%d')}"
+    yield f"SUMMARY:{_esc(f'{mark}{KIND_NAMES[kind]} ({len(names)})')}"
+    yield f"DESCRIPTION:{_esc(chr(10).join(names))}"
+    yield "TRANSP:TRANSPARENT"
+    yield "END:VEVENT"
+
+def iter_ics(user_id: int, history, events, stamp: str) -> Iterator[str]:
+    """history: (date, kind, name) виконаного за датою; events: projection.Event за датою."""
+    yield from ("BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//plantbot//care schedule//UK",
+                "CALSCALE:GREGORIAN", "METHOD:PUBLISH", "X-WR-CALNAME:Догляд за рослинами 🌱")
+    for (day, kind), rows in groupby(history, key=lambda r: (r[0], r[1])):
+        yield from _vevent(user_id, day, kind, [r[2] for r in rows], stamp, done=True)
+    for day, evs in groupby(events, key=lambda e: e.day):
+        by_kind = {}
+        for e in evs:
+            by_kind.setdefault(e.kind, []).append(e.name)
+        for kind in KINDS:
+            if kind in by_kind:
+                yield from _vevent(user_id, day, kind, by_kind[kind], stamp)
+    yield "END:VCALENDAR"
+
+def _history(user_id: int, t: date):
+    rows = conn().execute("""
+        SELECT t.due_date, t.kind, p.name FROM tasks t JOIN plants p ON p.id=t.plant_id
+        WHERE t.user_id=? AND t.status='done' AND t.due_date>=? AND t.due_date<?
+        ORDER BY t.due_date, t.kind
+    """, (user_id, (t - timedelta(days=ICS_HISTORY_DAYS)).isoformat(), t.isoformat()))
+    return [(date.fromisoformat(d), k, n) for d, k, n in rows]
+
+def ics_lines(user_id: int, days: int = ICS_DAYS) -> Iterator[str]:
+    """Читає з БД (потік читання) і повертає генератор рядків, якому БД уже не потрібна."""
+    t = today(user_id)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return iter_ics(user_id, _history(user_id, t), user_events(user_id, days, t), stamp)
+
+def iter_chunks(lines: Iterator[str], size: int = CHUNK) -> Iterator[bytes]:
+    buf = bytearray()
+    for line in lines:
+        buf += _fold(line)
+        if len(buf) >= size:
+            yield bytes(buf)
+            buf.clear()
+    if buf:
+        yield bytes(buf)
+
+async def stream(user_id: int, days: int = ICS_DAYS) -> AsyncIterator[bytes]:
+    """Шматки .ics; генерація кожного — у потоці, щоб не гальмувати цикл подій."""
+    chunks = iter_chunks(await aiodb.read(ics_lines, user_id, days))
+    while True:
+        chunk = await asyncio.to_thread(next, chunks, None)
+        if chunk is None:
+            return
+        yield chunk
@@ -0,0 +1,87 @@
+# plantbot/imageprep.py
+# Підготовка фото перед Plant.id: вибір найменшого достатнього розміру
+# з тих, що вже зберігає Telegram, необов'язкове зменшення/перекодування
+# (якщо встановлено Pillow) і потокове base64-кодування JSON-тіла запиту,
+# щоб не тримати в пам'яті ще дві копії зображення.
+from __future__ import annotations
+import base64
+import hashlib
+import io
+import json
+import logging
+from typing import AsyncIterator, Sequence, Tuple
+
+from .config import IDENTIFY_MIN_SIDE, IDENTIFY_MAX_SIDE, IDENTIFY_JPEG_QUALITY
+
+log = logging.getLogger(__name__)
+
+B64_CHUNK = 3 * 16 * 1024  # кратне 3, щоб base64 шматків склеювався без паддінгу
+
+_Image = None  # Pillow — необов'язкова і важка залежність: імпортуємо при першому зменшенні
+
+def _pil():
+    global _Image
+    if _Image is None:
+        try:
+            from PIL import Image
+        except ImportError:  # pragma: no cover
+            Image = False
+        _Image = Image
+    return _Image
+
+def pick_photo_size(sizes: Sequence, min_side: int = IDENTIFY_MIN_SIDE):
+    """
+    Найменший PhotoSize, у якого довша сторона ≥ min_side;
+    якщо таких немає — найбільший доступний.
+    """
+    ordered = sorted(sizes, key=lambda s: s.width * s.height)
+    for s in ordered:
+        if max(s.width, s.height) >= min_side:
+            return s
+    return ordered[-1]
+
+def image_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def downscale(data: bytes, max_side: int = IDENTIFY_MAX_SIDE, quality: int = IDENTIFY_JPEG_QUALITY) -> bytes:
+    """
+    Зменшує до max_side по довшій стороні і перекодовує в JPEG.
+    Без Pillow, для непідтримуваних форматів або якщо результат не менший — повертає як є.
+    """
+    Image = _pil()
+    if not Image:
+        return data
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            if max(im.size) > max_side:
+                im.thumbnail((max_side, max_side))
+            elif im.format == "JPEG":
+                return data
+            out = io.BytesIO()
+            im.convert("RGB").save(out, "JPEG", quality=quality, optimize=True)
+    except Exception as e:
+        log.debug("downscale skipped: %r", e)
+        return data
+    small = out.getvalue()
+    return small if len(small) < len(data) else data
+
+def _b64_len(n: int) -> int:
+    return 4 * ((n + 2) // 3)
+
+def identify_body(img: bytes, details: Sequence[str]) -> Tuple[int, AsyncIterator[bytes]]:
+    """
+    JSON {"images": ["<base64>"], "plant_details": [...]} як потік шматків.
+    Повертає (довжина тіла, async-ітератор) — довжина відома наперед,
+    тож запит іде з Content-Length, без chunked.
+    """
+    head = b'{"images":["'
+    tail = b'"],"plant_details":' + json.dumps(list(details)).encode() + b"}"
+    length = len(head) + _b64_len(len(img)) + len(tail)
+    view = memoryview(img)
+
+    async def chunks():
+        yield head
+        for i in range(0, len(view), B64_CHUNK):
+            yield base64.b64encode(view[i:i + B64_CHUNK])
+        yield tail
+    return length, chunks()
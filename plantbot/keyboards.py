@@ -10,11 +10,37 @@ def main_kb():
          InlineKeyboardButton("🗑 Видалити", callback_data="delete_plant")],
     ])
 
-def plants_list_kb(rows):
-    btns = [[InlineKeyboardButton(name, callback_data=f"plant_{pid}")] for (pid, name) in rows]
+def horizon_kb(days: int):
+    """Перемикач тиждень / місяць / сезон під розкладом (plan:<днів>)."""
+    opts = ((7, "📅 Тиждень"), (30, "🗓 Місяць"), (91, "🍂 Сезон"))
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton(("• " if d == days else "") + label, callback_data=f"plan:{d}") for d, label in opts],
+        [InlineKeyboardButton("⬅️ Назад", callback_data="back_home")],
+    ])
+
+def plants_list_kb(page, mode: str = "v"):
+    """Сторінка списку: mode 'v' — перегляд карток, 'd' — видалення."""
+    if mode == "d":
+        btns = [[InlineKeyboardButton(f"🗑 {name}", callback_data=f"del_{pid}")] for (pid, name) in page.rows]
+    else:
+        btns = [[InlineKeyboardButton(name, callback_data=f"plant_{pid}")] for (pid, name) in page.rows]
+    if page.has_prev or page.has_next:
+        nav = []
+        if page.has_prev:
+            nav.append(InlineKeyboardButton("◀️", callback_data=f"pl:{mode}:p:{page.rows[0][0]}"))
+        nav.append(InlineKeyboardButton("🔤 А–Я", callback_data=f"pl:{mode}:a:"))
+        if page.has_next:
+            nav.append(InlineKeyboardButton("▶️", callback_data=f"pl:{mode}:n:{page.rows[-1][0]}"))
+        btns.append(nav)
     btns.append([InlineKeyboardButton("⬅️ Назад", callback_data="back_home")])
     return InlineKeyboardMarkup(btns)
 
+def letters_kb(letters, mode: str = "v", per_row: int = 6):
+    btns = [[InlineKeyboardButton(l, callback_data=f"pl:{mode}:j:{l}") for l in letters[i:i + per_row]]
+            for i in range(0, len(letters), per_row)]
+    btns.append([InlineKeyboardButton("⬅️ До списку", callback_data=f"pl:{mode}:f:")])
+    return InlineKeyboardMarkup(btns)
+
 def plant_card_kb(pid:int):
     return InlineKeyboardMarkup([
         [InlineKeyboardButton("📋 Догляд", callback_data=f"care_{pid}")],
@@ -33,3 +59,11 @@ def per_task_buttons(task_id: int, plant_name: str):
         InlineKeyboardButton("⏩ Відкласти", callback_data=f"task:{task_id}:defer"),
         InlineKeyboardButton("🚫 Пропустити", callback_data=f"task:{task_id}:skip"),
     ]
+
+def today_bulk_buttons():
+    """Масові дії під планом на сьогодні."""
+    return [
+        [InlineKeyboardButton("💧 Все полито", callback_data="bulk:done:water"),
+         InlineKeyboardButton("✅ Усе зроблено", callback_data="bulk:done:all")],
+        [InlineKeyboardButton("⏩ Відкласти все", callback_data="bulk:defer:all")],
+    ]
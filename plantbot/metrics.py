@@ -0,0 +1,249 @@
+# plantbot/metrics.py
+# Інструментування гарячих шляхів: гістограми латентності обробників,
+# SQL-запитів (за "відбитком" інструкції), зовнішніх викликів і запитів
+# до Bot API; експорт у текстовому форматі Prometheus (/metrics) або в лог.
+# Коли METRICS_ENABLED вимкнено, timed() повертає функцію без обгортки,
+# а з'єднання SQLite створюються звичайні — накладних витрат немає.
+# Окремо — вибірковий профайлер (sampler.start/stop), вмикається вручну
+# і лише з ADMIN_TOKEN; частота й тривалість обмежені.
+from __future__ import annotations
+import functools
+import inspect
+import logging
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from .config import METRICS_ENABLED
+
+log = logging.getLogger(__name__)
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_hist: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], list] = {}   # → [лічильники бакетів..., count, sum]
+_counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+
+def observe(name: str, seconds: float, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        h = _hist.get(key)
+        if h is None:
+            h = _hist[key] = [0] * (len(BUCKETS) + 2)
+        for i, b in enumerate(BUCKETS):
+            if seconds <= b:
+                h[i] += 1
+                break
+        h[-2] += 1
+        h[-1] += seconds
+
+def inc(name: str, value: float = 1, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def _esc(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _fmt_labels(labels, le: Optional[str] = None) -> str:
+    parts = [f'{k}="{_esc(v)}"' for k, v in labels]
+    if le is not None:
+        parts.append(f'le="{le}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def render() -> str:
+    """Усі метрики у текстовому форматі Prometheus 0.0.4."""
+    with _lock:
+        hist = {k: list(v) for k, v in _hist.items()}
+        counters = dict(_counters)
+    out, seen = [], set()
+    for (name, labels), h in sorted(hist.items()):
+        if name not in seen:
+            seen.add(name); out.append(f"# TYPE {name} histogram")
+        acc = 0
+        for b, n in zip(BUCKETS, h):
+            acc += n
+            out.append(f"{name}_bucket{_fmt_labels(labels, str(b))} {acc}")
+        out.append(f"{name}_bucket{_fmt_labels(labels, '+Inf')} {h[-2]}")
+        out.append(f"{name}_count{_fmt_labels(labels)} {h[-2]}")
+        out.append(f"{name}_sum{_fmt_labels(labels)} {h[-1]:.6f}")
+    for (name, labels), v in sorted(counters.items()):
+        if name not in seen:
+            seen.add(name); out.append(f"# TYPE {name} counter")
+        out.append(f"{name}{_fmt_labels(labels)} {v:g}")
+    return "\n".join(out) + "\n"
+
+def summary(top: int = 15) -> str:
+    """Короткий дамп для логу: найдовші за сумарним часом серії."""
+    with _lock:
+        rows = sorted(((h[-1], h[-2], name, labels) for (name, labels), h in _hist.items()), reverse=True)[:top]
+    return "; ".join(f"{name}{dict(labels)} n={n} avg={total / n * 1000:.1f}ms"
+                     for total, n, name, labels in rows if n)
+
+# ---------- обгортки ----------
+def timed(name: str, **labels):
+    """Декоратор (sync/async): гістограма name + лічильник помилок name_errors_total."""
+    def deco(fn):
+        if not METRICS_ENABLED:
+            return fn
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*a, **kw):
+                t0 = time.perf_counter()
+                try:
+                    return await fn(*a, **kw)
+                except BaseException:
+                    inc(f"{name}_errors_total", **labels)
+                    raise
+                finally:
+                    observe(name, time.perf_counter() - t0, **labels)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*a, **kw):
+                t0 = time.perf_counter()
+                try:
+                    return fn(*a, **kw)
+                except BaseException:
+                    inc(f"{name}_errors_total", **labels)
+                    raise
+                finally:
+                    observe(name, time.perf_counter() - t0, **labels)
+        return wrapper
+    return deco
+
+def instrument_handlers(app):
+    """Обгортає callback кожного зареєстрованого обробника (і станів ConversationHandler)."""
+    if not METRICS_ENABLED:
+        return
+    from telegram.ext import ConversationHandler
+
+    def wrap(h):
+        if isinstance(h, ConversationHandler):
+            for sub in (*h.entry_points, *(x for hs in h.states.values() for x in hs), *h.fallbacks):
+                wrap(sub)
+            return
+        cb = getattr(h, "callback", None)
+        if cb is None or getattr(cb, "__wrapped__", None) is not None:
+            return
+        h.callback = timed("handler_seconds", handler=cb.__name__)(cb)
+
+    for group in app.handlers.values():
+        for h in group:
+            wrap(h)
+
+# ---------- SQLite ----------
+_COMMENT = re.compile(r"--[^\n]*")
+_WS = re.compile(r"\s+")
+_LIT = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+@functools.lru_cache(maxsize=512)
+def fingerprint(sql: str) -> str:
+    """Нормалізована інструкція: без літералів, списки IN (?,?,..) → (?...), ≤ 120 символів."""
+    s = _WS.sub(" ", _COMMENT.sub("", sql)).strip()
+    s = _LIT.sub("?", s)
+    s = _IN_LIST.sub("(?...)", s)
+    return s[:120]
+
+class TimedConnection(sqlite3.Connection):
+    """Connection-фабрика: час execute/executemany (перший крок запиту) за відбитком SQL."""
+    def execute(self, sql, *args):
+        t0 = time.perf_counter()
+        try:
+            return super().execute(sql, *args)
+        finally:
+            observe("db_query_seconds", time.perf_counter() - t0, stmt=fingerprint(sql))
+
+    def executemany(self, sql, *args):
+        t0 = time.perf_counter()
+        try:
+            return super().executemany(sql, *args)
+        finally:
+            observe("db_query_seconds", time.perf_counter() - t0, stmt=fingerprint(sql))
+
+    def commit(self):
+        t0 = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            observe("db_commit_seconds", time.perf_counter() - t0)
+
+def connection_factory() -> Optional[type]:
+    return TimedConnection if METRICS_ENABLED else None
+
+# ---------- Bot API ----------
+def telegram_request(**kw):
+    """HTTPXRequest з таймінгом кожного методу Bot API (або None, якщо метрики вимкнені)."""
+    if not METRICS_ENABLED:
+        return None
+    from telegram.request import HTTPXRequest
+
+    class TimedRequest(HTTPXRequest):
+        async def do_request(self, url, method, *a, **kw):
+            api = url.rsplit("/", 1)[-1]
+            t0 = time.perf_counter()
+            try:
+                return await super().do_request(url, method, *a, **kw)
+            except BaseException:
+                inc("telegram_api_errors_total", method=api)
+                raise
+            finally:
+                observe("telegram_api_seconds", time.perf_counter() - t0, method=api)
+
+    return TimedRequest(**kw)
+
+# ---------- вибірковий профайлер ----------
+MAX_HZ = 250.0        # частіше — профайлер сам стає гарячим шляхом
+MAX_SECONDS = 300.0   # сесія завершується сама, навіть якщо stop не прийде
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return min(max(value, low), high)
+
+class _Sampler:
+    """Раз на 1/hz сек знімає стек цільового потоку; стеки у форматі collapsed (flamegraph)."""
+    def __init__(self):
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, hz: float = 100.0, seconds: float = 30.0, thread_id: Optional[int] = None):
+        if self.running:
+            return
+        hz, seconds = _clamp(hz, 1.0, MAX_HZ), _clamp(seconds, 1.0, MAX_SECONDS)
+        target = thread_id or threading.main_thread().ident
+        self.stacks.clear(); self.samples = 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(target, 1.0 / hz, seconds),
+                                        name="sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self, target: int, interval: float, seconds: float):
+        deadline = time.monotonic() + seconds
+        while not self._stop.wait(interval) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self, top: int = 200) -> str:
+        return "\n".join(f"{s} {n}" for s, n in self.stacks.most_common(top)) + "\n"
+
+sampler = _Sampler()
@@ -0,0 +1,347 @@
+# plantbot/migrations.py
+# Версійовані міграції схеми. Таблиця schema_version зберігає кожен
+# застосований крок; нові кроки дописуються в кінець MIGRATIONS з
+# наступним номером і ніколи не змінюються після релізу.
+# Крок має дві частини:
+#   ddl      — зміна схеми, виконується на старті (bootstrap → init_db)
+#              однією транзакцією разом із записом у schema_version;
+#   backfill — перенесення даних порціями: одна порція = одна коротка
+#              транзакція (через записувач aiodb), позиція — у
+#              schema_version.cursor, тож після рестарту робота
+#              продовжується з місця зупинки, а бот увесь час обслуговує апдейти.
+# SQLite не вміє будувати індекс онлайн, тому CREATE INDEX лишається в ddl;
+# усе, що масштабується з кількістю рядків, має йти в backfill.
+# DDL кроків — літерали в цьому файлі, а не посилання на "поточну схему":
+# нова й оновлена БД на тій самій версії мають однакову схему.
+from __future__ import annotations
+import logging
+import sqlite3
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from .config import MIGRATION_BATCH, MIGRATION_BUDGET, MIGRATION_INTERVAL, LEGACY_OWNER_ID
+from .db import conn, tx
+from .photostore import put_photo
+from .schedule import touch_schedule
+from . import aiodb
+
+log = logging.getLogger(__name__)
+
+WAIT = object()   # backfill не може просунутись зараз (чекає на подію, напр. /start)
+PHOTO_BATCH = 50  # BLOB-ів за одну порцію
+
+VERSION_DDL = """
+CREATE TABLE IF NOT EXISTS schema_version(
+  version INTEGER PRIMARY KEY,
+  name TEXT NOT NULL,
+  applied_at TEXT NOT NULL,
+  state TEXT NOT NULL,      -- 'backfill' (дані ще переносяться) | 'done'
+  cursor TEXT               -- позиція backfill-у
+)"""
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    ddl: Optional[Callable[[sqlite3.Connection], None]] = None
+    # (з'єднання, курсор) → новий курсор | None (готово) | WAIT
+    backfill: Optional[Callable[[sqlite3.Connection, Optional[str]], Any]] = None
+
+# ---------- кроки ----------
+# v1: схема на момент появи schema_version (заморожена — не редагувати)
+_V1_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS plants(
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      user_id INTEGER,                 -- multi-user (NULL legacy допустимо)
+      name TEXT NOT NULL,
+      care TEXT NOT NULL,
+      photo BLOB,
+      water_int INTEGER,
+      feed_int INTEGER,
+      mist_int INTEGER,
+      last_watered TEXT,
+      last_fed TEXT,
+      last_misted TEXT
+    );""",
+    """
+    CREATE TABLE IF NOT EXISTS tasks(
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      user_id INTEGER NOT NULL,
+      plant_id INTEGER NOT NULL,
+      kind TEXT NOT NULL,         -- 'water'|'feed'|'mist'
+      due_date TEXT NOT NULL,     -- 'YYYY-MM-DD'
+      status TEXT NOT NULL,       -- 'due'|'done'|'deferred'|'skipped'
+      created_at TEXT NOT NULL
+    );""",
+    """
+    CREATE TABLE IF NOT EXISTS kv_cache(
+      ns TEXT NOT NULL,           -- простір імен кешу ('name_search', ...)
+      key TEXT NOT NULL,
+      value TEXT NOT NULL,        -- JSON
+      expires_at REAL NOT NULL,   -- unix time
+      PRIMARY KEY(ns, key)
+    ) WITHOUT ROWID;""",
+    """
+    CREATE TABLE IF NOT EXISTS schedule_state(
+      user_id INTEGER PRIMARY KEY,
+      version INTEGER NOT NULL DEFAULT 0,   -- +1 на кожну зміну рослин користувача
+      gen_version INTEGER,                  -- version на момент останньої генерації
+      gen_date TEXT                         -- 'сьогодні' на момент останньої генерації
+    );""",
+    """
+    CREATE TABLE IF NOT EXISTS schedule_dirty(
+      user_id INTEGER NOT NULL,
+      plant_id INTEGER NOT NULL,            -- рослини, змінені після останньої генерації
+      PRIMARY KEY(user_id, plant_id)
+    ) WITHOUT ROWID;""",
+    """
+    CREATE TABLE IF NOT EXISTS photos(
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      hash TEXT NOT NULL UNIQUE,            -- sha256 вмісту
+      data BLOB NOT NULL,
+      size INTEGER NOT NULL,
+      file_id TEXT,                         -- Telegram file_id після першої відправки
+      created_at TEXT NOT NULL
+    );""",
+    """
+    CREATE TABLE IF NOT EXISTS reminder_log(
+      run_date TEXT NOT NULL,               -- день розсилки 'YYYY-MM-DD' (config.TZ)
+      user_id INTEGER NOT NULL,
+      PRIMARY KEY(run_date, user_id)
+    ) WITHOUT ROWID;""",
+    """
+    CREATE TABLE IF NOT EXISTS users(
+      user_id INTEGER PRIMARY KEY,
+      tz TEXT                               -- IANA, напр. 'Europe/Kyiv'; NULL = config.TZ
+    );""",
+    """
+    CREATE TABLE IF NOT EXISTS persist_user_data(
+      user_id INTEGER PRIMARY KEY,
+      data TEXT NOT NULL,                   -- JSON context.user_data
+      updated_at REAL NOT NULL
+    );""",
+    """
+    CREATE TABLE IF NOT EXISTS persist_conversations(
+      name TEXT NOT NULL,                   -- ім'я ConversationHandler-а
+      key TEXT NOT NULL,                    -- JSON [chat_id, user_id]
+      state TEXT NOT NULL,                  -- JSON стану
+      PRIMARY KEY(name, key)
+    ) WITHOUT ROWID;""",
+    """
+    CREATE TABLE IF NOT EXISTS care_events(
+      id INTEGER PRIMARY KEY,
+      user_id INTEGER,
+      plant_id INTEGER NOT NULL,
+      kind TEXT NOT NULL,                   -- 'water'|'feed'|'mist'
+      due_date TEXT NOT NULL,
+      status TEXT NOT NULL                  -- 'done'|'deferred'|'skipped'
+    );""",
+    """
+    CREATE TABLE IF NOT EXISTS care_stats(
+      user_id INTEGER NOT NULL,
+      plant_id INTEGER NOT NULL,
+      kind TEXT NOT NULL,
+      done INTEGER NOT NULL DEFAULT 0,
+      on_time INTEGER NOT NULL DEFAULT 0,    -- виконано не пізніше дати задачі
+      skipped INTEGER NOT NULL DEFAULT 0,
+      deferred INTEGER NOT NULL DEFAULT 0,
+      delay_days INTEGER NOT NULL DEFAULT 0, -- сума запізнень по виконаних
+      streak INTEGER NOT NULL DEFAULT 0,     -- поточна серія вчасних виконань
+      best_streak INTEGER NOT NULL DEFAULT 0,
+      PRIMARY KEY(user_id, plant_id, kind)
+    ) WITHOUT ROWID;""",
+    "CREATE INDEX IF NOT EXISTS ix_plants_user ON plants(user_id, name)",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_user_status_due ON tasks(user_id, status, due_date)",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_due_user ON tasks(status, due_date, user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_kv_cache_expires ON kv_cache(ns, expires_at)",
+    "CREATE INDEX IF NOT EXISTS ix_care_events_user ON care_events(user_id, due_date)",
+)
+
+# v1: колонки, додані до schema_version, яких може не бути в старих БД
+_V1_COLUMNS = (
+    ("plants", "photo_hash", "TEXT"),       # посилання на photos.hash
+)
+
+def _baseline(c):
+    for stmt in _V1_SCHEMA:
+        c.execute(stmt)
+    for table, col, decl in _V1_COLUMNS:
+        have = {r[1] for r in c.execute(f"PRAGMA table_info({table})")}
+        if col not in have:
+            c.execute(f"ALTER TABLE {table} ADD COLUMN {col} {decl}")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_plants_photo ON plants(photo_hash)")
+
+def _open_task_index(c):
+    """Не більше однієї відкритої ('due') задачі на рослину/вид/дату."""
+    if c.execute("SELECT 1 FROM sqlite_master WHERE type='index' AND name='ux_tasks_open'").fetchone():
+        return
+    # старі БД могли накопичити дублікати — лишаємо найранішу задачу
+    c.execute("""DELETE FROM tasks WHERE status='due' AND id NOT IN (
+                   SELECT MIN(id) FROM tasks WHERE status='due'
+                   GROUP BY user_id, plant_id, kind, due_date)""")
+    c.execute("""CREATE UNIQUE INDEX IF NOT EXISTS ux_tasks_open
+                 ON tasks(user_id, plant_id, kind, due_date) WHERE status='due'""")
+
+def _photo_blobs(c, cursor):
+    """Старі plants.photo → сховище photos; вікнами по id, щоб порція не сканувала всю таблицю."""
+    start = int(cursor or 0)
+    (max_id,) = c.execute("SELECT COALESCE(MAX(id), 0) FROM plants").fetchone()
+    if start >= max_id:
+        return None
+    end = start + MIGRATION_BATCH
+    rows = c.execute("""SELECT id, photo FROM plants WHERE id>? AND id<=? AND photo IS NOT NULL
+                        ORDER BY id LIMIT ?""", (start, end, PHOTO_BATCH)).fetchall()
+    for pid, data in rows:
+        h = put_photo(c, bytes(data))
+        c.execute("UPDATE plants SET photo_hash=?, photo=NULL WHERE id=?", (h, pid))
+    return str(rows[-1][0] if len(rows) == PHOTO_BATCH else end)
+
+def _legacy_owner(c, cursor):
+    """
+    Рослини без user_id (з однокористувацьких версій) — власнику: LEGACY_OWNER_ID
+    або першому користувачу без рослин, що натисне /start (claim_legacy_rows).
+    """
+    if not c.execute("SELECT 1 FROM plants WHERE user_id IS NULL LIMIT 1").fetchone():
+        if cursor:
+            touch_schedule(c, int(cursor))  # повна перегенерація розкладу власника
+        return None
+    owner = cursor or (str(LEGACY_OWNER_ID) if LEGACY_OWNER_ID else None)
+    if owner is None:
+        return WAIT
+    c.execute("""UPDATE plants SET user_id=? WHERE id IN
+                   (SELECT id FROM plants WHERE user_id IS NULL LIMIT ?)""", (int(owner), MIGRATION_BATCH))
+    return owner
+
+def _task_key_index(c):
+    """Пошук задачі за рослиною/видом/датою в будь-якому статусі (schedule.insert_due_tasks)."""
+    c.execute("CREATE INDEX IF NOT EXISTS ix_tasks_key ON tasks(user_id, plant_id, kind, due_date)")
+
+def _reopened_tasks(c, cursor):
+    """Прибирає 'due', відкриті генерацією повторно поруч із закритим рядком того ж дня."""
+    start = int(cursor or 0)
+    (max_id,) = c.execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()
+    if start >= max_id:
+        return None
+    end = start + MIGRATION_BATCH
+    c.execute("""DELETE FROM tasks WHERE id>? AND id<=? AND status='due' AND EXISTS (
+                   SELECT 1 FROM tasks x WHERE x.user_id=tasks.user_id AND x.plant_id=tasks.plant_id
+                     AND x.kind=tasks.kind AND x.due_date=tasks.due_date AND x.status<>'due')""", (start, end))
+    return str(end)
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline", ddl=_baseline),
+    Migration(2, "ux_tasks_open", ddl=_open_task_index),
+    Migration(3, "photo_store_backfill", backfill=_photo_blobs),
+    Migration(4, "legacy_owner", backfill=_legacy_owner),
+    Migration(5, "ix_tasks_key", ddl=_task_key_index),
+    Migration(6, "drop_reopened_tasks", backfill=_reopened_tasks),
+]
+_BY_VERSION: Dict[int, Migration] = {m.version: m for m in MIGRATIONS}
+LEGACY_VERSION = 4
+
+_legacy_waiting = False  # legacy-рядки чекають на власника з /start (стан у пам'яті — без запитів на кожен /start)
+
+# ---------- застосування ----------
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+def _step(c, version: int) -> Any:
+    """Одна порція backfill-у з оновленням курсора (у поточній транзакції c)."""
+    row = c.execute("SELECT cursor FROM schema_version WHERE version=? AND state='backfill'",
+                    (version,)).fetchone()
+    if not row:
+        return None
+    res = _BY_VERSION[version].backfill(c, row[0])
+    if res is WAIT:
+        return WAIT
+    if res is None:
+        c.execute("UPDATE schema_version SET state='done', cursor=NULL WHERE version=?", (version,))
+        log.info("migration %d backfill done", version)
+    else:
+        c.execute("UPDATE schema_version SET cursor=? WHERE version=?", (res, version))
+    return res
+
+def apply_pending(c: sqlite3.Connection):
+    """На старті: ddl кроків, яких ще немає в schema_version, і по одній порції backfill-ів."""
+    global _legacy_waiting
+    c.execute(VERSION_DDL)
+    have = {v for (v,) in c.execute("SELECT version FROM schema_version")}
+    for m in MIGRATIONS:
+        if m.version in have:
+            continue
+        t0 = time.perf_counter()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            if m.ddl:
+                m.ddl(c)
+            c.execute("INSERT INTO schema_version(version, name, applied_at, state) VALUES(?,?,?,?)",
+                      (m.version, m.name, _now(), "backfill" if m.backfill else "done"))
+        except BaseException:
+            c.rollback()
+            raise
+        c.commit()
+        log.info("migration %d %s applied in %.0f ms", m.version, m.name, (time.perf_counter() - t0) * 1000)
+    # дрібні backfill-и (нема чого переносити) закриваються одразу
+    for version in pending_versions(c):
+        c.execute("BEGIN IMMEDIATE")
+        res = _step(c, version)
+        c.commit()
+        if version == LEGACY_VERSION:
+            _legacy_waiting = res is WAIT
+
+def pending_versions(c=None) -> List[int]:
+    c = c or conn()
+    return [v for (v,) in c.execute("SELECT version FROM schema_version WHERE state='backfill' ORDER BY version")]
+
+def backfill_step(version: int) -> bool:
+    """Порція в окремій транзакції; True — є що робити далі."""
+    with tx() as c:
+        res = _step(c, version)
+    return res is not None and res is not WAIT
+
+# ---------- legacy-власник ----------
+def legacy_waiting() -> bool:
+    return _legacy_waiting
+
+def claim_legacy_rows(user_id: int) -> bool:
+    """/start: перший користувач без рослин стає власником legacy-рядків (одноразово)."""
+    global _legacy_waiting
+    with tx() as c:
+        row = c.execute("SELECT state, cursor FROM schema_version WHERE version=?", (LEGACY_VERSION,)).fetchone()
+        if not row or row[0] != "backfill" or row[1]:
+            _legacy_waiting = False
+            return False
+        if c.execute("SELECT 1 FROM plants WHERE user_id=? LIMIT 1", (user_id,)).fetchone():
+            return False
+        c.execute("UPDATE schema_version SET cursor=? WHERE version=?", (str(user_id), LEGACY_VERSION))
+        _step(c, LEGACY_VERSION)  # перша порція одразу — невелика колекція переноситься за раз
+    _legacy_waiting = False
+    return True
+
+# ---------- фоновий прохід ----------
+async def run_backfills(budget: float = MIGRATION_BUDGET) -> int:
+    """Порції всіх незавершених backfill-ів по черзі, не довше budget сек; повертає к-сть порцій."""
+    started = time.monotonic()
+    n = 0
+    for version in await aiodb.read(pending_versions):
+        while time.monotonic() - started < budget:
+            more = await aiodb.write(backfill_step, version)
+            n += 1
+            if not more:
+                break
+    return n
+
+async def backfill_job(context):
+    await run_backfills()
+    if not await aiodb.read(pending_versions):
+        context.job.schedule_removal()
+
+def schedule_backfills(job_queue):
+    if job_queue is None:
+        return
+    job_queue.run_repeating(backfill_job, interval=MIGRATION_INTERVAL, first=5, name="migrations")
+
+def status() -> List[Dict[str, Any]]:
+    return [dict(zip(("version", "name", "applied_at", "state", "cursor"), r)) for r in
+            conn().execute("SELECT version, name, applied_at, state, cursor FROM schema_version ORDER BY version")]
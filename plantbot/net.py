@@ -0,0 +1,48 @@
+# plantbot/net.py
+# Спільний асинхронний HTTP-клієнт для зовнішніх API (Plant.id, Wikidata):
+# один keep-alive пул на процес + семафор на кількість одночасних запитів.
+from __future__ import annotations
+import asyncio
+from typing import Optional
+
+import httpx
+
+from .config import HTTP_CONCURRENCY
+
+_client: Optional[httpx.AsyncClient] = None
+_sem: Optional[asyncio.Semaphore] = None
+
+def client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=HTTP_CONCURRENCY,
+                                max_keepalive_connections=HTTP_CONCURRENCY),
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            follow_redirects=True,
+        )
+    return _client
+
+def _limiter() -> asyncio.Semaphore:
+    global _sem
+    if _sem is None:
+        _sem = asyncio.Semaphore(HTTP_CONCURRENCY)
+    return _sem
+
+async def request(method: str, url: str, *, deadline: float, **kw) -> httpx.Response:
+    """
+    Запит через спільний пул. deadline (сек) покриває і чергу на семафорі,
+    і сам запит; по закінченню — asyncio.TimeoutError.
+    """
+    async def _do():
+        async with _limiter():
+            return await client().request(method, url, **kw)
+    return await asyncio.wait_for(_do(), timeout=deadline)
+
+async def aclose():
+    """Закриває пул (на завершенні застосунку)."""
+    global _client, _sem
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _sem = None
@@ -0,0 +1,156 @@
+# plantbot/persistence.py
+# SQLite-персистентність для PTB: user_data та стани ConversationHandler-ів
+# живуть у тій самій БД, тож незавершені сценарії (додавання, перейменування)
+# переживають рестарт. PTB викликає update_* раз на update_interval сек
+# лише для змінених записів; ми ще й зливаємо всі такі виклики в одну
+# транзакцію (write-behind), тож окремий апдейт не додає запису на диск.
+# Читання і запис ідуть через aiodb, а не в циклі подій.
+from __future__ import annotations
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from .db import conn, tx
+from . import aiodb
+
+log = logging.getLogger(__name__)
+
+_DROP = object()
+
+class SQLitePersistence(BasePersistence):
+    """
+    Зберігає user_data і conversations (chat_data/bot_data/callback_data не
+    використовуються ботом). refresh_user_data перечитує рядок користувача,
+    якщо інший воркер записав новішу версію.
+    """
+    def __init__(self, update_interval: float = 10):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval,
+        )
+        self._pending_users: Dict[int, object] = {}                     # user_id → JSON | _DROP
+        self._pending_convs: Dict[Tuple[str, str], Optional[str]] = {}  # (name, key) → JSON стану | None
+        self._seen: Dict[int, float] = {}  # user_id → updated_at, який ми бачили
+        self._write_task: Optional[asyncio.Task] = None
+
+    # --- читання ---
+    async def get_user_data(self) -> Dict[int, dict]:
+        out = {}
+        rows = await aiodb.read(lambda: conn().execute(
+            "SELECT user_id, data, updated_at FROM persist_user_data").fetchall())
+        for uid, data, updated_at in rows:
+            out[uid] = json.loads(data)
+            self._seen[uid] = updated_at
+        return out
+
+    async def get_chat_data(self) -> Dict[int, dict]:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name: str) -> dict:
+        rows = await aiodb.read(lambda: conn().execute(
+            "SELECT key, state FROM persist_conversations WHERE name=?", (name,)).fetchall())
+        return {tuple(json.loads(k)): json.loads(s) for k, s in rows}
+
+    async def refresh_user_data(self, user_id: int, user_data: dict):
+        if user_id in self._pending_users:
+            return  # локальна версія новіша за збережену
+        row = await aiodb.read(lambda: conn().execute(
+            "SELECT data, updated_at FROM persist_user_data WHERE user_id=?", (user_id,)).fetchone())
+        if row and row[1] > self._seen.get(user_id, 0.0):
+            user_data.clear()
+            user_data.update(json.loads(row[0]))
+            self._seen[user_id] = row[1]
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict):
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict):
+        pass
+
+    # --- запис (відкладений) ---
+    # Серіалізуємо одразу, в циклі подій: обробники змінюють ті самі dict-и
+    # паралельно (concurrent_updates), тож у потік запису йдуть лише рядки.
+    async def update_user_data(self, user_id: int, data: dict):
+        try:
+            self._pending_users[user_id] = json.dumps(data, ensure_ascii=False)
+        except (TypeError, ValueError):
+            log.exception("user_data of %s is not JSON-serializable; not persisted", user_id)
+            return
+        self._schedule_write()
+
+    async def drop_user_data(self, user_id: int):
+        self._pending_users[user_id] = _DROP
+        self._schedule_write()
+
+    async def update_conversation(self, name: str, key, new_state: Optional[object]):
+        self._pending_convs[(name, json.dumps(list(key)))] = None if new_state is None else json.dumps(new_state)
+        self._schedule_write()
+
+    async def update_chat_data(self, chat_id: int, data: dict):
+        pass
+
+    async def drop_chat_data(self, chat_id: int):
+        pass
+
+    async def update_bot_data(self, data: dict):
+        pass
+
+    async def update_callback_data(self, data):
+        pass
+
+    def _schedule_write(self):
+        # усі update_* одного проходу PTB встигають виконатися до старту задачі
+        if self._write_task is None or self._write_task.done():
+            self._write_task = asyncio.get_running_loop().create_task(self._write_pending())
+
+    async def _write_pending(self):
+        users, self._pending_users = self._pending_users, {}
+        convs, self._pending_convs = self._pending_convs, {}
+        if not users and not convs:
+            return
+        try:
+            now = await aiodb.write(self._write, users, convs)
+        except Exception:
+            log.exception("persistence write failed; will retry on the next flush")
+            for k, v in users.items():
+                self._pending_users.setdefault(k, v)
+            for k, v in convs.items():
+                self._pending_convs.setdefault(k, v)
+            return
+        for uid, data in users.items():
+            if data is _DROP:
+                self._seen.pop(uid, None)
+            else:
+                self._seen[uid] = now
+
+    @staticmethod
+    def _write(users: dict, convs: dict) -> float:
+        now = time.time()
+        with tx() as c:
+            c.executemany("DELETE FROM persist_user_data WHERE user_id=?",
+                          [(uid,) for uid, d in users.items() if d is _DROP])
+            c.executemany("""INSERT INTO persist_user_data(user_id, data, updated_at) VALUES(?,?,?)
+                             ON CONFLICT(user_id) DO UPDATE SET data=excluded.data, updated_at=excluded.updated_at""",
+                          [(uid, d, now) for uid, d in users.items() if d is not _DROP])
+            c.executemany("DELETE FROM persist_conversations WHERE name=? AND key=?",
+                          [k for k, s in convs.items() if s is None])
+            c.executemany("""INSERT INTO persist_conversations(name, key, state) VALUES(?,?,?)
+                             ON CONFLICT(name, key) DO UPDATE SET state=excluded.state""",
+                          [(n, k, s) for (n, k), s in convs.items() if s is not None])
+        return now
+
+    async def flush(self):
+        """На зупинці: дочекатися запису в польоті і дописати решту."""
+        if self._write_task is not None:
+            await asyncio.gather(self._write_task, return_exceptions=True)
+        await self._write_pending()
@@ -1,13 +1,16 @@
 # plantbot/photos.py
-import json, requests
-from .config import PLANT_ID_API_KEY
+import json
+from . import net
+from .config import PLANT_ID_API_KEY, PLANT_ID_BASE_URL
+from .metrics import timed
 
-def plantid_name_and_image(image_bytes: bytes):
+@timed("external_call_seconds", call="plantid_name_and_image")
+async def plantid_name_and_image(image_bytes: bytes):
     """Розпізнавання за фото через Plant.id + similar_images як еталонне зображення (якщо є ключ)."""
     if not PLANT_ID_API_KEY:
         return (None, None)
     try:
-        url = "https://api.plant.id/v2/identify"
+        url = f"{PLANT_ID_BASE_URL}/v2/identify"
         headers = {"Api-Key": PLANT_ID_API_KEY}
         files = {"images": image_bytes}
         data = {
@@ -15,18 +18,20 @@ def plantid_name_and_image(image_bytes: bytes):
             "plant_language": "en",
             "plant_details": ["common_names", "url", "wiki_description"]
         }
-        r = requests.post(url, headers=headers, files=files, data={"data": json.dumps(data)}, timeout=45).json()
+        r = (await net.request("POST", url, headers=headers, files=files,
+                               data={"data": json.dumps(data)}, deadline=45)).json()
         sug = (r.get("suggestions") or [])
         if not sug: return (None, None)
         name = sug[0].get("plant_name") or (sug[0].get("plant_details",{}).get("common_names") or [None])[0]
         sim = (sug[0].get("similar_images") or [])
-        img = requests.get(sim[0]["url"], timeout=25).content if sim else None
+        img = (await net.request("GET", sim[0]["url"], deadline=25)).content if sim else None
         return (name, img)
     except Exception:
         return (None, None)
 # plantbot/photos.py  (додайте нижче існуючих імпортів/функцій)
 from telegram import Bot
 
+@timed("external_call_seconds", call="telegram_download")
 async def download_file_bytes(bot: Bot, file_id: str) -> bytes:
     """
     Скачує файл з Telegram і повертає bytes.
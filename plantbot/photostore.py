@@ -0,0 +1,60 @@
+# plantbot/photostore.py
+# Сховище фото рослин: кожне зображення зберігається один раз (ключ — sha256),
+# plants.photo_hash лише посилається на нього. Після першої відправки
+# запам'ятовуємо Telegram file_id і далі шлемо його замість байтів.
+from __future__ import annotations
+import hashlib
+import logging
+from datetime import date
+from typing import Optional
+
+from .db import conn, tx
+from . import aiodb
+
+log = logging.getLogger(__name__)
+
+def photo_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def put_photo(c, data: bytes, file_id: Optional[str] = None) -> str:
+    """Кладе зображення у сховище (якщо такого ще немає) і повертає його хеш."""
+    h = photo_hash(data)
+    c.execute("""INSERT INTO photos(hash, data, size, file_id, created_at) VALUES(?,?,?,?,?)
+                 ON CONFLICT(hash) DO UPDATE SET file_id=COALESCE(photos.file_id, excluded.file_id)""",
+              (h, data, len(data), file_id, date.today().isoformat()))
+    return h
+
+def set_plant_photo(uid: int, pid: int, data: bytes, file_id: Optional[str] = None) -> str:
+    with tx() as c:
+        h = put_photo(c, data, file_id)
+        c.execute("UPDATE plants SET photo_hash=? WHERE id=? AND user_id=?", (h, pid, uid))
+    return h
+
+def remember_file_id(h: str, file_id: str):
+    with tx() as c:
+        c.execute("UPDATE photos SET file_id=? WHERE hash=?", (file_id, h))
+
+async def reply_plant_photo(message, h: str, **kw):
+    """
+    Надсилає фото зі сховища: за file_id, якщо він відомий, інакше байтами
+    (і запам'ятовує отриманий file_id). Протухлий file_id скидається.
+    """
+    row = await aiodb.read(lambda: conn().execute("SELECT file_id, data FROM photos WHERE hash=?", (h,)).fetchone())
+    if not row:
+        return await message.reply_text(kw.pop("caption", ""), **kw)
+    file_id, data = row
+    if file_id:
+        try:
+            return await message.reply_photo(photo=file_id, **kw)
+        except Exception as e:
+            log.warning("cached file_id rejected for %s: %r", h[:12], e)
+    sent = await message.reply_photo(photo=data, **kw)
+    if sent and sent.photo:
+        await aiodb.write(remember_file_id, h, sent.photo[-1].file_id)
+    return sent
+
+def gc_photos() -> int:
+    """Видаляє зображення, на які вже не посилається жодна рослина."""
+    with tx() as c:
+        return c.execute("""DELETE FROM photos WHERE NOT EXISTS
+                              (SELECT 1 FROM plants p WHERE p.photo_hash=photos.hash)""").rowcount
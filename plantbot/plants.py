@@ -0,0 +1,97 @@
+# plantbot/plants.py
+# Посторінковий список рослин користувача (перегляд і видалення).
+# Keyset-пагінація по (name, id) на індексі ix_plants_user(user_id, name),
+# тож вартість сторінки не залежить від розміру колекції. Зібрані
+# сторінки кешуються на користувача і скидаються при додаванні,
+# перейменуванні та видаленні (invalidate_plant_pages). Кеш живе в циклі
+# подій; запити на промах ідуть у потоки читання aiodb.
+from __future__ import annotations
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .cache import LRU
+from .db import conn
+from . import aiodb
+
+PAGE_SIZE = 8
+PAGES_PER_USER = 16
+
+class Page(NamedTuple):
+    rows: List[Tuple[int, str]]
+    has_prev: bool
+    has_next: bool
+
+_pages = LRU(maxsize=2048)  # user_id → LRU(ключ сторінки → Page)
+
+_gen: Dict[int, int] = {}   # user_id → лічильник скидань (сторінка, зібрана до скидання, не кешується)
+
+def invalidate_plant_pages(user_id: int):
+    _pages.pop(user_id)
+    _gen[user_id] = _gen.get(user_id, 0) + 1
+
+def _exists(uid: int, op: str, name: str, pid: int) -> bool:
+    return conn().execute(f"SELECT 1 FROM plants WHERE user_id=? AND (name, id) {op} (?, ?) LIMIT 1",
+                          (uid, name, pid)).fetchone() is not None
+
+def _anchor(uid: int, pid: int) -> Optional[str]:
+    row = conn().execute("SELECT name FROM plants WHERE id=? AND user_id=?", (pid, uid)).fetchone()
+    return row[0] if row else None
+
+def _query_page(uid: int, op: str, arg: str) -> Page:
+    """op: 'f' — перша, 'n' — після id, 'p' — перед id, 'j' — з літери/префікса."""
+    back = False
+    if op in ("n", "p"):
+        name = _anchor(uid, int(arg))
+        if name is None:  # якір видалили — повертаємось на початок
+            return _query_page(uid, "f", "")
+        if op == "n":
+            where, params = "AND (name, id) > (?, ?)", (name, int(arg))
+        else:
+            where, params, back = "AND (name, id) < (?, ?)", (name, int(arg)), True
+    elif op == "j":
+        where, params = "AND name >= ?", (arg,)
+    else:
+        where, params = "", ()
+    order = "name DESC, id DESC" if back else "name, id"
+    rows = conn().execute(f"SELECT id, name FROM plants WHERE user_id=? {where} ORDER BY {order} LIMIT ?",
+                          (uid, *params, PAGE_SIZE + 1)).fetchall()
+    more = len(rows) > PAGE_SIZE
+    rows = rows[:PAGE_SIZE]
+    if back:
+        rows.reverse()
+    if not rows:
+        return Page([], False, False)
+    first, last = rows[0], rows[-1]
+    has_prev = more if back else _exists(uid, "<", first[1], first[0])
+    has_next = _exists(uid, ">", last[1], last[0]) if back else more
+    return Page(rows, has_prev, has_next)
+
+def _user_pages(uid: int) -> LRU:
+    user_pages = _pages.get(uid)
+    if user_pages is None:
+        user_pages = LRU(maxsize=PAGES_PER_USER)
+        _pages.put(uid, user_pages)
+    return user_pages
+
+async def plants_page(uid: int, op: str = "f", arg: str = "") -> Page:
+    key = f"{op}:{arg}"
+    page = _user_pages(uid).get(key)
+    if page is None:
+        gen = _gen.get(uid)
+        page = await aiodb.read(_query_page, uid, op, arg)
+        if page.rows and _gen.get(uid) == gen:
+            _user_pages(uid).put(key, page)
+    return page
+
+def _letters(uid: int) -> List[str]:
+    return [r[0] for r in conn().execute(
+        "SELECT DISTINCT substr(name, 1, 1) AS l FROM plants WHERE user_id=? ORDER BY l", (uid,)) if r[0]]
+
+async def first_letters(uid: int) -> List[str]:
+    """Перші символи назв (для переходу за алфавітом) у порядку сортування."""
+    letters = _user_pages(uid).get("letters")
+    if letters is None:
+        gen = _gen.get(uid)
+        letters = await aiodb.read(_letters, uid)
+        if _gen.get(uid) == gen:
+            _user_pages(uid).put("letters", letters)
+    return letters
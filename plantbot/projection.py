@@ -0,0 +1,138 @@
+# plantbot/projection.py
+# Проекція розкладу на довільний горизонт без рядків у tasks: майбутні події
+# догляду обчислюються на льоту з water_int/feed_int/mist_int, last_* і
+# CARE_DAYS за тим самим правилом, що й due_anchor у schedule.py: перша дата —
+# due_anchor (прострочене переходить на найближчий день догляду від сьогодні),
+# наступні — від попередньої, ніби її виконали вчасно. Відкриті 'due' задачі з
+# датою ≥ сьогодні (перенесені) замінюють першу подію ряду.
+# Рослини з однаковими (перша дата, інтервал) мають один спільний ряд дат,
+# тож на колекцію рахується лише кілька рядів, а не ряд на рослину;
+# ряди зливаються ліниво (heapq.merge) у порядку дат.
+# Матеріалізуються тільки сьогоднішні задачі (schedule.HORIZON_DAYS) —
+# ті, які користувач відмічає кнопками.
+from __future__ import annotations
+import heapq
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .config import CARE_DAYS
+from .db import conn
+from .schedule import KINDS, due_anchor, fromiso, today
+
+KIND_NAMES = {'water': 'Полив', 'feed': 'Підживлення', 'mist': 'Обприскування'}
+KIND_ICONS = {'water': '💧', 'feed': '🌿', 'mist': '💦'}
+
+WEEK, MONTH, SEASON = 7, 30, 91
+MAX_TEXT = 4000  # ліміт Telegram — 4096 символів на повідомлення
+
+# скільки днів від дня тижня wd до найближчого дня догляду (0 — цей самий день)
+_TO_CARE = tuple(min((cd - wd) % 7 for cd in CARE_DAYS) for wd in range(7))
+
+def _next_care(d: date) -> date:
+    return d + timedelta(days=_TO_CARE[d.weekday()])
+
+class Event(NamedTuple):
+    day: date
+    kind: str
+    plant_id: int
+    name: str
+
+def _series(first: date, interval: int, gid: int) -> Iterator[Tuple[date, int]]:
+    d = first
+    while True:
+        yield d, gid
+        d = _next_care(d + timedelta(days=interval))
+
+def iter_events(plants, t: date, start: Optional[date] = None, end: Optional[date] = None,
+                open_due: Optional[Dict[Tuple[int, str], str]] = None) -> Iterator[Event]:
+    """
+    plants: (id, name, water_int, feed_int, mist_int, last_watered, last_fed, last_misted).
+    Події у порядку дат у [start, end] (end=None — без кінця, брати скільки треба).
+    open_due: (plant_id, kind) → найближча відкрита задача (ISO), якщо є.
+    """
+    start = start or t
+    open_due = open_due or {}
+    groups: Dict[Tuple[date, int], List[Tuple[str, int, str]]] = {}
+    for pid, name, wi, fi, mi, lw, lf, lm in plants:
+        for kind, interval, last in zip(KINDS, (wi, fi, mi), (lw, lf, lm)):
+            if not interval:
+                continue
+            due = open_due.get((pid, kind))
+            first = fromiso(due) if due else due_anchor(interval, last, t)
+            groups.setdefault((first, interval), []).append((kind, pid, name))
+    members = list(groups.values())
+    for d, gid in heapq.merge(*(_series(first, interval, gid)
+                                for gid, (first, interval) in enumerate(groups))):
+        if end is not None and d > end:
+            return
+        if d >= start:
+            for kind, pid, name in members[gid]:
+                yield Event(d, kind, pid, name)
+
+def _plants(user_id: int):
+    return conn().execute("""SELECT id, name, water_int, feed_int, mist_int, last_watered, last_fed, last_misted
+                             FROM plants WHERE user_id=?""", (user_id,)).fetchall()
+
+def _open_due(user_id: int, t_iso: str) -> Dict[Tuple[int, str], str]:
+    return {(pid, kind): due for pid, kind, due in conn().execute(
+        """SELECT plant_id, kind, MIN(due_date) FROM tasks
+           WHERE user_id=? AND status='due' AND due_date>=? GROUP BY plant_id, kind""", (user_id, t_iso))}
+
+def user_events(user_id: int, days: Optional[int] = None, start: Optional[date] = None) -> Iterator[Event]:
+    """Події користувача від start (сьогодні) на days днів (None — без кінця)."""
+    t = today(user_id)
+    start = start or t
+    end = start + timedelta(days=days) if days is not None else None
+    return iter_events(_plants(user_id), t, start, end, _open_due(user_id, t.isoformat()))
+
+def _names(names: List[str], limit: int) -> str:
+    names = sorted(names)
+    if len(names) <= limit:
+        return ", ".join(names)
+    return f"{', '.join(names[:limit])} і ще {len(names) - limit}"
+
+def _clip(lines: List[str]) -> str:
+    out, size = [], 0
+    for i, line in enumerate(lines):
+        if size + len(line) + 1 > MAX_TEXT:
+            out.append(f"… (ще {len(lines) - i} рядків)")
+            break
+        out.append(line); size += len(line) + 1
+    return "\n".join(out)
+
+def overview_text(user_id: int, days: int = WEEK) -> str:
+    """Тиждень/місяць — по днях; сезон — підсумок по тижнях."""
+    t = today(user_id)
+    events = list(user_events(user_id, days, t))
+    if not events:
+        return "На цей період завдань немає — все під контролем ✨"
+    if days > MONTH:
+        return _by_week_text(events, days, t)
+
+    by_day: Dict[date, Dict[str, List[str]]] = {}
+    for e in events:
+        by_day.setdefault(e.day, {}).setdefault(e.kind, []).append(e.name)
+    title = "📅 Розклад на тиждень:" if days <= WEEK else f"🗓 Розклад на {days} днів:"
+    per_kind = 50 if days <= WEEK else 5
+    lines = [title]
+    for d in sorted(by_day):
+        lines.append(f"• {d.strftime('%d %B (%a)')}")
+        for kind in KINDS:
+            if kind in by_day[d]:
+                lines.append(f"  – {KIND_NAMES[kind]}: {_names(by_day[d][kind], per_kind)}")
+    return _clip(lines)
+
+def _by_week_text(events: List[Event], days: int, t: date) -> str:
+    this_monday = t - timedelta(days=t.weekday())
+    weeks: Dict[date, Dict[str, int]] = {}
+    for e in events:
+        monday = e.day - timedelta(days=e.day.weekday())
+        counts = weeks.setdefault(monday, {})
+        counts[e.kind] = counts.get(e.kind, 0) + 1
+    lines = [f"🍂 Розклад на {days} днів (по тижнях):"]
+    for monday in sorted(weeks):
+        counts = weeks[monday]
+        parts = [f"{KIND_ICONS[k]} {counts[k]}" for k in KINDS if k in counts]
+        label = "цей тиждень" if monday == this_monday else f"з {monday.strftime('%d %B')}"
+        lines.append(f"• {label}: {', '.join(parts)}")
+    return _clip(lines)
@@ -0,0 +1,109 @@
+# plantbot/reminders.py
+# Пуш-нагадування у дні догляду (CARE_DAYS, час REMINDER_TIME за config.TZ).
+# Користувачів із задачами на сьогодні шукаємо сторінками по індексу
+# ix_tasks_due_user, а reminder_log гарантує не більше одного нагадування
+# на користувача за день — у тому числі після рестарту посеред розсилки.
+from __future__ import annotations
+import asyncio
+import logging
+from datetime import datetime, time as dtime
+from typing import List, Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import Forbidden, RetryAfter, TelegramError
+
+from .config import TZ, CARE_DAYS, REMINDER_TIME, REMINDER_RATE
+from .db import conn, tx
+from . import aiodb
+from .schedule import ensure_week_tasks_for_all
+
+log = logging.getLogger(__name__)
+
+PAGE = 500  # користувачів за один запит
+
+def reminder_time() -> dtime:
+    hh, mm = (int(x) for x in REMINDER_TIME.split(":"))
+    return dtime(hh, mm, tzinfo=TZ)
+
+def due_users_page(day_iso: str, after_uid: int, limit: int = PAGE) -> List[Tuple[int, int]]:
+    """
+    (user_id, к-сть задач) для ще не сповіщених користувачів, user_id > after_uid.
+    Задача, для якої того ж дня вже є закритий рядок (пропуск/перенесення/виконання), не рахується.
+    """
+    return conn().execute("""
+        SELECT t.user_id, COUNT(*) FROM tasks t
+        WHERE t.status='due' AND t.due_date=? AND t.user_id>?
+          AND NOT EXISTS (SELECT 1 FROM reminder_log r WHERE r.run_date=? AND r.user_id=t.user_id)
+          AND NOT EXISTS (SELECT 1 FROM tasks x WHERE x.user_id=t.user_id AND x.plant_id=t.plant_id
+                            AND x.kind=t.kind AND x.due_date=t.due_date AND x.status<>'due')
+        GROUP BY t.user_id
+        ORDER BY t.user_id
+        LIMIT ?
+    """, (day_iso, after_uid, day_iso, limit)).fetchall()
+
+def claim(day_iso: str, uids: List[int]):
+    """Фіксуємо відправку ДО надсилання: краще пропустити, ніж надіслати двічі."""
+    with tx() as c:
+        c.executemany("INSERT OR IGNORE INTO reminder_log(run_date, user_id) VALUES(?,?)",
+                      [(day_iso, u) for u in uids])
+
+def _text(n: int) -> str:
+    return f"🌱 Сьогодні день догляду: завдань — {n}. Відкрий план, щоб відмітити виконане."
+
+_KB = InlineKeyboardMarkup([[InlineKeyboardButton("📋 План на сьогодні", callback_data="today_plan")]])
+
+async def _send(bot, uid: int, n: int) -> bool:
+    for attempt in range(2):
+        try:
+            await bot.send_message(uid, _text(n), reply_markup=_KB)
+            return True
+        except RetryAfter as e:
+            await asyncio.sleep(e.retry_after)
+        except Forbidden:
+            return False  # користувач заблокував бота
+        except TelegramError as e:
+            log.warning("reminder to %s failed: %r", uid, e)
+            return False
+    return False
+
+async def send_due_reminders(bot, now: datetime = None) -> int:
+    """Одна розсилка за сьогодні; повторний виклик продовжує з місця зупинки."""
+    now = now or datetime.now(TZ)
+    day_iso = now.date().isoformat()
+    # до дати розсилки: у зонах, що відстають від TZ, у користувача ще вчора
+    await asyncio.to_thread(ensure_week_tasks_for_all, until=now.date())
+
+    sent = 0; after = 0
+    while True:
+        page = await aiodb.read(due_users_page, day_iso, after)
+        if not page:
+            break
+        after = page[-1][0]
+        for i in range(0, len(page), REMINDER_RATE):
+            batch = page[i:i + REMINDER_RATE]
+            await aiodb.write(claim, day_iso, [u for u, _ in batch])
+            started = asyncio.get_running_loop().time()
+            results = await asyncio.gather(*(_send(bot, u, n) for u, n in batch))
+            sent += sum(results)
+            # не більше REMINDER_RATE повідомлень на секунду
+            left = 1.0 - (asyncio.get_running_loop().time() - started)
+            if left > 0:
+                await asyncio.sleep(left)
+    log.info("reminders for %s: sent %d", day_iso, sent)
+    return sent
+
+async def reminders_job(context):
+    now = datetime.now(TZ)
+    if now.weekday() not in CARE_DAYS or now.time() < reminder_time().replace(tzinfo=None):
+        return
+    await send_due_reminders(context.bot, now)
+
+def schedule_reminders(job_queue):
+    """Щоденна розсилка у дні догляду + догін після рестарту."""
+    if job_queue is None:
+        log.warning("JobQueue недоступний (потрібен python-telegram-bot[job-queue]) — нагадування вимкнені")
+        return
+    # у PTB 0=неділя, у CARE_DAYS 0=понеділок
+    days = tuple((d + 1) % 7 for d in CARE_DAYS)
+    job_queue.run_daily(reminders_job, time=reminder_time(), days=days, name="care-reminders")
+    job_queue.run_once(reminders_job, when=10, name="care-reminders-catchup")
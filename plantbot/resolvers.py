@@ -1,32 +1,42 @@
 # plantbot/resolvers.py
 from __future__ import annotations
-import base64
+import asyncio
 import logging
 from typing import Optional, Tuple, Dict, Any, List
-import requests
 
-from .config import PLANT_ID_API_KEY
+from . import net
+from .cache import PersistentCache, normalize_key
+from .config import (PLANT_ID_API_KEY, PLANT_ID_BASE_URL, NAME_CACHE_TTL, NAME_CACHE_NEGATIVE_TTL,
+                     IDENTIFY_CACHE_TTL, IDENTIFY_CACHE_NEGATIVE_TTL, IDENTIFY_CACHE_MAX)
+from .imageprep import downscale, identify_body, image_digest
+from .metrics import timed
 
 log = logging.getLogger(__name__)
 
-PLANT_ID_IDENTIFY_URL = "https://api.plant.id/v2/identify"
-PLANT_ID_NAME_SEARCH_URL = "https://api.plant.id/v3/plant/name_search"
+PLANT_ID_IDENTIFY_URL = f"{PLANT_ID_BASE_URL}/v2/identify"
+PLANT_ID_NAME_SEARCH_URL = f"{PLANT_ID_BASE_URL}/v3/plant/name_search"
+WIKIDATA_ENTITY_URL = "https://www.wikidata.org/wiki/Special:EntityData/{qid}.json"
+COMMONS_FILE_URL = "https://commons.wikimedia.org/wiki/Special:FilePath/{name}"
 
-def _b64(data: bytes) -> str:
-    return base64.b64encode(data).decode("ascii")
+# дедлайни на весь виклик (черга на пул + запит), сек
+IDENTIFY_DEADLINE = 30.0
+NAME_SEARCH_DEADLINE = 20.0
+IMAGE_DEADLINE = 25.0
 
 # ---------- IMAGE → IDENTIFY ----------
-def identify_from_image_bytes(img_bytes: bytes) -> Dict[str, Any]:
+IDENTIFY_DETAILS = ("common_names", "taxonomy", "url", "wiki_description")
+
+@timed("external_call_seconds", call="plantid_identify")
+async def identify_from_image_bytes(img_bytes: bytes, deadline: float = IDENTIFY_DEADLINE) -> Dict[str, Any]:
     """
     Визначення рослини за фото через Plant.id v2.
+    Тіло запиту кодується в base64 потоком (див. imageprep.identify_body).
     Повертає сирий dict (JSON відповіді).
     """
-    headers = {"Api-Key": PLANT_ID_API_KEY}
-    payload = {
-        "images": [_b64(img_bytes)],
-        "plant_details": ["common_names", "taxonomy", "url", "wiki_description"],
-    }
-    r = requests.post(PLANT_ID_IDENTIFY_URL, headers=headers, json=payload, timeout=30)
+    length, body = identify_body(img_bytes, IDENTIFY_DETAILS)
+    headers = {"Api-Key": PLANT_ID_API_KEY, "Content-Type": "application/json",
+               "Content-Length": str(length)}
+    r = await net.request("POST", PLANT_ID_IDENTIFY_URL, headers=headers, content=body, deadline=deadline)
     r.raise_for_status()
     return r.json()
 
@@ -60,39 +70,110 @@ def parse_identify_response(resp: Dict[str, Any]) -> Tuple[bool, float, Optional
     }
     return is_plant, confidence, name, extra
 
-# ---------- NAME → SEARCH ----------
-def search_name(query: str) -> Tuple[bool, float, Optional[str], Dict[str, Any]]:
+# Кеш розпізнавання: ключі "fu:<file_unique_id>" (без завантаження фото)
+# і sha256 вмісту (те саме зображення, надіслане заново як інший файл)
+identify_cache = PersistentCache("identify", ttl=IDENTIFY_CACHE_TTL, negative_ttl=IDENTIFY_CACHE_NEGATIVE_TTL,
+                                 max_rows=IDENTIFY_CACHE_MAX)
+
+def _identify_negative(v) -> bool:
+    return not v[0] or not v[2]
+
+@timed("external_call_seconds", call="identify_image")
+async def identify_image(img_bytes: bytes, deadline: float = IDENTIFY_DEADLINE) -> Tuple[bool, float, Optional[str], Dict[str, Any]]:
     """
-    Пошук рослини за назвою/синонімами через Plant.id v3 name_search.
-    :return: (ok, confidence, canonical_name, extra)
+    Фото → (is_plant, confidence, name, extra) з кешем за вмістом.
+    Перед відправкою зображення зменшується (imageprep.downscale).
+    Помилки мережі/API не кешуються — летять винятком.
     """
+    async def load():
+        small = await asyncio.to_thread(downscale, img_bytes)
+        return list(parse_identify_response(await identify_from_image_bytes(small, deadline)))
+    v = await identify_cache.get_or_load(image_digest(img_bytes), load, is_negative=_identify_negative)
+    return v[0], v[1], v[2], v[3]
+
+@timed("external_call_seconds", call="identify_photo")
+async def identify_photo(photo, deadline: float = IDENTIFY_DEADLINE) -> Tuple[bool, float, Optional[str], Dict[str, Any]]:
+    """
+    telegram.PhotoSize → (is_plant, confidence, name, extra).
+    Повторне фото знаходиться за file_unique_id ще до завантаження з Telegram.
+    """
+    async def load():
+        tg_file = await photo.get_file()
+        img_bytes = bytes(await tg_file.download_as_bytearray())
+        return list(await identify_image(img_bytes, deadline))
+    v = await identify_cache.get_or_load(f"fu:{photo.file_unique_id}", load, is_negative=_identify_negative)
+    return v[0], v[1], v[2], v[3]
+
+# ---------- NAME → SEARCH ----------
+# Кеш за нормалізованим запитом: LRU у процесі + SQLite з TTL (див. cache.py)
+name_cache = PersistentCache("name_search", ttl=NAME_CACHE_TTL, negative_ttl=NAME_CACHE_NEGATIVE_TTL)
+
+@timed("external_call_seconds", call="plantid_name_search")
+async def _name_search_remote(query: str, deadline: float) -> List[Any]:
+    """Сирий виклик Plant.id v3 name_search; помилки мережі — винятком."""
     headers = {"Api-Key": PLANT_ID_API_KEY}
     params = {"q": query}
+    r = await net.request("GET", PLANT_ID_NAME_SEARCH_URL, headers=headers, params=params, deadline=deadline)
+    r.raise_for_status()
+    entities: List[Dict[str, Any]] = r.json().get("entities") or []
+    if not entities:
+        return [False, 0.0, None, {}]
+    top = entities[0]
+    name = top.get("scientific_name") or top.get("name") or query
+    common = top.get("common_names") or []
+    extra = {"common_names": common, "source": "plant.id:name_search"}
+    # name_search не дає probability — ставимо умовно високу для підтвердження
+    return [True, 90.0, name, extra]
+
+@timed("external_call_seconds", call="search_name")
+async def search_name(query: str, deadline: float = NAME_SEARCH_DEADLINE) -> Tuple[bool, float, Optional[str], Dict[str, Any]]:
+    """
+    Пошук рослини за назвою/синонімами через Plant.id v3 name_search (з кешем).
+    :return: (ok, confidence, canonical_name, extra)
+    """
+    key = normalize_key(query)
+    if not key:
+        return False, 0.0, None, {}
     try:
-        r = requests.get(PLANT_ID_NAME_SEARCH_URL, headers=headers, params=params, timeout=20)
-        r.raise_for_status()
-        data = r.json()
-        entities: List[Dict[str, Any]] = data.get("entities") or []
-        if not entities:
-            return False, 0.0, None, {}
-        top = entities[0]
-        name = top.get("scientific_name") or top.get("name") or query
-        common = top.get("common_names") or []
-        extra = {"common_names": common, "source": "plant.id:name_search"}
-        # name_search не дає probability — ставимо умовно високу для підтвердження
-        return True, 90.0, name, extra
+        res = await name_cache.get_or_load(key, lambda: _name_search_remote(query, deadline),
+                                           is_negative=lambda v: not v[0])
+        return tuple(res)
     except Exception as e:
-        log.warning("name_search failed: %s", e)
+        log.warning("name_search failed: %r", e)
         return False, 0.0, None, {}
 
 # ---------- RESOLVE NAME (used on rename etc.) ----------
-def resolve_plant_name(raw: str) -> Dict[str, Any]:
+@timed("external_call_seconds", call="resolve_plant_name")
+async def resolve_plant_name(raw: str) -> Dict[str, Any]:
     """
     Повертає {"canonical": str, "source": str, "qid": Optional[str]}
     (qid поки не визначаємо — None; цього достатньо, щоб не падало)
     """
-    ok, _, canonical, _ = search_name(raw)
+    ok, _, canonical, _ = await search_name(raw)
     if ok and canonical:
         return {"canonical": canonical, "source": "plant.id:name_search", "qid": None}
     # якщо не знайшли — повертаємо як є
-    return {"canonical": raw, "source": "raw", "qid":
+    return {"canonical": raw, "source": "raw", "qid": None}
+
+# ---------- QID → IMAGE (Wikidata P18) ----------
+@timed("external_call_seconds", call="wikidata_image")
+async def wikidata_image_by_qid(qid: str, deadline: float = IMAGE_DEADLINE) -> Optional[bytes]:
+    """
+    Завантажує зображення з властивості P18 сутності Wikidata.
+    Повертає bytes або None, якщо фото немає/сталася помилка.
+    """
+    try:
+        r = await net.request("GET", WIKIDATA_ENTITY_URL.format(qid=qid), deadline=deadline)
+        r.raise_for_status()
+        claims = (r.json().get("entities", {}).get(qid) or {}).get("claims") or {}
+        p18 = claims.get("P18") or []
+        if not p18:
+            return None
+        fname = p18[0]["mainsnak"]["datavalue"]["value"]
+        img = await net.request("GET", COMMONS_FILE_URL.format(name=fname.replace(" ", "_")),
+                                params={"width": 1024}, deadline=deadline)
+        img.raise_for_status()
+        return img.content
+    except Exception as e:
+        log.warning("wikidata image failed for %s: %r", qid, e)
+        return None
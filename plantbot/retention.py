@@ -0,0 +1,103 @@
+# plantbot/retention.py
+# Утримання розміру БД: завершені задачі (done/skipped/deferred), старші
+# за RETENTION_DAYS, переносяться з tasks у компактну care_events, старі
+# записи reminder_log видаляються. Робота йде порціями по RETENTION_BATCH
+# у пулі потоків і обмежена RETENTION_BUDGET сек за прохід, тож бот не
+# блокується; недороблене підхоплює наступний прохід.
+from __future__ import annotations
+import asyncio
+import logging
+import os
+import time
+from datetime import timedelta
+from typing import Dict
+
+from .config import DB_PATH, RETENTION_DAYS, RETENTION_BATCH, RETENTION_INTERVAL, RETENTION_BUDGET
+from .db import conn, tx
+from .clock import today_default
+
+log = logging.getLogger(__name__)
+
+FINISHED = ("done", "skipped", "deferred")
+VACUUM_PAGES = 2000  # сторінок за один incremental_vacuum
+
+def cutoff_iso(days: int = RETENTION_DAYS) -> str:
+    """Межа архівації від "сьогодні" у config.TZ (clock), а не в зоні хоста."""
+    return (today_default() - timedelta(days=days)).isoformat()
+
+def archive_batch(cutoff: str, limit: int = RETENTION_BATCH) -> int:
+    """Одна транзакція: до limit завершених задач з due_date < cutoff → care_events."""
+    moved = 0
+    with tx() as c:
+        for status in FINISHED:
+            # по ix_tasks_due_user(status, due_date, ...)
+            ids = [r[0] for r in c.execute("SELECT id FROM tasks WHERE status=? AND due_date<? LIMIT ?",
+                                           (status, cutoff, limit - moved))]
+            if not ids:
+                continue
+            marks = ",".join("?" * len(ids))
+            c.execute(f"""INSERT INTO care_events(user_id, plant_id, kind, due_date, status)
+                          SELECT user_id, plant_id, kind, due_date, status FROM tasks WHERE id IN ({marks})""", ids)
+            c.execute(f"DELETE FROM tasks WHERE id IN ({marks})", ids)
+            moved += len(ids)
+            if moved >= limit:
+                break
+        c.execute("DELETE FROM reminder_log WHERE run_date<?", (cutoff,))
+    return moved
+
+def compact(pages: int = VACUUM_PAGES) -> int:
+    """incremental_vacuum (якщо БД створена з auto_vacuum=INCREMENTAL) + PRAGMA optimize."""
+    c = conn()
+    freed = 0
+    if c.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        before = c.execute("PRAGMA freelist_count").fetchone()[0]
+        # через execute() sqlite3 робить один крок прагми = одна сторінка; executescript доводить до кінця
+        c.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+        freed = before - c.execute("PRAGMA freelist_count").fetchone()[0]
+    c.execute("PRAGMA optimize")
+    return freed
+
+def db_stats() -> Dict[str, int]:
+    """Кількість рядків основних таблиць і розмір файлів БД (байт)."""
+    c = conn()
+    out = {f"rows_{t}": c.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+           for t in ("plants", "tasks", "care_events", "kv_cache", "photos")}
+    page_size = c.execute("PRAGMA page_size").fetchone()[0]
+    out["free_bytes"] = c.execute("PRAGMA freelist_count").fetchone()[0] * page_size
+    for key, path in (("file_bytes", DB_PATH), ("wal_bytes", DB_PATH + "-wal")):
+        try:
+            out[key] = os.path.getsize(path)
+        except OSError:
+            out[key] = 0
+    return out
+
+_last = {"archived": 0, "freed_pages": 0, "duration": 0.0, "finished_at": 0.0}
+
+def last_run() -> Dict[str, float]:
+    return dict(_last)
+
+async def run_retention(budget: float = RETENTION_BUDGET) -> int:
+    """Порції archive_batch, поки є що переносити і не вичерпано budget сек."""
+    cutoff = cutoff_iso()
+    started = time.monotonic()
+    total = 0
+    while time.monotonic() - started < budget:
+        n = await asyncio.to_thread(archive_batch, cutoff)
+        total += n
+        if n < RETENTION_BATCH:
+            break
+        await asyncio.sleep(0)  # віддати цикл апдейтам між порціями
+    freed = await asyncio.to_thread(compact)
+    _last.update(archived=total, freed_pages=freed, duration=round(time.monotonic() - started, 3),
+                 finished_at=time.time())
+    if total or freed:
+        log.info("retention: archived %d tasks, freed %d pages", total, freed)
+    return total
+
+async def retention_job(context):
+    await run_retention()
+
+def schedule_retention(job_queue):
+    if job_queue is None:
+        return
+    job_queue.run_repeating(retention_job, interval=RETENTION_INTERVAL, first=60, name="retention")
@@ -1,10 +1,14 @@
 # plantbot/schedule.py
 from datetime import date, timedelta
-from .db import conn
-from .config import CARE_DAYS
+from .db import conn, tx
+from .config import CARE_DAYS, TZ
+from .clock import today_for, today_default, today_in, all_user_tz
+from . import stats
 
 def iso(d: date): return d.isoformat()
-def today(): return date.today()
+def today(user_id: int = None):
+    """'Сьогодні' у часовій зоні користувача (або config.TZ)."""
+    return today_for(user_id) if user_id is not None else today_default()
 def fromiso(s: str): return date.fromisoformat(s)
 
 def next_care_day(from_day: date) -> date:
@@ -17,93 +21,237 @@ def following_care_day(after_day: date) -> date:
     deltas = [((cd - wd) % 7) or 7 for cd in CARE_DAYS]
     return after_day + timedelta(days=min(deltas))
 
+KINDS = ('water', 'feed', 'mist')
+LAST_FIELD = {'water': 'last_watered', 'feed': 'last_fed', 'mist': 'last_misted'}
+# Скільки днів наперед матеріалізуються задачі: лише сьогодні — ті, що
+# користувач відмічає кнопками; тиждень/місяць/сезон показує projection.py
+HORIZON_DAYS = 0
+
+def due_anchor(interval, last_iso, t: date):
+    """
+    Найближчий день догляду, на який припадає наступна дія (або None).
+    Прострочене не лишається в минулому — переходить на найближчий день догляду від t.
+    """
+    if not interval: return None
+    last = fromiso(last_iso) if last_iso else t
+    return next_care_day(max(last + timedelta(days=interval), t))
+
+def week_task_rows(plants, t: date, until: date = None):
+    """
+    plants: (user_id, id, water_int, feed_int, mist_int, last_watered, last_fed, last_misted).
+    Генерує рядки (user_id, plant_id, kind, due_date, created_at) до горизонту HORIZON_DAYS
+    (або до until, якщо він далі — напр. дата розсилки для зон, де ще вчора).
+    """
+    horizon = t + timedelta(days=HORIZON_DAYS); created = iso(t)
+    if until is not None and until > horizon: horizon = until
+    for uid, pid, wi, fi, mi, lw, lf, lm in plants:
+        for kind, interval, last in zip(KINDS, (wi, fi, mi), (lw, lf, lm)):
+            anchor = due_anchor(interval, last, t)
+            if anchor is not None and anchor <= horizon:
+                yield (uid, pid, kind, iso(anchor), created)
+
+def insert_due_tasks(c, rows):
+    """
+    Пакетна вставка; задача пропускається, якщо на цю рослину/вид/дату вже є
+    рядок у будь-якому статусі — виконане, пропущене чи перенесене не відкривається знову.
+    """
+    c.executemany("""INSERT INTO tasks(user_id,plant_id,kind,due_date,status,created_at)
+                     SELECT ?1,?2,?3,?4,'due',?5
+                     WHERE NOT EXISTS (SELECT 1 FROM tasks
+                                       WHERE user_id=?1 AND plant_id=?2 AND kind=?3 AND due_date=?4)""",
+                  rows)
+
+def touch_schedule(c, user_id: int, plant_id: int = None):
+    """
+    Позначає розклад користувача застарілим: додавання/перейменування/видалення,
+    зміна інтервалів, відмітка виконання. Без plant_id — перегенерувати все.
+    """
+    if plant_id is None:
+        c.execute("""INSERT INTO schedule_state(user_id, version) VALUES(?, 1)
+                     ON CONFLICT(user_id) DO UPDATE SET version=version+1""", (user_id,))
+        c.execute("UPDATE schedule_state SET gen_date=NULL WHERE user_id=?", (user_id,))
+    else:
+        touch_plants(c, user_id, [plant_id])
+
+def touch_plants(c, user_id: int, plant_ids):
+    """Як touch_schedule для кількох рослин: одне підвищення версії на всі."""
+    c.execute("""INSERT INTO schedule_state(user_id, version) VALUES(?, 1)
+                 ON CONFLICT(user_id) DO UPDATE SET version=version+1""", (user_id,))
+    c.executemany("INSERT OR IGNORE INTO schedule_dirty(user_id, plant_id) VALUES(?,?)",
+                  [(user_id, pid) for pid in plant_ids])
+
 def ensure_week_tasks_for_user(user_id: int):
-    c = conn()
-    rows = c.execute("""SELECT id,name,water_int,feed_int,mist_int,last_watered,last_fed,last_misted
-                        FROM plants WHERE user_id=?""", (user_id,)).fetchall()
-    t = today(); horizon = t + timedelta(days=7)
-
-    def schedule_if_due(plant_id, kind, interval, last_iso):
-        if not interval: return
-        last = fromiso(last_iso) if last_iso else t
-        due = last + timedelta(days=interval)
-        anchor = next_care_day(due)
-        if anchor > horizon: return
-        exists = c.execute("""SELECT 1 FROM tasks
-                              WHERE user_id=? AND plant_id=? AND kind=? AND due_date=? AND status='due'""",
-                           (user_id, plant_id, kind, iso(anchor))).fetchone()
-        if not exists:
-            c.execute("""INSERT INTO tasks(user_id,plant_id,kind,due_date,status,created_at)
-                         VALUES(?,?,?,?,?,?)""",
-                      (user_id, plant_id, kind, iso(anchor), 'due', iso(t)))
-
-    for pid,_,wi,fi,mi,lw,lf,lm in rows:
-        schedule_if_due(pid,'water',wi,lw)
-        schedule_if_due(pid,'feed', fi,lf)
-        schedule_if_due(pid,'mist', mi,lm)
-
-    c.commit(); c.close()
-
-def mark_task_done(task_id: int):
-    c = conn()
-    row = c.execute("SELECT user_id,plant_id,kind FROM tasks WHERE id=?", (task_id,)).fetchone()
-    if not row: c.close(); return
-    user_id, plant_id, kind = row
-    t = iso(today())
-    c.execute("UPDATE tasks SET status='done' WHERE id=?", (task_id,))
-    field = 'last_watered' if kind=='water' else 'last_fed' if kind=='feed' else 'last_misted'
-    c.execute(f"UPDATE plants SET {field}=? WHERE id=? AND user_id=?", (t, plant_id, user_id))
-    c.commit(); c.close()
-
-def move_task_to_next_care_day(task_id: int):
-    c = conn()
-    row = c.execute("SELECT user_id,plant_id,kind,due_date FROM tasks WHERE id=?", (task_id,)).fetchone()
-    if not row: c.close(); return
-    user_id, plant_id, kind, due_iso = row
-    new_due = following_care_day(fromiso(due_iso))
-    c.execute("UPDATE tasks SET status='deferred' WHERE id=?", (task_id,))
-    c.execute("""INSERT INTO tasks(user_id,plant_id,kind,due_date,status,created_at)
-                 VALUES(?,?,?,?,?,?)""",
-              (user_id, plant_id, kind, iso(new_due), 'due', iso(today())))
-    c.commit(); c.close()
-
-def mark_task_skipped(task_id: int):
-    c = conn(); c.execute("UPDATE tasks SET status='skipped' WHERE id=?", (task_id,)); c.commit(); c.close()
-
-def week_overview_text(user_id: int):
-    c = conn()
-    rows = c.execute("""
-        SELECT t.due_date, t.kind, p.name
-        FROM tasks t JOIN plants p ON p.id=t.plant_id
-        WHERE t.user_id=? AND t.status='due'
-          AND date(t.due_date) BETWEEN date('now') AND date('now','+7 day')
-        ORDER BY t.due_date, p.name
-    """, (user_id,)).fetchall()
-    c.close()
-    if not rows: return "На найближчий тиждень завдань немає — все під контролем ✨"
-    kinds = {'water':'Полив', 'feed':'Підживлення', 'mist':'Обприскування'}
-    by_day = {}
-    for due_iso, kind, name in rows:
-        by_day.setdefault(due_iso, {}).setdefault(kind, []).append(name)
-
-    lines = ["📅 Розклад на тиждень:"]
-    from datetime import date as dcls
-    for due_iso in sorted(by_day.keys()):
-        d = dcls.fromisoformat(due_iso)
-        lines.append(f"• {d.strftime('%d %B (%a)')}")
-        for kind, names in by_day[due_iso].items():
-            lines.append(f"  – {kinds[kind]}: {', '.join(sorted(names))}")
-    return "\n".join(lines)
+    """
+    Матеріалізує задачі (до HORIZON_DAYS) лише коли водяний знак застарів:
+    новий день — тільки дні, що з'явились на горизонті (+ змінені рослини);
+    той самий день — тільки змінені рослини; інакше нічого не робить.
+    """
+    t = today(user_id); t_iso = iso(t)
+    with tx() as c:
+        st = c.execute("SELECT version, gen_version, gen_date FROM schedule_state WHERE user_id=?",
+                       (user_id,)).fetchone()
+        version, gen_version, gen_date = st or (0, None, None)
+        if gen_date == t_iso and gen_version == version:
+            return
+
+        cols = "p.user_id,p.id,p.water_int,p.feed_int,p.mist_int,p.last_watered,p.last_fed,p.last_misted"
+        if gen_date == t_iso:
+            # змінені рослини перегенеровуються повністю; вже закриті сьогоднішні
+            # задачі (пропуск, перенесення) insert_due_tasks не відкриває знову
+            plants = c.execute(f"""SELECT {cols} FROM schedule_dirty d
+                                   JOIN plants p ON p.id=d.plant_id AND p.user_id=d.user_id
+                                   WHERE d.user_id=?""", (user_id,)).fetchall()
+            rows = week_task_rows(plants, t)
+        else:
+            plants = c.execute(f"SELECT {cols} FROM plants p WHERE p.user_id=?", (user_id,)).fetchall()
+            rows = week_task_rows(plants, t)
+            if gen_date and gen_date < t_iso:
+                # дні до старого горизонту вже згенеровані для незмінених рослин
+                old_horizon = iso(fromiso(gen_date) + timedelta(days=HORIZON_DAYS))
+                dirty = {pid for (pid,) in c.execute("SELECT plant_id FROM schedule_dirty WHERE user_id=?",
+                                                     (user_id,))}
+                rows = [r for r in rows if r[3] > old_horizon or r[1] in dirty]
+        insert_due_tasks(c, rows)
+
+        c.execute("DELETE FROM schedule_dirty WHERE user_id=?", (user_id,))
+        c.execute("""INSERT INTO schedule_state(user_id, version, gen_version, gen_date) VALUES(?,?,?,?)
+                     ON CONFLICT(user_id) DO UPDATE SET gen_version=excluded.gen_version, gen_date=excluded.gen_date""",
+                  (user_id, version, version, t_iso))
+
+def ensure_week_tasks_for_all(chunk: int = 2000, until: date = None) -> int:
+    """
+    Матеріалізує задачі (до HORIZON_DAYS, але не ближче until) для всіх користувачів
+    одним проходом по plants (для розсилки нагадувань). Пише порціями, щоб не тримати довгий lock.
+    """
+    tzs = all_user_tz(); by_tz = {}
+    def t_for(uid):
+        tz = tzs.get(uid, TZ)
+        if tz not in by_tz: by_tz[tz] = today_in(tz)
+        return by_tz[tz]
+
+    n = 0; last_id = 0
+    while True:
+        with tx() as c:
+            plants = c.execute("""SELECT user_id,id,water_int,feed_int,mist_int,last_watered,last_fed,last_misted
+                                  FROM plants WHERE id>? AND user_id IS NOT NULL ORDER BY id LIMIT ?""",
+                               (last_id, chunk)).fetchall()
+            if not plants: break
+            insert_due_tasks(c, (r for p in plants for r in week_task_rows([p], t_for(p[0]), until)))
+        n += len(plants); last_id = plants[-1][1]
+    return n
+
+class _NotFound(Exception):
+    """Виняток усередині tx(), щоб відкотити вже зроблені зміни."""
+
+def record_care_event(user_id: int, plant_id: int = None, kind: str = None, task_id: int = None) -> bool:
+    """
+    Відмітка догляду (полив/підживлення/обприскування) однією транзакцією:
+    last_* рослини, закриття відкритих задач цього виду на сьогодні й раніше
+    (або запис в історію, якщо таких немає) і зняття майбутніх — вони
+    перегенеруються від нової дати. Замість plant_id/kind можна дати task_id.
+    False — задача/рослина не знайдена, належить іншому користувачу або задача
+    вже закрита (повторне натискання кнопки) — тоді нічого не записується.
+    """
+    t_iso = iso(today(user_id))
+    try:
+        with tx() as c:
+            done = []
+            if task_id is not None:
+                row = c.execute("SELECT plant_id, kind FROM tasks WHERE id=? AND user_id=?",
+                                (task_id, user_id)).fetchone()
+                if not row: return False
+                plant_id, kind = row
+                done = [r[0] for r in c.execute(
+                    "UPDATE tasks SET status='done' WHERE id=? AND status='due' RETURNING due_date", (task_id,))]
+                if not done: return False
+            field = LAST_FIELD[kind]
+            if not c.execute(f"UPDATE plants SET {field}=? WHERE id=? AND user_id=?",
+                             (t_iso, plant_id, user_id)).rowcount:
+                raise _NotFound  # відкотити вже закриту задачу
+            open_ = (user_id, plant_id, kind)
+            done += [r[0] for r in c.execute("""UPDATE tasks SET status='done'
+                                                WHERE user_id=? AND plant_id=? AND kind=? AND status='due' AND due_date<=?
+                                                RETURNING due_date""", (*open_, t_iso))]
+            # одна подія догляду; запізнення — від найстарішої закритої задачі
+            delay = (fromiso(t_iso) - fromiso(min(done))).days if done else 0
+            stats.record_done(c, [(*open_, delay)])
+            if not done:
+                c.execute("""INSERT INTO tasks(user_id,plant_id,kind,due_date,status,created_at)
+                             VALUES(?,?,?,?,'done',?)""", (*open_, t_iso, t_iso))
+            c.execute("DELETE FROM tasks WHERE user_id=? AND plant_id=? AND kind=? AND status='due' AND due_date>?",
+                      (*open_, t_iso))
+            touch_schedule(c, user_id, plant_id)
+    except _NotFound:
+        return False
+    return True
+
+def move_task_to_next_care_day(user_id: int, task_id: int) -> bool:
+    """False — відкритої задачі з таким id у користувача немає."""
+    with tx() as c:
+        row = c.execute("SELECT plant_id,kind,due_date FROM tasks WHERE id=? AND user_id=? AND status='due'",
+                        (task_id, user_id)).fetchone()
+        if not row: return False
+        plant_id, kind, due_iso = row
+        new_due = following_care_day(fromiso(due_iso))
+        c.execute("UPDATE tasks SET status='deferred' WHERE id=?", (task_id,))
+        insert_due_tasks(c, [(user_id, plant_id, kind, iso(new_due), iso(today(user_id)))])
+        stats.record_deferred(c, [(user_id, plant_id, kind)])
+    return True
+
+def mark_task_skipped(user_id: int, task_id: int) -> bool:
+    """False — відкритої задачі з таким id у користувача немає."""
+    with tx() as c:
+        row = c.execute("SELECT plant_id,kind FROM tasks WHERE id=? AND user_id=? AND status='due'",
+                        (task_id, user_id)).fetchone()
+        if not row: return False
+        c.execute("UPDATE tasks SET status='skipped' WHERE id=?", (task_id,))
+        stats.record_skipped(c, user_id, *row)
+    return True
+
+def _today_due(c, user_id: int, t_iso: str, kind: str = None):
+    sql = "SELECT id, plant_id, kind, due_date FROM tasks WHERE user_id=? AND status='due' AND due_date=?"
+    args = (user_id, t_iso)
+    if kind:
+        sql += " AND kind=?"; args += (kind,)
+    return c.execute(sql, args).fetchall()
+
+def mark_today_done(user_id: int, kind: str = None) -> int:
+    """Усі сьогоднішні задачі (або лише одного виду) — виконані, однією транзакцією."""
+    t_iso = iso(today(user_id))
+    with tx() as c:
+        rows = _today_due(c, user_id, t_iso, kind)
+        if not rows: return 0
+        c.executemany("UPDATE tasks SET status='done' WHERE id=?", [(r[0],) for r in rows])
+        for k, field in LAST_FIELD.items():
+            pids = [(t_iso, r[1], user_id) for r in rows if r[2] == k]
+            if pids:
+                c.executemany(f"UPDATE plants SET {field}=? WHERE id=? AND user_id=?", pids)
+        # майбутні задачі тих самих рослин/видів перегенеруються від нової дати
+        c.executemany("DELETE FROM tasks WHERE user_id=? AND plant_id=? AND kind=? AND status='due' AND due_date>?",
+                      {(user_id, r[1], r[2], t_iso) for r in rows})
+        touch_plants(c, user_id, {r[1] for r in rows})
+        stats.record_done(c, [(user_id, r[1], r[2], 0) for r in rows])
+    return len(rows)
+
+def defer_today(user_id: int, kind: str = None) -> int:
+    """Переносить усі сьогоднішні задачі на наступний день догляду."""
+    t_iso = iso(today(user_id))
+    with tx() as c:
+        rows = _today_due(c, user_id, t_iso, kind)
+        if not rows: return 0
+        c.executemany("UPDATE tasks SET status='deferred' WHERE id=?", [(r[0],) for r in rows])
+        insert_due_tasks(c, [(user_id, pid, k, iso(following_care_day(fromiso(due))), t_iso)
+                             for _, pid, k, due in rows])
+        stats.record_deferred(c, [(user_id, r[1], r[2]) for r in rows])
+    return len(rows)
 
 def today_tasks_markup_and_text(user_id: int, kb_factory):
-    c = conn()
-    rows = c.execute("""
+    rows = conn().execute("""
         SELECT t.id, t.kind, p.name
         FROM tasks t JOIN plants p ON p.id=t.plant_id
-        WHERE t.user_id=? AND t.due_date=date('now') AND t.status='due'
+        WHERE t.user_id=? AND t.status='due' AND t.due_date=?
         ORDER BY p.name
-    """, (user_id,)).fetchall()
-    c.close()
+    """, (user_id, iso(today(user_id)))).fetchall()
     if not rows: return "Сьогодні завдань немає — відпочиваємо ✨", None
 
     kinds = {'water':'Полив', 'feed':'Підживлення', 'mist':'Обприскування'}
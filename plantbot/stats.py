@@ -0,0 +1,81 @@
+# plantbot/stats.py
+# Статистика догляду: агрегати на (користувач, рослина, вид) оновлюються
+# в тій самій транзакції, що й відмітка задачі (schedule.py), тож /stats
+# читає лише рядки care_stats користувача — без сканування історії tasks.
+from __future__ import annotations
+from typing import Iterable, Tuple
+
+from .db import conn
+
+KIND_NAMES = {'water': 'Полив', 'feed': 'Підживлення', 'mist': 'Обприскування'}
+
+# streak — поспіль виконаних вчасно; пропуск, перенесення чи запізнення обнуляють
+_BUMP = """
+INSERT INTO care_stats(user_id, plant_id, kind, done, on_time, skipped, deferred, delay_days, streak, best_streak)
+VALUES(?,?,?,?,?,?,?,?,?,?)
+ON CONFLICT(user_id, plant_id, kind) DO UPDATE SET
+  done = done + excluded.done,
+  on_time = on_time + excluded.on_time,
+  skipped = skipped + excluded.skipped,
+  deferred = deferred + excluded.deferred,
+  delay_days = delay_days + excluded.delay_days,
+  streak = CASE WHEN excluded.on_time > 0 THEN streak + 1 ELSE 0 END,
+  best_streak = max(best_streak, CASE WHEN excluded.on_time > 0 THEN streak + 1 ELSE 0 END)
+"""
+
+def record_done(c, rows: Iterable[Tuple[int, int, str, int]]):
+    """rows: (user_id, plant_id, kind, запізнення в днях)."""
+    c.executemany(_BUMP, [(u, p, k, 1, int(d <= 0), 0, 0, max(d, 0), int(d <= 0), int(d <= 0))
+                          for u, p, k, d in rows])
+
+def record_skipped(c, user_id: int, plant_id: int, kind: str):
+    c.execute(_BUMP, (user_id, plant_id, kind, 0, 0, 1, 0, 0, 0, 0))
+
+def record_deferred(c, rows: Iterable[Tuple[int, int, str]]):
+    c.executemany(_BUMP, [(u, p, k, 0, 0, 0, 1, 0, 0, 0) for u, p, k in rows])
+
+def forget_plant(c, user_id: int, plant_id: int):
+    c.execute("DELETE FROM care_stats WHERE user_id=? AND plant_id=?", (user_id, plant_id))
+
+def _pct(a: int, b: int) -> str:
+    return f"{100 * a / b:.0f}%" if b else "—"
+
+def stats_text(user_id: int) -> str:
+    """Звіт /stats: по видах догляду і рослини, яким дістається найменше уваги."""
+    rows = conn().execute("""
+        SELECT s.kind, p.name, s.done, s.on_time, s.skipped, s.deferred, s.delay_days, s.streak, s.best_streak
+        FROM care_stats s JOIN plants p ON p.id=s.plant_id
+        WHERE s.user_id=?
+    """, (user_id,)).fetchall()
+    if not rows:
+        return "Статистики ще немає — відмічай догляд у плані на сьогодні 🌱"
+
+    by_kind = {}
+    for kind, _, done, on_time, skipped, deferred, delay, streak, best in rows:
+        a = by_kind.setdefault(kind, [0, 0, 0, 0, 0, 0])
+        for i, v in enumerate((done, on_time, skipped, deferred, delay)):
+            a[i] += v
+        a[5] = max(a[5], best)
+
+    lines = ["📊 Статистика догляду"]
+    for kind in ('water', 'feed', 'mist'):
+        if kind not in by_kind:
+            continue
+        done, on_time, skipped, deferred, delay, best = by_kind[kind]
+        planned = done + skipped
+        avg = f"{delay / done:.1f} дн." if done else "—"
+        lines.append(f"• {KIND_NAMES[kind]}: виконано {done}, вчасно {_pct(on_time, planned)}, "
+                     f"пропущено {skipped}, перенесено {deferred}, середнє запізнення {avg}, "
+                     f"найдовша серія {best}")
+
+    # рослини з найнижчою часткою вчасного догляду (серед тих, де було що рахувати)
+    per_plant = {}
+    for kind, name, done, on_time, skipped, *_ in rows:
+        a = per_plant.setdefault(name, [0, 0])
+        a[0] += on_time; a[1] += done + skipped
+    weakest = sorted((on / total, name) for name, (on, total) in per_plant.items() if total)[:3]
+    weakest = [(r, n) for r, n in weakest if r < 1.0]
+    if weakest:
+        lines.append("")
+        lines.append("Потребують уваги: " + ", ".join(f"{n} ({r * 100:.0f}%)" for r, n in weakest))
+    return "\n".join(lines)
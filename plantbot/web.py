@@ -0,0 +1,189 @@
+# plantbot/web.py
+# Мінімальний вбудований async HTTP/1.1 сервер для службових ендпоінтів
+# (/healthz тощо) — без сторонніх залежностей. Тіло відповіді може бути
+# bytes або async-ітератором bytes (тоді віддаємо chunked).
+# Порт може бути відкритий назовні, тож запит обмежено за розміром і часом:
+# заголовок — MAX_HEAD байт і MAX_HEADERS рядків, тіло — MAX_BODY і лише з
+# Content-Length; на весь запит — READ_TIMEOUT, простій keep-alive —
+# IDLE_TIMEOUT. Некоректний запит отримує 4xx і з'єднання закривається.
+from __future__ import annotations
+import asyncio
+import json
+import logging
+from http import HTTPStatus
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+
+log = logging.getLogger(__name__)
+
+MAX_BODY = 1 << 20     # 1 МБ
+MAX_HEAD = 16 << 10    # рядок запиту + заголовки, 16 КБ
+MAX_HEADERS = 100
+READ_TIMEOUT = 10.0    # сек на рядок запиту, заголовки і тіло разом
+IDLE_TIMEOUT = 30.0    # сек очікування наступного запиту на keep-alive
+
+class _Reject(Exception):
+    """Запит не приймаємо: відповісти status і закрити з'єднання."""
+    def __init__(self, status: int, msg: str):
+        super().__init__(msg)
+        self.status = status
+
+class Request:
+    __slots__ = ("method", "path", "query", "headers", "body")
+
+    def __init__(self, method: str, target: str, headers: Dict[str, str], body: bytes):
+        u = urlsplit(target)
+        self.method = method
+        self.path = u.path
+        self.query = dict(parse_qsl(u.query))
+        self.headers = headers
+        self.body = body
+
+Body = Union[bytes, AsyncIterator[bytes]]
+Response = Tuple[int, Dict[str, str], Body]
+Handler = Callable[[Request], Awaitable[Response]]
+
+def json_response(obj, status: int = 200) -> Response:
+    return status, {"Content-Type": "application/json"}, json.dumps(obj, ensure_ascii=False).encode()
+
+def text_response(text: str, status: int = 200, content_type: str = "text/plain; charset=utf-8") -> Response:
+    return status, {"Content-Type": content_type}, text.encode()
+
+class WebServer:
+    def __init__(self):
+        self._routes: List[Tuple[str, str, Handler]] = []
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    def route(self, method: str, prefix: str, handler: Handler):
+        """Шлях збігається, якщо починається з prefix (довші префікси — першими)."""
+        self._routes.append((method.upper(), prefix, handler))
+        self._routes.sort(key=lambda r: -len(r[1]))
+
+    async def start(self, host: str, port: int):
+        # ліміт буфера рядка: довший рядок заголовка — ValueError у readline, не ріст пам'яті
+        self._server = await asyncio.start_server(self._serve, host, port, limit=MAX_HEAD)
+        log.info("service http on %s:%s", host, port)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def _match(self, req: Request) -> Optional[Handler]:
+        for method, prefix, handler in self._routes:
+            if req.method == method and req.path.startswith(prefix):
+                return handler
+        return None
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        # простій між запитами — тихо закриваємо; далі весь запит має встигнути за READ_TIMEOUT
+        try:
+            line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return None
+        except ValueError:  # довше за ліміт буфера StreamReader
+            raise _Reject(414, "request line too long") from None
+        if not line:
+            return None
+        try:
+            return await asyncio.wait_for(self._read_rest(reader, line), READ_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise _Reject(408, "request timeout") from None
+
+    async def _read_rest(self, reader: asyncio.StreamReader, line: bytes) -> Request:
+        if not line.endswith(b"\n"):
+            raise _Reject(400, "incomplete request line")
+        parts = line.decode("latin-1").split()
+        if len(parts) != 3 or not parts[2].startswith("HTTP/1."):
+            raise _Reject(400, "bad request line")
+        method, target, version = parts
+        size, headers = len(line), {}
+        while True:
+            try:
+                h = await reader.readline()
+            except ValueError:
+                raise _Reject(431, "header line too long") from None
+            size += len(h)
+            if size > MAX_HEAD:
+                raise _Reject(431, "headers too large")
+            if h in (b"\r\n", b"\n"):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise _Reject(431, "too many headers")
+            if not h.endswith(b"\n"):
+                raise _Reject(400, "incomplete headers")
+            k, sep, v = h.decode("latin-1").partition(":")
+            k, v = k.lower(), v.strip()
+            if not sep or not k or k != k.strip():
+                raise _Reject(400, "bad header line")
+            if k == "content-length" and headers.get(k, v) != v:
+                raise _Reject(400, "conflicting content-length")
+            headers[k] = v
+        if "transfer-encoding" in headers:
+            raise _Reject(501, "transfer-encoding not supported")
+        n = headers.get("content-length", "0")
+        if not (n.isascii() and n.isdigit()):
+            raise _Reject(400, "bad content-length")
+        n = int(n)
+        if n > MAX_BODY:
+            raise _Reject(413, "body too large")
+        body = await reader.readexactly(n) if n else b""
+        if version == "HTTP/1.0" and headers.get("connection", "").lower() != "keep-alive":
+            headers["connection"] = "close"
+        return Request(method.upper(), target, headers, body)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    req = await self._read_request(reader)
+                except _Reject as e:
+                    await self._write(writer, (e.status, {}, str(e).encode()), close=True)
+                    break
+                except asyncio.IncompleteReadError:
+                    await self._write(writer, (400, {}, b"bad request"), close=True)
+                    break
+                if req is None:
+                    break
+                handler = self._match(req)
+                try:
+                    resp = await handler(req) if handler else (404, {}, b"not found")
+                except Exception:
+                    log.exception("service http handler failed: %s %s", req.method, req.path)
+                    resp = (500, {}, b"internal error")
+                close = req.headers.get("connection", "").lower() == "close"
+                await self._write(writer, resp, close=close, head=req.method == "HEAD")
+                if close:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _write(self, writer: asyncio.StreamWriter, resp: Response, close: bool, head: bool = False):
+        status, headers, body = resp
+        reason = HTTPStatus(status).phrase
+        out = [f"HTTP/1.1 {status} {reason}"]
+        headers = dict(headers)
+        if close:
+            headers["Connection"] = "close"
+        streaming = not isinstance(body, (bytes, bytearray))
+        if streaming:
+            headers["Transfer-Encoding"] = "chunked"
+        else:
+            headers["Content-Length"] = str(len(body))
+        out += [f"{k}: {v}" for k, v in headers.items()]
+        writer.write(("\r\n".join(out) + "\r\n\r\n").encode("latin-1"))
+        if head:
+            await writer.drain()
+            return
+        if not streaming:
+            writer.write(body)
+        else:
+            async for chunk in body:
+                if chunk:
+                    writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                    await writer.drain()
+            writer.write(b"0\r\n\r\n")
+        await writer.drain()